@@ -0,0 +1,177 @@
+# accident_source.py
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from time_utils import local_naive
+
+SEVERITIES = ('minor', 'major', 'dangerous')
+
+# Numeric columns come back as float8/bigint so rows convert straight to NumPy,
+# without Decimal or datetime objects
+ACCIDENT_QUERY = """
+SELECT id,
+       latitude::float8,
+       longitude::float8,
+       (EXTRACT(EPOCH FROM accident_time) * 1000000)::bigint AS accident_time_us,
+       severity,
+       weather_condition
+FROM accident_reports
+WHERE {where}
+ORDER BY accident_time
+{limit}"""
+
+COLUMN_DTYPES = {
+    'id': np.int64,
+    'latitude': float,
+    'longitude': float,
+    'accident_time': np.int64,
+    'severity': object,
+    'weather_condition': object
+}
+
+
+def parse_bbox(bbox):
+    """`{"min_lat", "min_lng", "max_lat", "max_lng"}` or a GeoJSON-order list
+    -> (min_lng, min_lat, max_lng, max_lat) floats"""
+    if isinstance(bbox, dict):
+        bbox = [bbox['min_lng'], bbox['min_lat'], bbox['max_lng'], bbox['max_lat']]
+    if len(bbox) != 4:
+        raise ValueError('bbox needs four values')
+    min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox)
+    if not all(-90 <= v <= 90 for v in (min_lat, max_lat)):
+        raise ValueError('bbox latitudes must be between -90 and 90')
+    if not all(-180 <= v <= 180 for v in (min_lng, max_lng)):
+        raise ValueError('bbox longitudes must be between -180 and 180')
+    if min_lat > max_lat or min_lng > max_lng:
+        raise ValueError('bbox minimums must not exceed maximums')
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def parse_filter(payload):
+    """Validate an analytics filter and turn it into (where_sql, params, limit).
+
+    Supported keys, all optional:
+        start, end  ISO timestamps, inclusive start and exclusive end; times
+                    with an offset are converted to local time, like
+                    the stored accident_time
+        bbox        {"min_lat", "min_lng", "max_lat", "max_lng"} or
+                    [min_lng, min_lat, max_lng, max_lat] (GeoJSON order)
+        severity    one of minor/major/dangerous, or a list of them
+        limit       maximum number of rows
+    """
+    payload = payload or {}
+    clauses = ['latitude IS NOT NULL', 'longitude IS NOT NULL']
+    params = []
+
+    start = local_naive(payload['start']) if payload.get('start') else None
+    end = local_naive(payload['end']) if payload.get('end') else None
+    if start is not None and end is not None and start >= end:
+        raise ValueError('start must be before end')
+    if start is not None:
+        clauses.append('accident_time >= %s')
+        params.append(start.to_pydatetime())
+    if end is not None:
+        clauses.append('accident_time < %s')
+        params.append(end.to_pydatetime())
+
+    bbox = payload.get('bbox')
+    if bbox:
+        min_lng, min_lat, max_lng, max_lat = parse_bbox(bbox)
+        # Uses the GIST index on location
+        clauses.append('location && ST_MakeEnvelope(%s, %s, %s, %s, 4326)::geography')
+        params.extend([min_lng, min_lat, max_lng, max_lat])
+
+    severity = payload.get('severity')
+    if severity:
+        severity = [severity] if isinstance(severity, str) else list(severity)
+        unknown = set(severity) - set(SEVERITIES)
+        if unknown:
+            raise ValueError(f'Unknown severity {sorted(unknown)}')
+        clauses.append('severity = ANY(%s)')
+        params.append(severity)
+
+    limit = int(payload['limit']) if payload.get('limit') is not None else None
+    if limit is not None and limit < 1:
+        raise ValueError('limit must be at least 1')
+    return ' AND '.join(clauses), params, limit
+
+
+class AccidentSource:
+    """Accidents read directly from `accident_reports`.
+
+    Connections come from a psycopg2 ThreadedConnectionPool created on first
+    use. Rows are streamed through a server-side (named) cursor in batches of
+    `batch_size` and copied column by column into NumPy arrays, so only one
+    batch of Python tuples is alive at a time.
+    """
+
+    def __init__(self, dsn=None, minconn=1, maxconn=8, batch_size=50_000):
+        self.dsn = dsn or os.environ.get('DATABASE_URL')
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.batch_size = batch_size
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def query(self, filters=None):
+        """Accidents matching `filters` (see parse_filter) as a DataFrame"""
+        where, params, limit = parse_filter(filters)
+        sql = ACCIDENT_QUERY.format(where=where, limit='LIMIT %s' if limit is not None else '')
+        if limit is not None:
+            params.append(limit)
+
+        columns = {name: [] for name in COLUMN_DTYPES}
+        with self._connection() as conn:
+            with conn.cursor(name=f'accidents_{uuid.uuid4().hex}') as cur:
+                cur.itersize = self.batch_size
+                cur.execute(sql, tuple(params))
+                while True:
+                    rows = cur.fetchmany(self.batch_size)
+                    if not rows:
+                        break
+                    for (name, dtype), values in zip(COLUMN_DTYPES.items(), zip(*rows)):
+                        columns[name].append(np.array(values, dtype=dtype))
+
+        arrays = {
+            name: np.concatenate(columns[name]) if columns[name] else np.empty(0, dtype=dtype)
+            for name, dtype in COLUMN_DTYPES.items()
+        }
+        arrays['accident_time'] = pd.to_datetime(arrays['accident_time'], unit='us')
+        return pd.DataFrame(arrays)
+
+    @contextmanager
+    def _connection(self):
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            yield conn
+            # Read-only work: end the transaction that holds the named cursor
+            conn.rollback()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn, close=bool(conn.closed))
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if not self.dsn:
+                        raise RuntimeError('DATABASE_URL is not configured')
+                    from psycopg2.pool import ThreadedConnectionPool
+
+                    self._pool = ThreadedConnectionPool(self.minconn, self.maxconn, self.dsn)
+        return self._pool
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
@@ -1,6 +1,26 @@
-from typing import Dict, Any
+from typing import Dict, Any, Sequence
 import math
 
+import numpy as np
+import pandas as pd
+
+# Lower bounds of each risk level on the 0-100 score, highest first
+RISK_LEVELS = (
+    (70.0, 'CRITICAL'),
+    (50.0, 'HIGH'),
+    (30.0, 'MEDIUM'),
+    (0.0, 'LOW')
+)
+
+# Weather condition keyword -> severity, checked in order
+WEATHER_SEVERITY = (
+    ('rain', 0.6),
+    ('storm', 0.9),
+    ('fog', 0.5)
+)
+
+COMPONENTS = ('historical', 'traffic', 'weather', 'infrastructure')
+
 
 class AdvancedRiskEngine:
     """Compute a composite risk score from multiple inputs.
@@ -48,6 +68,67 @@ class AdvancedRiskEngine:
 
         return {'score': round(score, 2), 'breakdown': breakdown}
 
+    def compute_risk_batch(self, historical_rate, traffic_level, weather_severity,
+                           infrastructure_score=1.0) -> Dict[str, Any]:
+        """Vectorized `compute_risk` for many locations at once.
+
+        Each input is an array (or scalar, broadcast) with the same meaning
+        as the `compute_risk` keys. Returns arrays: `score` (rounded like
+        `compute_risk`), `level` (see `risk_level`) and `breakdown` with one
+        array per component.
+        """
+        historical, traffic, weather, infra_score = np.broadcast_arrays(
+            *(np.asarray(v, dtype=float) for v in
+              (historical_rate, traffic_level, weather_severity, infrastructure_score))
+        )
+        infra = 1.0 - infra_score
+
+        weighted = (
+            historical * self.weights['historical'] +
+            traffic * self.weights['traffic'] +
+            weather * self.weights['weather'] +
+            infra * self.weights['infrastructure']
+        )
+        score = np.round(np.clip(weighted, 0.0, 1.0) * 100.0, 2)
+
+        breakdown = {
+            f'{name}_component': value * self.weights[name] * 100.0
+            for name, value in zip(COMPONENTS, (historical, traffic, weather, infra))
+        }
+        return {'score': score, 'level': self.risk_levels(score), 'breakdown': breakdown}
+
+    @staticmethod
+    def risk_level(score: float) -> str:
+        """CRITICAL / HIGH / MEDIUM / LOW for a 0-100 score"""
+        for bound, level in RISK_LEVELS:
+            if score >= bound:
+                return level
+        return RISK_LEVELS[-1][1]
+
+    @staticmethod
+    def risk_levels(scores) -> np.ndarray:
+        """`risk_level` of every score in an array"""
+        scores = np.asarray(scores, dtype=float)
+        return np.select([scores >= bound for bound, _ in RISK_LEVELS[:-1]],
+                         [level for _, level in RISK_LEVELS[:-1]], RISK_LEVELS[-1][1])
+
+    @staticmethod
+    def weather_severity(condition: str) -> float:
+        """Severity (0-1) of a free-text weather condition such as 'light rain'"""
+        condition = (condition or '').lower()
+        for keyword, severity in WEATHER_SEVERITY:
+            if keyword in condition:
+                return severity
+        return 0.0
+
+    @classmethod
+    def weather_severities(cls, conditions: Sequence[str]) -> np.ndarray:
+        """`weather_severity` of every condition; each distinct string is matched once"""
+        codes, distinct = pd.factorize(np.asarray(conditions, dtype=object))
+        # Missing conditions get code -1, which picks the trailing 0.0
+        severities = np.array([cls.weather_severity(str(c)) for c in distinct] + [0.0])
+        return severities[codes]
+
     def should_alert(self, score: float, threshold: float = 75.0) -> bool:
         return score >= threshold
 
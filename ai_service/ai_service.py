@@ -1,55 +1,476 @@
 # ai_service.py
 from flask import Flask, request, jsonify
-from severity_prediction import SeverityPredictor
+from model_registry import ModelRegistry
 from hotspot_detection import HotspotDetector
+from incremental_hotspots import IncrementalHotspotEngine
 from alert_engine import AlertEngine
+from alert_sessions import AlertSessionStore
+from hotspot_index import HotspotIndexCache
+from hotspot_store import HotspotStore, engine_source, database_source
 from exif_gps_extractor import ExifGPSExtractor
-from time_series_forecasting import AccidentForecaster
+from exif_cache import ExifResultCache
+from forecast_cache import ForecastCache
+from bulk_forecasting import BulkForecaster, ForecastStore
+from ingestion import read_accidents
+from accident_source import AccidentSource, parse_bbox
+from heatmap_tiles import HeatmapTiles, aggregate_cells, cell_records
+from pattern_rollups import PatternRollups
+from job_queue import JobQueue, job_key
+from training_pipeline import TrainingPipeline, db_chunks
 from advanced_risk_engine import AdvancedRiskEngine
+from route_risk import RouteRiskScorer
+from facility_index import FacilityIndex
+from time_utils import local_naive
 import pandas as pd
+import numpy as np
 import os
+import time
+import zipfile
 from datetime import datetime, timedelta
 
 app = Flask(__name__)
 
 # Initialize components
-severity_predictor = SeverityPredictor()
-hotspot_detector = HotspotDetector()
-exif_extractor = ExifGPSExtractor()
-forecaster = AccidentForecaster()
+model_registry = ModelRegistry(os.environ.get('MODEL_DIR', 'models'))
+try:
+    # Loaded at import so preforked workers share the model pages
+    model_registry.load()
+except Exception as e:
+    app.logger.warning(f'Severity model not loaded: {e}')
+# 'auto' switches to grid-microcluster DBSCAN for very large point sets
+hotspot_detector = HotspotDetector(mode=os.environ.get('HOTSPOT_CLUSTERING', 'auto'))
+hotspot_engine = IncrementalHotspotEngine()
+# Results are cached by metadata digest; EXIF_CACHE_DIR adds a disk tier that survives restarts
+exif_extractor = ExifGPSExtractor(
+    max_workers=int(os.environ.get('EXIF_WORKERS', 8)),
+    cache=ExifResultCache(
+        max_entries=int(os.environ.get('EXIF_CACHE_SIZE', 4096)),
+        cache_dir=os.environ.get('EXIF_CACHE_DIR')
+    )
+)
+forecast_cache = ForecastCache(
+    max_entries=int(os.environ.get('FORECAST_CACHE_SIZE', 64)),
+    cache_dir=os.environ.get('FORECAST_CACHE_DIR', os.path.join('ai_models', 'forecasts'))
+)
+forecast_store = ForecastStore(os.environ.get('FORECAST_STORE_DIR', os.path.join('ai_models', 'forecast_store')))
+bulk_forecaster = BulkForecaster(forecast_store, max_workers=int(os.environ.get('FORECAST_WORKERS', 0)) or None)
 risk_engine = AdvancedRiskEngine()
+hotspot_index_cache = HotspotIndexCache()
+# Real-time alert state per device; pings closer than ALERT_MIN_MOVE_M to the last check are not re-evaluated
+alert_sessions = AlertSessionStore(
+    ttl=float(os.environ.get('ALERT_SESSION_TTL', 1800)),
+    min_move_m=float(os.environ.get('ALERT_MIN_MOVE_M', 25))
+)
+# Created on first use; needs googlemaps and GOOGLE_MAPS_API_KEY
+maps_client = None
+# Emergency facilities from a local snapshot file, re-read when the file changes
+facility_index = FacilityIndex(
+    os.environ.get('FACILITY_SNAPSHOT', os.path.join('ai_models', 'emergency_facilities.json')),
+    refresh_interval=float(os.environ.get('FACILITY_REFRESH_INTERVAL', 300))
+)
+heatmap_tiles = HeatmapTiles()
+pattern_rollups = PatternRollups(os.environ.get('PATTERN_ROLLUPS_PATH', os.path.join('ai_models', 'pattern_rollups.json')))
+# Background jobs for requests sent with `async`; finished results are kept for JOB_TTL seconds
+job_queue = JobQueue(
+    max_workers=int(os.environ.get('JOB_WORKERS', 2)),
+    ttl=float(os.environ.get('JOB_TTL', 3600))
+)
+# Lets analytics requests send a filter instead of rows; the pool opens on first use
+accident_source = AccidentSource(
+    os.environ.get('DATABASE_URL'),
+    maxconn=int(os.environ.get('DB_POOL_SIZE', 8))
+)
+
+# Hotspots used by /check-alerts: the live engine by default, or the
+# `hotspots` table when HOTSPOT_SOURCE=database
+if os.environ.get('HOTSPOT_SOURCE') == 'database':
+    hotspot_loader, hotspot_version = database_source()
+else:
+    hotspot_loader, hotspot_version = engine_source(hotspot_engine)
+hotspot_store = HotspotStore(
+    hotspot_loader,
+    version_source=hotspot_version,
+    ttl=float(os.environ.get('HOTSPOT_STORE_TTL', 300))
+)
+
+def seed_live_state(seed_hotspots=True):
+    """Fill the in-memory stores, which start empty, from the stored accidents.
+
+    The heatmap tiles are always rebuilt; the hotspot engine only when it
+    serves the hotspot store. One query feeds both.
+    """
+    accidents = accident_source.query()
+    total = heatmap_tiles.load(accidents)
+    result = {'success': True, 'heatmap_version': heatmap_tiles.version, 'total_incidents': total}
+    if seed_hotspots:
+        hotspots = hotspot_engine.load(accidents)
+        result.update(version=hotspot_engine.version, total_hotspots=len(hotspots))
+    return result
+
+# Seeded in the background so startup is not held up; the store picks up
+# the new engine version as soon as the load finishes
+if accident_source.dsn:
+    job_queue.submit('seed', lambda: seed_live_state(os.environ.get('HOTSPOT_SOURCE') != 'database'))
+else:
+    app.logger.warning('DATABASE_URL is not configured; hotspots and heatmap tiles stay empty '
+                       'until /hotspots/ingest, /hotspots/reconcile or /heatmap/rebuild')
+
+def _wants_async(options):
+    """`async` from the request options or query string"""
+    value = options.get('async')
+    if value is None:
+        value = request.args.get('async')
+    return value is True or str(value).lower() in ('1', 'true')
+
+def _run_or_submit(kind, func, df=None, options=None):
+    """Respond with `func()`, or queue it as a background job when the request sets `async`.
+
+    Identical requests (same kind, rows and options) still queued or running
+    share one job. The job result is the body the synchronous call returns,
+    and a failed job answers with the synchronous handlers' 400.
+    """
+    options = options or {}
+    if not _wants_async(options):
+        return jsonify(func())
+    
+    key = job_key(kind, df, {k: v for k, v in options.items() if k != 'async'})
+    status, deduplicated = job_queue.submit(kind, func, key=key, error_status=400)
+    return jsonify({
+        'success': True,
+        'job': status,
+        'deduplicated': deduplicated,
+        'status_url': f"/jobs/{status['id']}",
+        'result_url': f"/jobs/{status['id']}/result"
+    }), 202
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Queued, running and recently finished background jobs (`?kind=` to filter)"""
+    return jsonify({'success': True, 'jobs': job_queue.jobs(request.args.get('kind'))})
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    status = job_queue.status(job_id)
+    if status is None:
+        return jsonify({'error': f'Unknown job {job_id}', 'success': False}), 404
+    return jsonify({'success': True, 'job': status})
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """Body of the finished request; 202 with the status while the job is pending"""
+    status, result = job_queue.result(job_id)
+    if status is None:
+        return jsonify({'error': f'Unknown job {job_id}', 'success': False}), 404
+    if status['status'] == 'failed':
+        return jsonify({'error': status['error'], 'success': False, 'job': status}), status['error_status']
+    if status['status'] != 'succeeded':
+        return jsonify({'success': True, 'job': status}), 202
+    return jsonify(result)
 
 @app.route('/predict-severity', methods=['POST'])
 def predict_severity():
     data = request.json
     try:
-        prediction = severity_predictor.predict(data)
+        prediction = model_registry.get().predict(data)
         return jsonify(prediction)
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+@app.route('/predict-severity/batch', methods=['POST'])
+def predict_severity_batch():
+    """Score many accidents in one call.
+
+    Accepts a list of feature dicts (`rows`, or the body itself) or a
+    columnar payload `{"columns": {feature: [values]}}`.
+    """
+    try:
+        data = request.json
+        if isinstance(data, list):
+            features = data
+        elif 'columns' in data:
+            features = data['columns']
+        else:
+            features = data.get('rows', [])
+        chunk_size = int(data.get('chunk_size', 4096)) if isinstance(data, dict) else 4096
+        
+        predictions = model_registry.get().predict_batch(features, chunk_size=max(1, min(chunk_size, 65536)))
+        return jsonify({
+            'success': True,
+            'predictions': predictions,
+            'count': len(predictions)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
+@app.route('/models', methods=['GET'])
+def model_status():
+    """Active and available severity model versions"""
+    return jsonify({'success': True, **model_registry.status()})
+
+@app.route('/models/reload', methods=['POST'])
+def reload_model():
+    """Hot-swap the severity model to `version`, or to whatever CURRENT names"""
+    try:
+        data = request.get_json(silent=True) or {}
+        version = data.get('version')
+        if version:
+            active = model_registry.activate(version)
+        else:
+            active = model_registry.reload_if_changed()
+        return jsonify({'success': True, 'active_version': active})
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
+@app.route('/models/train', methods=['POST'])
+def train_model():
+    """Train a new severity model version, as a background job unless `async` is false.
+
+    Trains on posted `rows` (the load_training_data columns), or on the
+    database when none are sent; `activate` switches the service to the new
+    version once it is written.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        rows = pd.DataFrame(data.get('rows') or [])
+        activate = bool(data.get('activate'))
+        if rows.empty and not accident_source.dsn:
+            return jsonify({'error': 'No training rows and DATABASE_URL is not configured', 'success': False}), 400
+        
+        def train():
+            chunks = [rows] if not rows.empty else db_chunks(accident_source.dsn, 100_000)
+            report = TrainingPipeline(output_dir=model_registry.root).run(
+                chunks, activate=activate, registry=model_registry
+            )
+            return {'success': True, **report, 'active_version': model_registry.version}
+        
+        options = {'activate': activate, 'async': data.get('async', True)}
+        return _run_or_submit('train', train, rows, options)
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
 @app.route('/detect-hotspots', methods=['POST'])
 def detect_hotspots():
-    data = request.json
-    df = pd.DataFrame(data)
     try:
-        hotspots = hotspot_detector.detect_hotspots(df)
-        return jsonify(hotspots)
+        df, options = read_accidents(request, source=accident_source)
+        mode = options.get('mode') or request.args.get('mode')
+        return _run_or_submit(
+            'detect-hotspots',
+            lambda: hotspot_detector.find_hotspots(df, mode=mode),
+            df, {**options, 'mode': mode}
+        )
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+@app.route('/hotspots', methods=['GET'])
+def get_hotspots():
+    """Current hotspots maintained by the incremental engine"""
+    hotspots = hotspot_engine.hotspots()
+    return jsonify({
+        'success': True,
+        'version': hotspot_engine.version,
+        'hotspots': hotspots,
+        'total_hotspots': len(hotspots)
+    })
+
+@app.route('/hotspots/ingest', methods=['POST'])
+def ingest_hotspot_reports():
+    """Add new accident report(s) to the live hotspot set"""
+    try:
+        data = request.json
+        reports = data if isinstance(data, list) else [data]
+        updated = hotspot_engine.insert_many(reports)
+        heatmap_tiles.add_many(reports)
+        pattern_rollups.add_many(reports)
+        
+        return jsonify({
+            'success': True,
+            'version': hotspot_engine.version,
+            'updated_hotspots': updated,
+            'message': f'{len(reports)} report(s) ingested'
+        })
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
+@app.route('/hotspots/reconcile', methods=['POST'])
+def reconcile_hotspots():
+    """Full re-cluster of the live hotspot set, optionally from a new accident list"""
+    try:
+        data = request.get_json(silent=True) or {}
+        accidents = pd.DataFrame(data.get('accidents') or [])
+        
+        def reconcile():
+            if not accidents.empty:
+                hotspots = hotspot_engine.load(accidents)
+            else:
+                hotspot_engine.reconcile()
+                hotspots = hotspot_engine.hotspots()
+            return {
+                'success': True,
+                'version': hotspot_engine.version,
+                'hotspots': hotspots,
+                'total_hotspots': len(hotspots)
+            }
+        
+        return _run_or_submit('hotspots-reconcile', reconcile, accidents, data)
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
 @app.route('/check-alerts', methods=['POST'])
 def check_alerts():
-    data = request.json
-    user_lat = data.get('latitude')
-    user_lng = data.get('longitude')
-    hotspots = data.get('hotspots')
-    weather = data.get('weather')
-    
-    engine = AlertEngine(hotspots, weather)
-    alerts = engine.check_user_location(user_lat, user_lng)
-    
-    return jsonify({'alerts': alerts})
+    """Check a user location against the server-side hotspot set"""
+    try:
+        data = request.json
+        user_lat = data.get('latitude')
+        user_lng = data.get('longitude')
+        weather = data.get('weather')
+        timestamp = data.get('timestamp')
+        user_time = local_naive(timestamp).to_pydatetime() if timestamp else None
+        
+        if user_lat is None or user_lng is None:
+            return jsonify({'error': 'Latitude and longitude required'}), 400
+        
+        hotspots = data.get('hotspots')
+        hotspots_version = data.get('hotspots_version')
+        
+        if hotspots is not None:
+            # Legacy callers that still ship their own hotspot list
+            if hotspots_version is not None:
+                index = hotspot_index_cache.get(hotspots_version, lambda: hotspots)
+            else:
+                index = None
+            engine = AlertEngine(hotspots, weather, index=index)
+        else:
+            index = hotspot_store.get()
+            hotspots_version = index.version
+            engine = AlertEngine(None, weather, index=index)
+        
+        alerts = engine.check_user_location(user_lat, user_lng, user_time)
+        
+        return jsonify({'alerts': alerts, 'hotspots_version': hotspots_version})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/check-alerts/batch', methods=['POST'])
+def check_alerts_batch():
+    """Check a burst of device positions against the hotspot store in one call.
+
+    Accepts `locations` as a list of {device_id, latitude, longitude,
+    timestamp, weather} objects, or the same fields as parallel arrays.
+    """
+    try:
+        data = request.json
+        locations = data.get('locations')
+        
+        if locations is not None:
+            device_ids = [loc.get('device_id') for loc in locations]
+            lats = [loc.get('latitude') for loc in locations]
+            lngs = [loc.get('longitude') for loc in locations]
+            timestamps = [loc.get('timestamp') for loc in locations]
+            weathers = [loc.get('weather') for loc in locations]
+        else:
+            device_ids = data.get('device_id', [])
+            lats = data.get('latitude', [])
+            lngs = data.get('longitude', [])
+            timestamps = data.get('timestamp')
+            weathers = data.get('weather')
+        
+        if not (len(device_ids) == len(lats) == len(lngs)):
+            return jsonify({'error': 'device_id, latitude and longitude must have the same length', 'success': False}), 400
+        if any(lat is None for lat in lats) or any(lng is None for lng in lngs):
+            return jsonify({'error': 'Latitude and longitude required for every position', 'success': False}), 400
+        
+        index = hotspot_store.get()
+        engine = AlertEngine(None, data.get('default_weather'), index=index)
+        
+        start = time.perf_counter()
+        alerts = engine.check_locations_batch(device_ids, lats, lngs, timestamps, weathers)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        return jsonify({
+            'success': True,
+            'alerts': alerts,
+            'positions_checked': len(device_ids),
+            'devices_alerted': sum(1 for device_alerts in alerts.values() if device_alerts),
+            'hotspots_version': index.version,
+            'elapsed_ms': round(elapsed_ms, 2)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
+@app.route('/alerts/real-time', methods=['POST'])
+def real_time_alerts():
+    """Alerts for a navigating device, sent only when it enters or leaves a risky hotspot.
+
+    Takes `user_id` (or `device_id`), `location` {lat, lng} (or
+    `latitude`/`longitude`) and optional `conditions` {timestamp, weather}.
+    `alert_triggered` and `alert` (the highest-risk new alert) are set only
+    on entering; `refreshed_alerts` are expired alerts extended because the
+    device is still in their hotspot, and `active_alerts` lists every alert
+    still in force.
+    """
+    try:
+        data = request.json
+        device_id = data.get('device_id') or data.get('user_id')
+        location = data.get('location') or {}
+        lat = location.get('lat', data.get('latitude'))
+        lng = location.get('lng', data.get('longitude'))
+        
+        if device_id is None:
+            return jsonify({'error': 'user_id or device_id required', 'success': False}), 400
+        if lat is None or lng is None:
+            return jsonify({'error': 'Latitude and longitude required', 'success': False}), 400
+        lat, lng = float(lat), float(lng)
+        
+        conditions = data.get('conditions') or {}
+        timestamp = conditions.get('timestamp')
+        user_time = local_naive(timestamp).to_pydatetime() if timestamp else datetime.now()
+        weather = conditions.get('weather') or {}
+        if isinstance(weather, str):
+            weather = {'condition': weather}
+        
+        index = hotspot_store.get()
+        engine = AlertEngine(None, weather, index=index)
+        
+        session = alert_sessions.check(
+            str(device_id), lat, lng,
+            lambda: engine.check_user_location(lat, lng, user_time),
+            hour=user_time.hour,
+            weather=weather.get('condition', ''),
+            version=index.alert_version()
+        )
+        entered = session['entered']
+        
+        return jsonify({
+            'success': True,
+            'alert_triggered': bool(entered),
+            'alert': max(entered, key=lambda a: a['risk_score']) if entered else None,
+            'alerts': entered,
+            'refreshed_alerts': session['refreshed'],
+            'exited_hotspots': session['exited'],
+            'active_alerts': session['active'],
+            'evaluated': session['evaluated'],
+            'hotspots_version': index.version
+        })
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
+@app.route('/alerts/real-time/<device_id>', methods=['DELETE'])
+def end_real_time_session(device_id):
+    """Drop a device's alert session when navigation ends"""
+    return jsonify({'success': True, 'ended': alert_sessions.end(device_id)})
+
+@app.route('/hotspots/refresh', methods=['POST'])
+def refresh_hotspot_store():
+    """Reload the server-side hotspot set used by /check-alerts"""
+    try:
+        index = hotspot_store.refresh()
+        return jsonify({
+            'success': True,
+            'version': index.version,
+            'total_hotspots': len(index)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
 
 @app.route('/extract-exif', methods=['POST'])
 def extract_exif():
@@ -74,32 +495,187 @@ def extract_exif():
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 400
 
+MAX_BATCH_IMAGES = 100
+# Larger archive members are rejected without being decompressed
+MAX_ARCHIVE_MEMBER_BYTES = int(os.environ.get('EXIF_MAX_MEMBER_BYTES', 25 * 1024 * 1024))
+
+@app.route('/extract-exif/batch', methods=['POST'])
+def extract_exif_batch():
+    """Extract GPS from several images in one call.
+
+    JSON: {"images": [{"image_path", "filename"}]} or {"image_paths": [...]}.
+    Multipart: any number of `images` files and/or a zip `archive`.
+    Results are returned in input order.
+    """
+    try:
+        names, images = [], []
+        archive = None
+        if request.files:
+            # Uploads and archive members are passed as streams so only their headers are read
+            for upload in request.files.getlist('images'):
+                names.append(upload.filename)
+                images.append(upload.stream)
+            if 'archive' in request.files:
+                archive = zipfile.ZipFile(request.files['archive'].stream)
+                for info in archive.infolist():
+                    if info.is_dir():
+                        continue
+                    if len(images) >= MAX_BATCH_IMAGES:
+                        break
+                    if info.file_size > MAX_ARCHIVE_MEMBER_BYTES:
+                        archive.close()
+                        return jsonify({
+                            'error': f'{info.filename} is larger than {MAX_ARCHIVE_MEMBER_BYTES} bytes',
+                            'success': False
+                        }), 400
+                    names.append(info.filename)
+                    images.append((archive.open(info), info.file_size))
+        else:
+            data = request.json
+            items = data.get('images') or [{'image_path': p} for p in data.get('image_paths', [])]
+            for item in items:
+                names.append(item.get('filename') or os.path.basename(item['image_path']))
+                images.append(item['image_path'])
+        
+        if not images:
+            return jsonify({'error': 'No images provided', 'success': False}), 400
+        if len(images) > MAX_BATCH_IMAGES:
+            return jsonify({'error': f'At most {MAX_BATCH_IMAGES} images per batch', 'success': False}), 400
+        
+        try:
+            batch = exif_extractor.extract_gps_batch(images)
+        finally:
+            if archive is not None:
+                archive.close()
+        
+        return jsonify({
+            'success': True,
+            'results': [
+                {'index': i, 'filename': name, 'gps_data': gps_data}
+                for i, (name, gps_data) in enumerate(zip(names, batch['results']))
+            ],
+            'count': len(images),
+            'elapsed_ms': batch['elapsed_ms'],
+            'images_per_second': batch['images_per_second'],
+            'message': f'EXIF data extracted for {len(images)} images'
+        })
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
 @app.route('/forecast-accidents', methods=['POST'])
 def forecast_accidents():
     """Forecast accident trends for next 7-30 days"""
     try:
-        data = request.json
+        df, data = read_accidents(request, source=accident_source)
         periods = data.get('periods', 7)
-        accidents_data = data.get('accidents', [])
         
-        if not accidents_data:
+        if df.empty:
             return jsonify({'error': 'No accident data provided'}), 400
         
-        # Convert to DataFrame
-        df = pd.DataFrame(accidents_data)
         df['ds'] = pd.to_datetime(df['accident_time'])
         df = df.groupby('ds').size().reset_index(name='y')
         
-        # Fit and predict
-        forecaster.fit(df)
-        forecast = forecaster.predict(periods=min(periods, 30))
+        def forecast():
+            # Fit (or reuse the cached model for this exact series) and predict
+            result, cached = forecast_cache.forecast(df, periods=min(periods, 30))
+            return {
+                'success': True,
+                'forecast': result[['ds', 'yhat']].to_dict('records'),
+                'periods': periods,
+                'cached': cached,
+                'message': f'Forecast generated for next {periods} days'
+            }
         
-        return jsonify({
-            'success': True,
-            'forecast': forecast[['ds', 'yhat']].to_dict('records'),
-            'periods': periods,
-            'message': f'Forecast generated for next {periods} days'
-        })
+        return _run_or_submit('forecast', forecast, df, {'periods': periods, 'async': data.get('async')})
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
+@app.route('/forecast-accidents/bulk', methods=['POST'])
+def forecast_accidents_bulk():
+    """Forecast every region (district column, grid cell or hotspot) and store the results"""
+    try:
+        df, data = read_accidents(request, source=accident_source)
+        group_by = data.get('group_by', 'district')
+        
+        if df.empty:
+            return jsonify({'error': 'No accident data provided'}), 400
+        
+        index = hotspot_store.get() if group_by == 'hotspot' else None
+        
+        def forecast_all():
+            summary = bulk_forecaster.run(
+                df,
+                group_by=group_by,
+                periods=min(int(data.get('periods', 14)), 30),
+                grid_size=float(data.get('grid_size', 0.01)),
+                hotspot_index=index
+            )
+            return {
+                'success': True,
+                **summary,
+                'message': f"Forecasts stored for {summary['regions']} regions"
+            }
+        
+        return _run_or_submit('forecast-bulk', forecast_all, df, data)
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
+@app.route('/forecasts', methods=['GET'])
+def list_forecasts():
+    """Groupings with stored bulk forecasts"""
+    return jsonify({'success': True, 'groupings': forecast_store.groupings()})
+
+@app.route('/forecasts/<group_by>', methods=['GET'])
+@app.route('/forecasts/<group_by>/<path:region>', methods=['GET'])
+def get_forecasts(group_by, region=None):
+    """Stored bulk forecasts for a grouping, or one region of it"""
+    try:
+        document = forecast_store.load(group_by)
+        if document is None:
+            return jsonify({'error': f'No forecasts stored for {group_by}', 'success': False}), 404
+        
+        if region is not None:
+            if region not in document['regions']:
+                return jsonify({'error': f'No forecast for region {region}', 'success': False}), 404
+            document = {**document, 'regions': {region: document['regions'][region]}}
+        
+        return jsonify({'success': True, **document})
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
+@app.route('/analyze-patterns', methods=['GET'])
+def rollup_patterns():
+    """Patterns of all ingested accidents (or `?region=`) from the running rollups"""
+    region = request.args.get('region')
+    patterns = pattern_rollups.patterns(region)
+    if patterns is None:
+        return jsonify({'error': f'Unknown region {region}', 'success': False}), 404
+    
+    # Cluster sizes come from the live DBSCAN state and are not tracked per region
+    patterns['location_clusters'] = hotspot_engine.cluster_sizes() if region is None else {}
+    return jsonify({
+        'success': True,
+        'patterns': patterns,
+        'regions': pattern_rollups.regions(),
+        'message': 'Pattern analysis completed'
+    })
+
+@app.route('/analyze-patterns/rebuild', methods=['POST'])
+def rebuild_pattern_rollups():
+    """Recompute the rollups from posted accidents or a database filter"""
+    try:
+        df, options = read_accidents(request, source=accident_source)
+        
+        def rebuild():
+            total = pattern_rollups.rebuild(df)
+            return {
+                'success': True,
+                'total_accidents': total,
+                'regions': len(pattern_rollups.regions()),
+                'message': 'Pattern rollups rebuilt'
+            }
+        
+        return _run_or_submit('patterns-rebuild', rebuild, df, options)
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 400
 
@@ -107,52 +683,50 @@ def forecast_accidents():
 def analyze_patterns():
     """Analyze temporal and spatial patterns in accident data"""
     try:
-        data = request.json
-        accidents_data = data.get('accidents', [])
+        df, data = read_accidents(request, source=accident_source)
         
-        if not accidents_data:
+        if df.empty:
             return jsonify({'error': 'No accident data provided'}), 400
         
-        df = pd.DataFrame(accidents_data)
-        df['accident_time'] = pd.to_datetime(df['accident_time'])
-        
-        # Temporal patterns
-        df['hour'] = df['accident_time'].dt.hour
-        df['day_of_week'] = df['accident_time'].dt.dayofweek
-        df['month'] = df['accident_time'].dt.month
-        
-        hourly_pattern = df['hour'].value_counts().sort_index().to_dict()
-        daily_pattern = df['day_of_week'].value_counts().sort_index().to_dict()
-        monthly_pattern = df['month'].value_counts().sort_index().to_dict()
-        
-        # Severity patterns
-        severity_pattern = df['severity'].value_counts().to_dict() if 'severity' in df.columns else {}
-        
-        # Location clustering
-        if 'latitude' in df.columns and 'longitude' in df.columns:
-            from sklearn.cluster import DBSCAN
-            import numpy as np
-            coords = np.radians(df[['latitude', 'longitude']].values)
-            dbscan = DBSCAN(eps=0.01, min_samples=3, metric='haversine')
-            df['cluster'] = dbscan.fit_predict(coords)
-            cluster_counts = df['cluster'].value_counts().to_dict()
-        else:
-            cluster_counts = {}
+        def analyze():
+            df['accident_time'] = pd.to_datetime(df['accident_time'])
+            
+            # Temporal patterns
+            df['hour'] = df['accident_time'].dt.hour
+            df['day_of_week'] = df['accident_time'].dt.dayofweek
+            df['month'] = df['accident_time'].dt.month
+            
+            hourly_pattern = df['hour'].value_counts().sort_index().to_dict()
+            daily_pattern = df['day_of_week'].value_counts().sort_index().to_dict()
+            monthly_pattern = df['month'].value_counts().sort_index().to_dict()
+            
+            # Severity patterns
+            severity_pattern = df['severity'].value_counts().to_dict() if 'severity' in df.columns else {}
+            
+            # Location clustering
+            if 'latitude' in df.columns and 'longitude' in df.columns:
+                coords = np.radians(df[['latitude', 'longitude']].values)
+                df['cluster'] = hotspot_detector.cluster(coords, data.get('mode'))
+                cluster_counts = df['cluster'].value_counts().to_dict()
+            else:
+                cluster_counts = {}
+            
+            return {
+                'success': True,
+                'patterns': {
+                    'hourly': hourly_pattern,
+                    'daily': daily_pattern,
+                    'monthly': monthly_pattern,
+                    'severity': severity_pattern,
+                    'location_clusters': cluster_counts,
+                    'total_accidents': len(df),
+                    'peak_hour': int(max(hourly_pattern, key=hourly_pattern.get)) if hourly_pattern else None,
+                    'peak_day': int(max(daily_pattern, key=daily_pattern.get)) if daily_pattern else None
+                },
+                'message': 'Pattern analysis completed'
+            }
         
-        return jsonify({
-            'success': True,
-            'patterns': {
-                'hourly': hourly_pattern,
-                'daily': daily_pattern,
-                'monthly': monthly_pattern,
-                'severity': severity_pattern,
-                'location_clusters': cluster_counts,
-                'total_accidents': len(df),
-                'peak_hour': int(max(hourly_pattern, key=hourly_pattern.get)) if hourly_pattern else None,
-                'peak_day': int(max(daily_pattern, key=daily_pattern.get)) if daily_pattern else None
-            },
-            'message': 'Pattern analysis completed'
-        })
+        return _run_or_submit('analyze-patterns', analyze, df, data)
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 400
 
@@ -174,13 +748,7 @@ def predict_risk():
         historical_rate = data.get('historical_rate', 0.3)
         
         # Weather impact
-        weather_severity = 0.0
-        if 'rain' in weather.lower():
-            weather_severity = 0.6
-        elif 'storm' in weather.lower():
-            weather_severity = 0.9
-        elif 'fog' in weather.lower():
-            weather_severity = 0.5
+        weather_severity = risk_engine.weather_severity(weather)
         
         # Night-time multiplier
         if hour and (hour < 6 or hour > 18):
@@ -198,14 +766,7 @@ def predict_risk():
         
         # Determine risk level
         score = risk_result['score']
-        if score >= 70:
-            risk_level = 'CRITICAL'
-        elif score >= 50:
-            risk_level = 'HIGH'
-        elif score >= 30:
-            risk_level = 'MEDIUM'
-        else:
-            risk_level = 'LOW'
+        risk_level = risk_engine.risk_level(score)
         
         return jsonify({
             'success': True,
@@ -223,36 +784,239 @@ def predict_risk():
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 400
 
+@app.route('/predict-risk/batch', methods=['POST'])
+def predict_risk_batch():
+    """Risk for many locations (grid cells, road segments) in one vectorized call.
+
+    Takes `{"locations": [...]}` of /predict-risk inputs, `{"columns": {...}}`
+    or Arrow/NDJSON rows; missing fields get the /predict-risk defaults.
+    `"format": "columns"` returns arrays instead of one dict per location.
+    """
+    try:
+        df, options = read_accidents(request, key='locations')
+        
+        if df.empty:
+            return jsonify({'error': 'No locations provided', 'success': False}), 400
+        if 'latitude' not in df.columns or 'longitude' not in df.columns:
+            return jsonify({'error': 'Latitude and longitude required', 'success': False}), 400
+        
+        def column(name, default):
+            if name not in df.columns:
+                return np.full(len(df), default, dtype=float)
+            return pd.to_numeric(df[name]).fillna(default).to_numpy(dtype=float)
+        
+        weather = (risk_engine.weather_severities(df['weather_condition'])
+                   if 'weather_condition' in df.columns else np.zeros(len(df)))
+        
+        # Night-time multiplier (hour 0 counts as not given, as in /predict-risk)
+        hour = column('hour', 0)
+        traffic = column('traffic_level', 0.5)
+        traffic = np.where((hour != 0) & ((hour < 6) | (hour > 18)), np.minimum(1.0, traffic + 0.2), traffic)
+        
+        risk = risk_engine.compute_risk_batch(
+            column('historical_rate', 0.3),
+            traffic,
+            weather,
+            column('infrastructure_score', 0.7)
+        )
+        levels, level_counts = np.unique(risk['level'], return_counts=True)
+        
+        if options.get('format') == 'columns':
+            predictions = {
+                'latitude': df['latitude'].tolist(),
+                'longitude': df['longitude'].tolist(),
+                'risk_score': risk['score'].tolist(),
+                'risk_level': risk['level'].tolist(),
+                'breakdown': {k: v.tolist() for k, v in risk['breakdown'].items()}
+            }
+        else:
+            names = list(risk['breakdown'])
+            predictions = [
+                {
+                    'location': {'latitude': lat, 'longitude': lng},
+                    'risk_score': score,
+                    'risk_level': level,
+                    'breakdown': dict(zip(names, parts))
+                }
+                for lat, lng, score, level, *parts in zip(
+                    df['latitude'].tolist(), df['longitude'].tolist(), risk['score'].tolist(),
+                    risk['level'].tolist(), *(v.tolist() for v in risk['breakdown'].values())
+                )
+            ]
+        
+        return jsonify({
+            'success': True,
+            'predictions': predictions,
+            'count': len(df),
+            'risk_levels': dict(zip(levels.tolist(), level_counts.tolist())),
+            'max_risk_score': float(risk['score'].max())
+        })
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
+def _get_maps_client():
+    global maps_client
+    if maps_client is None:
+        from google_maps_integration import GoogleMapsIntegration
+        maps_client = GoogleMapsIntegration(cache_ttl=float(os.environ.get('MAPS_CACHE_TTL', 900)))
+    return maps_client
+
+@app.route('/navigation/safe-route', methods=['POST'])
+def safe_route():
+    """Score candidate routes against the current hotspots and recommend the safest.
+
+    Takes `routes` (encoded polylines, Google Directions routes or point
+    lists); without them, alternatives from `origin` to `destination` are
+    fetched from Google Directions. `radius_km` and `step_km` tune how close
+    a route must pass a hotspot and how finely it is sampled.
+    """
+    try:
+        start = time.perf_counter()
+        data = request.get_json() or {}
+        routes = data.get('routes')
+        google_routes = None
+        if not routes:
+            if not data.get('origin') or not data.get('destination'):
+                return jsonify({'error': 'Provide routes, or origin and destination', 'success': False}), 400
+            google_routes = _get_maps_client().directions(data['origin'], data['destination'], alternatives=True)
+            routes = google_routes
+        if not routes:
+            return jsonify({'error': 'No routes found', 'success': False}), 404
+        
+        index = hotspot_store.get()
+        scorer = RouteRiskScorer(
+            index,
+            radius_km=float(data.get('radius_km', 0.5)),
+            step_km=float(data.get('step_km', 0.05))
+        )
+        scores = scorer.score(routes)
+        
+        # Safest route when avoiding high-risk areas, otherwise the first (fastest) one
+        if data.get('avoid_high_risk', True):
+            recommended = min(range(len(scores)), key=lambda i: (scores[i]['cumulative_risk'], i))
+        else:
+            recommended = 0
+        
+        results = []
+        for i, score in enumerate(scores):
+            high = [h for h in score['hotspots'] if h['risk_level'] == 'high']
+            warnings = [
+                f"Passes high-risk hotspot {h['cluster_id']} ({h['total_accidents']} accidents)"
+                for h in high
+            ]
+            route = {
+                'route_index': i,
+                'safety_analysis': {
+                    **score,
+                    'high_risk_hotspots': len(high),
+                    'warnings': warnings,
+                    'is_recommended': i == recommended
+                },
+                'total_distance': f"{score['distance_km']:.1f} km",
+                'total_duration': None,
+                'recommended': i == recommended
+            }
+            if google_routes is not None:
+                leg = google_routes[i]['legs'][0]
+                route.update(
+                    google_route_data=google_routes[i],
+                    total_distance=leg['distance']['text'],
+                    total_duration=leg['duration']['text']
+                )
+            results.append(route)
+        
+        best = scores[recommended]
+        return jsonify({
+            'success': True,
+            'routes': results,
+            'recommended_route_index': recommended,
+            'hotspot_version': index.version,
+            'safety_summary': (
+                f"Route {recommended} recommended: {len(best['hotspots'])} hotspot(s) on route, "
+                f"risk score {best['overall_risk_score']}/100"
+            ),
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
+@app.route('/navigation/nearby-emergency', methods=['POST'])
+def nearby_emergency():
+    """Nearest emergency facilities, from the local facility index when it has any.
+
+    Takes `location` {lat, lng}, `radius_meters` (default 5000), `limit`
+    (default 10) and an optional `service_type`. Without a facility snapshot
+    it falls back to the (cached) Google Places lookup.
+    """
+    try:
+        data = request.json
+        location = data.get('location') or {}
+        lat, lng = location.get('lat'), location.get('lng')
+        if lat is None or lng is None:
+            return jsonify({'error': 'location with lat and lng required', 'success': False}), 400
+        lat, lng = float(lat), float(lng)
+        radius_km = float(data.get('radius_meters', 5000)) / 1000
+        limit = int(data.get('limit', 10))
+        if limit < 1:
+            return jsonify({'error': 'limit must be at least 1', 'success': False}), 400
+        
+        if len(facility_index):
+            results = facility_index.nearest(lat, lng, k=limit, radius_km=radius_km,
+                                             service_type=data.get('service_type'))
+            source = 'local_index'
+        else:
+            places = _get_maps_client().nearby_emergency({'lat': lat, 'lng': lng}, radius_meters=radius_km * 1000)
+            results = []
+            for place in places.get('results', [])[:limit]:
+                point = place['geometry']['location']
+                results.append({
+                    'id': place.get('place_id'),
+                    'name': place.get('name'),
+                    'service_type': 'hospital',
+                    'latitude': point['lat'],
+                    'longitude': point['lng'],
+                    'address': place.get('vicinity'),
+                    'open_now': place.get('opening_hours', {}).get('open_now')
+                })
+            source = 'google_places'
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'count': len(results),
+            'source': source
+        })
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
+@app.route('/navigation/facilities/refresh', methods=['POST'])
+def refresh_facilities():
+    """Reload the emergency facility snapshot"""
+    try:
+        return jsonify({'success': True, 'facilities': facility_index.refresh()})
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
 @app.route('/heatmap-data', methods=['POST'])
 def heatmap_data():
     """Generate heatmap data for visualization"""
     try:
-        data = request.json
-        accidents_data = data.get('accidents', [])
+        df, data = read_accidents(request, source=accident_source)
         grid_size = data.get('grid_size', 0.01)  # Grid cell size in degrees
         
-        if not accidents_data:
+        if df.empty:
             return jsonify({'error': 'No accident data provided'}), 400
         
-        df = pd.DataFrame(accidents_data)
-        
-        # Create grid cells
-        df['lat_bin'] = (df['latitude'] // grid_size * grid_size).astype(float)
-        df['lng_bin'] = (df['longitude'] // grid_size * grid_size).astype(float)
         
         # Aggregate by grid cell
-        heatmap_cells = df.groupby(['lat_bin', 'lng_bin']).agg({
-            'id': 'count',
-            'severity': lambda x: (x == 'dangerous').sum()
-        }).reset_index()
-        
-        heatmap_cells.columns = ['latitude', 'longitude', 'incident_count', 'dangerous_count']
-        heatmap_cells['intensity'] = (heatmap_cells['incident_count'] / df.shape[0] * 100).round(2)
-        heatmap_cells['danger_percentage'] = (heatmap_cells['dangerous_count'] / heatmap_cells['incident_count'] * 100).round(2)
+        dangerous = (df['severity'] == 'dangerous').to_numpy() if 'severity' in df.columns else np.zeros(len(df), dtype=bool)
+        cells = aggregate_cells(df['latitude'].to_numpy(dtype=float), df['longitude'].to_numpy(dtype=float),
+                                dangerous, grid_size)
+        heatmap_cells = cell_records(*cells, grid_size, total=df.shape[0])
         
         return jsonify({
             'success': True,
-            'heatmap_cells': heatmap_cells.to_dict('records'),
+            'heatmap_cells': heatmap_cells,
             'total_cells': len(heatmap_cells),
             'total_incidents': len(df),
             'message': 'Heatmap data generated'
@@ -260,7 +1024,55 @@ def heatmap_data():
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 400
 
+@app.route('/heatmap/tiles', methods=['GET'])
+def heatmap_tile_cells():
+    """Precomputed heatmap cells for a viewport.
+
+    Query parameters: min_lat, min_lng, max_lat, max_lng (optional) and
+    either zoom (web-map zoom level) or grid_size (degrees).
+    """
+    try:
+        args = request.args
+        bounds = None
+        if 'min_lat' in args:
+            bounds = parse_bbox({k: args[k] for k in ('min_lat', 'min_lng', 'max_lat', 'max_lng')})
+        
+        grid_size, cells, total = heatmap_tiles.query(
+            bounds,
+            grid_size=args.get('grid_size', type=float),
+            zoom=args.get('zoom', type=float)
+        )
+        
+        return jsonify({
+            'success': True,
+            'grid_size': grid_size,
+            'version': heatmap_tiles.version,
+            'heatmap_cells': cells,
+            'total_cells': len(cells),
+            'total_incidents': total
+        })
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
+@app.route('/heatmap/rebuild', methods=['POST'])
+def rebuild_heatmap_tiles():
+    """Rebuild all heatmap levels from posted accidents or a database filter"""
+    try:
+        df, options = read_accidents(request, source=accident_source)
+        
+        def rebuild():
+            total = heatmap_tiles.load(df)
+            return {
+                'success': True,
+                'version': heatmap_tiles.version,
+                'levels': list(heatmap_tiles.levels),
+                'total_incidents': total,
+                'message': 'Heatmap tiles rebuilt'
+            }
+        
+        return _run_or_submit('heatmap-rebuild', rebuild, df, options)
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
 if __name__ == '__main__':
-    # In a real scenario, we would load the model here
-    # severity_predictor.load_model()
     app.run(host='0.0.0.0', port=5000)
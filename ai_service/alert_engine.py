@@ -2,9 +2,16 @@
 from datetime import datetime, timedelta
 import math
 
+import numpy as np
+import pandas as pd
+
+from hotspot_index import HotspotIndex
+from time_utils import is_night_hour, local_naive
+
 class AlertEngine:
-    def __init__(self, hotspots_data, current_weather=None):
-        self.hotspots = hotspots_data
+    def __init__(self, hotspots_data, current_weather=None, index=None):
+        self.index = index if index is not None else HotspotIndex(hotspots_data)
+        self.hotspots = self.index.hotspots
         self.current_weather = current_weather or {}
         self.alerts = []
         
@@ -18,26 +25,89 @@ class AlertEngine:
         
         alerts = []
         
-        for hotspot in self.hotspots:
-            # Calculate distance to hotspot center
-            distance = self._calculate_distance(
-                user_lat, user_lng,
-                hotspot['center']['lat'], hotspot['center']['lng']
+        # Hotspots within 500 meters, from the spatial index
+        nearby, distances = self.index.query_radius(user_lat, user_lng, 0.5)
+        
+        for i, distance in zip(nearby, distances):
+            hotspot = self.hotspots[i]
+            
+            # Check if current conditions match risk patterns
+            risk_match = self._check_risk_conditions(
+                hotspot, current_hour, current_weather
             )
             
-            # If within 500 meters of hotspot
-            if distance <= 0.5:  # 0.5km = 500 meters
-                # Check if current conditions match risk patterns
-                risk_match = self._check_risk_conditions(
-                    hotspot, current_hour, current_weather
-                )
-                
-                if risk_match['is_risky']:
-                    alert = self._generate_alert(hotspot, risk_match, distance)
-                    alerts.append(alert)
+            if risk_match['is_risky']:
+                alert = self._generate_alert(hotspot, risk_match, float(distance))
+                alerts.append(alert)
         
         return alerts
     
+    def check_locations_batch(self, device_ids, lats, lngs, timestamps=None, weathers=None):
+        """Check many positions at once and return alerts grouped per device.
+
+        `timestamps` entries may be datetimes, ISO strings or None (now),
+        and are read as local time (see `local_naive`);
+        `weathers` entries are weather dicts (or plain condition strings) and
+        fall back to the engine's current weather. The risk rules are the
+        same as `check_user_location`, evaluated with NumPy over every
+        (position, nearby hotspot) pair.
+        """
+        n = len(device_ids)
+        results = {device_id: [] for device_id in device_ids}
+        if n == 0:
+            return results
+        
+        if timestamps is None:
+            timestamps = [None] * n
+        if weathers is None:
+            weathers = [None] * n
+        
+        times = pd.Series([local_naive(t) for t in timestamps], dtype='datetime64[ns]')
+        hours = times.dt.hour.fillna(datetime.now().hour).to_numpy(dtype=np.int64)
+        
+        # Factorize weather conditions so substring matching runs once per distinct condition
+        conditions = []
+        for weather in weathers:
+            weather = weather or self.current_weather
+            if isinstance(weather, str):
+                conditions.append(weather.lower())
+            else:
+                conditions.append(weather.get('condition', '').lower())
+        condition_codes, condition_levels = pd.factorize(pd.Series(conditions, dtype=object))
+        
+        point_idx, hotspot_idx, distances = self.index.query_radius_many(lats, lngs, 0.5)
+        if len(point_idx) == 0:
+            return results
+        
+        patterns = self.index.risk_patterns()
+        # Same rule as _check_risk_conditions, for each (condition, hotspot weather) pair
+        weather_match = np.array([
+            [('rain' in hotspot_weather and 'rain' in condition) or (condition in hotspot_weather)
+             for hotspot_weather in patterns['weather_levels']]
+            for condition in condition_levels
+        ], dtype=bool).reshape(len(condition_levels), len(patterns['weather_levels']))
+        
+        pair_hours = hours[point_idx]
+        is_peak_hour = patterns['peak_hours'][hotspot_idx, pair_hours]
+        is_night_risk = patterns['night'][hotspot_idx] & is_night_hour(pair_hours)
+        is_weather_match = weather_match[condition_codes[point_idx], patterns['weather_codes'][hotspot_idx]]
+        risk_scores = is_peak_hour * 2 + is_night_risk * 1 + is_weather_match * 2
+        
+        for k in np.flatnonzero(risk_scores >= 2):
+            hotspot = self.hotspots[hotspot_idx[k]]
+            risk_match = {
+                'is_risky': True,
+                'is_peak_hour': bool(is_peak_hour[k]),
+                'is_night_risk': bool(is_night_risk[k]),
+                'is_weather_match': bool(is_weather_match[k]),
+                'risk_score': int(risk_scores[k]),
+                'hotspot_risk_level': hotspot['risk_level']
+            }
+            alert = self._generate_alert(hotspot, risk_match, float(distances[k]))
+            results[device_ids[point_idx[k]]].append(alert)
+        
+        return results
+    
     def _calculate_distance(self, lat1, lon1, lat2, lon2):
         """Calculate distance between two coordinates in kilometers"""
         R = 6371  # Earth's radius in km
@@ -62,7 +132,7 @@ class AlertEngine:
         
         # Check time patterns
         is_peak_hour = current_hour in time_patterns.get('peak_hours', [])
-        is_night_risk = time_patterns.get('is_night_hotspot', False) and current_hour >= 18
+        is_night_risk = time_patterns.get('is_night_hotspot', False) and is_night_hour(current_hour)
         
         # Check weather patterns
         current_weather_lower = current_weather.get('condition', '').lower()
@@ -143,6 +213,7 @@ class AlertEngine:
             'severity': hotspot['risk_level'],
             'message': " | ".join(messages),
             'hotspot_id': hotspot['cluster_id'],
+            'hotspot_center': hotspot['center'],
             'distance_meters': distance_m,
             'risk_score': risk_match['risk_score'],
             'recommended_action': 'reduce_speed',
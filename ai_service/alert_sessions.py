@@ -0,0 +1,147 @@
+# alert_sessions.py
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from hotspot_index import EARTH_RADIUS_KM
+
+
+def _distance_m(lat1, lng1, lat2, lng2):
+    """Haversine distance in metres"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * 1000 * math.asin(math.sqrt(a))
+
+
+class AlertSessionStore:
+    """Per-device alert state for real-time navigation pings.
+
+    Each device keeps its last evaluated position and conditions and the
+    alerts currently active for it. A ping is only re-evaluated when the
+    device has moved at least `min_move_m`, or when the hour, weather or
+    hotspot version changed or an active alert passed its `valid_until`;
+    otherwise the previous state stands. Evaluations report only
+    transitions: alerts for hotspots just entered and the ids of hotspots
+    just left. An expired alert is refreshed (a new `valid_until`, reported
+    under `refreshed`) while its hotspot still matches, and exited when it
+    no longer does. Cluster ids change when hotspots are re-clustered, so a
+    new alert continues an active one when their hotspot centres are within
+    `match_m`. Sessions idle for `ttl` seconds are dropped.
+    """
+
+    def __init__(self, ttl=1800, min_move_m=25, max_sessions=100_000, match_m=100):
+        self.ttl = ttl
+        self.min_move_m = min_move_m
+        self.max_sessions = max_sessions
+        self.match_m = match_m
+        self._sessions = OrderedDict()  # device id -> session, least recently seen first
+        self._lock = threading.Lock()
+        self.evaluations = 0
+        self.skipped = 0
+
+    def check(self, device_id, lat, lng, evaluate, hour=None, weather=None, version=None):
+        """Update a device's session with a new position.
+
+        `evaluate()` returns the alerts for the position (AlertEngine format)
+        and is called only when re-evaluation is needed. Returns a dict with
+        `evaluated`, `entered` (new alerts), `refreshed` (expired alerts
+        extended), `exited` (hotspot ids, as sent when entered) and `active`
+        (all alerts in force).
+        """
+        now = time.time()
+        conditions = (hour, weather, version)
+        with self._lock:
+            self._evict(now)
+            session = self._sessions.get(device_id)
+            if session is not None:
+                self._sessions.move_to_end(device_id)
+                session['last_seen'] = now
+                if (not self._has_expired(session) and session['conditions'] == conditions and
+                        _distance_m(session['lat'], session['lng'], lat, lng) < self.min_move_m):
+                    self.skipped += 1
+                    return {'evaluated': False, 'entered': [], 'refreshed': [], 'exited': [],
+                            'active': list(session['active'])}
+
+        alerts = evaluate()
+
+        with self._lock:
+            self.evaluations += 1
+            session = self._sessions.get(device_id)
+            unmatched = [] if session is None else list(session['active'])
+            unexpired = [] if session is None else self._unexpired(session)
+            active, entered, refreshed = [], [], []
+            for alert in alerts:
+                # Alerts already in force keep their original id and validity and are not re-sent
+                previous = self._match(alert, unmatched)
+                if previous is None:
+                    entered.append(alert)
+                    active.append(alert)
+                    continue
+                unmatched.remove(previous)
+                if not any(previous is a for a in unexpired):
+                    # Still inside an expired alert's hotspot: extend it rather than re-enter
+                    previous = {**previous, 'valid_until': alert.get('valid_until')}
+                    refreshed.append(previous)
+                active.append(previous)
+            self._sessions[device_id] = {
+                'lat': lat,
+                'lng': lng,
+                'conditions': conditions,
+                'active': active,
+                'last_seen': now
+            }
+            self._sessions.move_to_end(device_id)
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+        return {
+            'evaluated': True,
+            'entered': entered,
+            'refreshed': refreshed,
+            'exited': [alert['hotspot_id'] for alert in unmatched],
+            'active': list(active)
+        }
+
+    def end(self, device_id):
+        """Forget a device (e.g. navigation finished)"""
+        with self._lock:
+            return self._sessions.pop(device_id, None) is not None
+
+    def stats(self):
+        with self._lock:
+            return {'sessions': len(self._sessions), 'evaluations': self.evaluations, 'skipped': self.skipped}
+
+    def _match(self, alert, candidates):
+        """The candidate alert for the same hotspot: nearest centre within `match_m`"""
+        center = alert.get('hotspot_center')
+        best, best_distance = None, self.match_m
+        for candidate in candidates:
+            other = candidate.get('hotspot_center')
+            if center is None or other is None:
+                if candidate['hotspot_id'] == alert['hotspot_id']:
+                    return candidate
+                continue
+            distance = _distance_m(center['lat'], center['lng'], other['lat'], other['lng'])
+            if distance <= best_distance:
+                best, best_distance = candidate, distance
+        return best
+
+    @staticmethod
+    def _unexpired(session):
+        """Active alerts whose `valid_until` has not passed"""
+        now = datetime.now().isoformat()
+        return [alert for alert in session['active']
+                if not alert.get('valid_until') or alert['valid_until'] >= now]
+
+    def _has_expired(self, session):
+        return len(self._unexpired(session)) < len(session['active'])
+
+    def _evict(self, now):
+        while self._sessions:
+            device_id, session = next(iter(self._sessions.items()))
+            if now - session['last_seen'] < self.ttl:
+                break
+            del self._sessions[device_id]
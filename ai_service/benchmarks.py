@@ -0,0 +1,486 @@
+"""
+Micro-benchmarks for the AI service hot paths.
+
+Run from the ai_service directory, e.g.:
+    python benchmarks.py hotspot-summaries --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import io
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from advanced_risk_engine import AdvancedRiskEngine
+from alert_engine import AlertEngine
+from hotspot_detection import HotspotDetector, microcluster_dbscan
+from hotspot_index import EARTH_RADIUS_KM, HotspotIndex
+from ingestion import HAS_PYARROW, read_accidents
+from nlp_report_generator import AccidentReportGenerator
+from route_risk import RouteRiskScorer
+from severity_prediction import SeverityPredictor
+from time_utils import is_night_hour
+
+
+def synthetic_accidents(n, n_clusters=500, seed=42):
+    """Random accidents around `n_clusters` centres in a city-sized box"""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform([6.80, 79.80], [7.00, 80.00], size=(n_clusters, 2))
+    labels = rng.integers(0, n_clusters, n)
+    coords = centers[labels] + rng.normal(0, 0.002, size=(n, 2))
+    times = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, n), unit='s')
+
+    df = pd.DataFrame({
+        'id': np.arange(n),
+        'latitude': coords[:, 0],
+        'longitude': coords[:, 1],
+        'accident_time': times.astype(str),
+        'severity': rng.choice(['minor', 'major', 'dangerous'], n),
+        'weather_condition': rng.choice(['clear', 'rain', 'light rain', 'fog', 'cloudy'], n)
+    })
+
+    # About 10% noise points, as DBSCAN would label them
+    labels = np.where(rng.random(n) < 0.1, -1, labels)
+    return df, labels
+
+
+def _analyze_time_patterns(cluster_data):
+    """When accidents occur in one cluster (legacy per-cluster version)"""
+    cluster_data['accident_time'] = pd.to_datetime(cluster_data['accident_time'])
+    cluster_data['hour'] = cluster_data['accident_time'].dt.hour
+    hourly_counts = cluster_data['hour'].value_counts().sort_index()
+    peak_hours = hourly_counts.nlargest(3).index.tolist()
+    cluster_data['day_of_week'] = cluster_data['accident_time'].dt.dayofweek
+    weekday_counts = cluster_data['day_of_week'].value_counts()
+    is_night = is_night_hour(cluster_data['hour'])
+
+    return {
+        'peak_hours': peak_hours,
+        'hourly_distribution': hourly_counts.to_dict(),
+        'busiest_day': int(weekday_counts.idxmax()) if not weekday_counts.empty else None,
+        'is_night_hotspot': int(is_night.sum()) > len(cluster_data) * 0.5
+    }
+
+
+def _analyze_weather_patterns(cluster_data):
+    """Weather during accidents in one cluster (legacy per-cluster version)"""
+    if 'weather_condition' not in cluster_data.columns:
+        return {}
+
+    weather_counts = cluster_data['weather_condition'].value_counts()
+    rainy = cluster_data['weather_condition'].str.contains('rain', case=False, na=False)
+    return {
+        'most_common_weather': weather_counts.idxmax() if not weather_counts.empty else 'unknown',
+        'rainy_percentage': (int(rainy.sum()) / len(cluster_data) * 100) if not cluster_data.empty else 0
+    }
+
+
+def _calculate_bounding_box(cluster_data, padding=0.001):
+    """Padded bounding box of one cluster (legacy per-cluster version)"""
+    return {
+        'north': float(cluster_data['latitude'].max() + padding),
+        'south': float(cluster_data['latitude'].min() - padding),
+        'east': float(cluster_data['longitude'].max() + padding),
+        'west': float(cluster_data['longitude'].min() - padding)
+    }
+
+
+def _legacy_summaries(detector, accidents_df, clusters):
+    """Per-cluster loop used by detect_hotspots before the grouped pass"""
+    accidents_df['cluster'] = clusters
+    valid_clusters = accidents_df[accidents_df['cluster'] != -1]
+
+    hotspots = []
+    for cluster_id in valid_clusters['cluster'].unique():
+        cluster_data = valid_clusters[valid_clusters['cluster'] == cluster_id]
+        total_accidents = len(cluster_data)
+        severity_scores = {
+            'minor': len(cluster_data[cluster_data['severity'] == 'minor']),
+            'major': len(cluster_data[cluster_data['severity'] == 'major']),
+            'dangerous': len(cluster_data[cluster_data['severity'] == 'dangerous'])
+        }
+        risk_score, risk_level = detector._classify_risk(severity_scores, total_accidents)
+        time_patterns = _analyze_time_patterns(cluster_data)
+        weather_patterns = _analyze_weather_patterns(cluster_data)
+        last = cluster_data['accident_time'].max()
+
+        hotspots.append({
+            'cluster_id': int(cluster_id),
+            'center': {'lat': cluster_data['latitude'].mean(), 'lng': cluster_data['longitude'].mean()},
+            'bounding_box': _calculate_bounding_box(cluster_data),
+            'total_accidents': int(total_accidents),
+            'severity_distribution': severity_scores,
+            'risk_score': float(risk_score),
+            'risk_level': risk_level,
+            'time_patterns': time_patterns,
+            'weather_patterns': weather_patterns,
+            'last_accident': last.isoformat() if hasattr(last, 'isoformat') else str(last),
+            'recommendations': detector._generate_recommendations(risk_level, time_patterns)
+        })
+    return hotspots
+
+
+def bench_hotspot_summaries(sizes, n_clusters=500):
+    """Grouped summaries vs. the per-cluster loop, same DBSCAN labels"""
+    detector = HotspotDetector()
+    for n in sizes:
+        df, labels = synthetic_accidents(n, n_clusters=n_clusters)
+
+        start = time.perf_counter()
+        grouped = detector._summarize_clusters(df.copy(), labels)
+        grouped_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        legacy = _legacy_summaries(detector, df.copy(), labels)
+        legacy_s = time.perf_counter() - start
+
+        identical = json.dumps(grouped, sort_keys=True, default=str) == json.dumps(legacy, sort_keys=True, default=str)
+        print(f"{n:>9} accidents, {len(grouped)} hotspots: "
+              f"loop {legacy_s:8.3f}s  grouped {grouped_s:8.3f}s  "
+              f"speedup {legacy_s / grouped_s:6.1f}x  identical={identical}")
+
+
+def synthetic_hotspots(n, seed=7):
+    """Hotspot dicts with the fields AlertEngine reads"""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform([5.9, 79.5], [9.9, 81.9], size=(n, 2))
+    return [{
+        'cluster_id': i,
+        'center': {'lat': float(lat), 'lng': float(lng)},
+        'risk_level': 'high',
+        'total_accidents': 12,
+        'severity_distribution': {'minor': 5, 'major': 4, 'dangerous': 3},
+        'time_patterns': {'peak_hours': [8, 17, 18], 'is_night_hotspot': False},
+        'weather_patterns': {'most_common_weather': 'rain', 'rainy_percentage': 60.0}
+    } for i, (lat, lng) in enumerate(centers)]
+
+
+def bench_alert_index(n_hotspots, n_queries=2000, radius_km=0.5):
+    """Radius query latency of HotspotIndex"""
+    hotspots = synthetic_hotspots(n_hotspots)
+
+    start = time.perf_counter()
+    index = HotspotIndex(hotspots)
+    build_s = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    points = rng.uniform([5.9, 79.5], [9.9, 81.9], size=(n_queries, 2))
+    latencies = []
+    for lat, lng in points:
+        start = time.perf_counter()
+        index.query_radius(lat, lng, radius_km)
+        latencies.append(time.perf_counter() - start)
+
+    latencies = np.array(latencies) * 1000
+    print(f"{n_hotspots} hotspots: build {build_s:.3f}s, "
+          f"query p50 {np.percentile(latencies, 50):.3f}ms  p99 {np.percentile(latencies, 99):.3f}ms")
+
+
+def bench_alert_batch(n_positions, n_hotspots=10_000):
+    """AlertEngine.check_locations_batch over a burst of fleet positions"""
+    hotspots = synthetic_hotspots(n_hotspots)
+    engine = AlertEngine(None, {'condition': 'rain'}, index=HotspotIndex(hotspots))
+
+    rng = np.random.default_rng(1)
+    centers = np.array([[h['center']['lat'], h['center']['lng']] for h in hotspots])
+    points = centers[rng.integers(0, n_hotspots, n_positions)] + rng.normal(0, 0.003, size=(n_positions, 2))
+    device_ids = [f"vehicle-{i % 2000}" for i in range(n_positions)]
+    timestamps = (pd.Timestamp('2024-06-01') + pd.to_timedelta(rng.integers(0, 86400, n_positions), unit='s')).astype(str).tolist()
+
+    start = time.perf_counter()
+    alerts = engine.check_locations_batch(device_ids, points[:, 0], points[:, 1], timestamps)
+    elapsed = time.perf_counter() - start
+
+    print(f"{n_positions} positions vs {n_hotspots} hotspots: {elapsed * 1000:.1f}ms, "
+          f"{sum(len(a) for a in alerts.values())} alerts for {sum(1 for a in alerts.values() if a)} devices")
+
+
+def synthetic_training_data(n, seed=3):
+    """Rows shaped like SeverityPredictor.load_training_data output"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'hour_of_day': rng.integers(0, 24, n),
+        'day_of_week': rng.integers(0, 7, n),
+        'month': rng.integers(1, 13, n),
+        'is_rainy': rng.integers(0, 2, n),
+        'is_night': rng.integers(0, 2, n),
+        'is_weekend': rng.integers(0, 2, n),
+        'latitude': rng.uniform(6.8, 7.0, n),
+        'longitude': rng.uniform(79.8, 80.0, n),
+        'road_type': rng.integers(0, 4, n),
+        'speed_limit': rng.choice([40, 60, 80, 100], n)
+    })
+    score = df['hour_of_day'] / 24 + df['is_rainy'] + df['speed_limit'] / 100 + rng.normal(0, 0.5, n)
+    df['severity'] = np.where(score > 1.8, 'dangerous', np.where(score > 1.0, 'major', 'minor'))
+    return df
+
+
+def _legacy_predict_proba(predictor, features_dict):
+    """DataFrame-based inference used by SeverityPredictor.predict before the fast path"""
+    input_df = pd.DataFrame([features_dict])
+    for feature in predictor.features:
+        if feature not in input_df.columns:
+            input_df[feature] = 0
+    input_scaled = predictor.scaler.transform(input_df[predictor.features])
+    rf_pred = predictor.model['random_forest'].predict_proba(input_scaled)
+    lr_pred = predictor.model['logistic_regression'].predict_proba(input_scaled)
+    return (rf_pred + lr_pred) / 2
+
+
+def bench_severity_predict(n_calls=2000, n_train=20_000):
+    """Single-row SeverityPredictor latency, DataFrame path vs. NumPy fast path"""
+    predictor = SeverityPredictor()
+    X, y, _ = predictor.preprocess_data(synthetic_training_data(n_train))
+    predictor.train_model(X, y)
+
+    rng = np.random.default_rng(0)
+    requests = [{
+        'hour_of_day': int(rng.integers(0, 24)),
+        'day_of_week': int(rng.integers(0, 7)),
+        'month': int(rng.integers(1, 13)),
+        'is_rainy': int(rng.integers(0, 2)),
+        'location_cluster': int(rng.integers(0, 50)),
+        'speed_limit': int(rng.choice([40, 60, 80, 100]))
+    } for _ in range(n_calls)]
+
+    for name, call in (('dataframe', lambda r: _legacy_predict_proba(predictor, r)),
+                       ('fast path', predictor.predict)):
+        call(requests[0])
+        latencies = []
+        for features in requests:
+            start = time.perf_counter()
+            call(features)
+            latencies.append(time.perf_counter() - start)
+        latencies = np.array(latencies) * 1000
+        print(f"{name:>10}: p50 {np.percentile(latencies, 50):.3f}ms  p99 {np.percentile(latencies, 99):.3f}ms")
+
+
+def bench_ingestion(n):
+    """Request body -> DataFrame: parse time and peak traced allocations per payload format.
+
+    tracemalloc sees Python and NumPy allocations but not Arrow's own memory
+    pool, so Arrow peaks are a lower bound.
+    """
+    from flask import Flask, request
+
+    df, _ = synthetic_accidents(n)
+    records = df.to_dict('records')
+    payloads = [
+        ('json rows', json.dumps({'accidents': records}).encode(), 'application/json'),
+        ('json columns', json.dumps({'columns': df.to_dict('list')}).encode(), 'application/json'),
+        ('ndjson', '\n'.join(json.dumps(r) for r in records).encode(), 'application/x-ndjson'),
+    ]
+    del records
+    if HAS_PYARROW:
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        payloads.append(('arrow ipc', sink.getvalue(), 'application/vnd.apache.arrow.stream'))
+
+    app = Flask(__name__)
+    for name, body, content_type in payloads:
+        # Timed and traced separately; tracing slows the pure-Python parsers a lot
+        with app.test_request_context('/', data=body, content_type=content_type):
+            start = time.perf_counter()
+            parsed, _ = read_accidents(request)
+            elapsed = time.perf_counter() - start
+        with app.test_request_context('/', data=body, content_type=content_type):
+            tracemalloc.start()
+            read_accidents(request)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        assert len(parsed) == n
+        print(f"{name:>12}: {len(body) / 1e6:7.1f}MB body  {elapsed:6.2f}s  peak {peak / 1e6:7.1f}MB")
+
+
+def bench_clustering(sizes, eps_m=100, min_samples=10, cell_fraction=0.25, exact_max=1_000_000, n_clusters=500):
+    """Exact haversine DBSCAN vs. microcluster_dbscan: time and agreement.
+
+    Agreement is the adjusted Rand index over all points plus the share of
+    points whose noise / clustered status matches.
+    """
+    from sklearn.cluster import DBSCAN
+    from sklearn.metrics import adjusted_rand_score
+
+    eps = eps_m / 1000 / EARTH_RADIUS_KM
+    for n in sizes:
+        # A fixed number of centres, so density (and the exact cost) grows with n
+        df, _ = synthetic_accidents(n, n_clusters=n_clusters)
+        coords = np.radians(df[['latitude', 'longitude']].to_numpy())
+
+        start = time.perf_counter()
+        approx = microcluster_dbscan(coords, eps, min_samples, cell_fraction)
+        approx_s = time.perf_counter() - start
+        line = f"n={n:>9,}  approx {approx_s:7.2f}s ({approx.max() + 1} clusters)"
+
+        if n <= exact_max:
+            start = time.perf_counter()
+            exact = DBSCAN(eps=eps, min_samples=min_samples, metric='haversine').fit_predict(coords)
+            exact_s = time.perf_counter() - start
+            ari = adjusted_rand_score(exact, approx)
+            noise_match = np.mean((exact == -1) == (approx == -1))
+            line += (f"  exact {exact_s:7.2f}s ({exact.max() + 1} clusters)"
+                     f"  speedup {exact_s / approx_s:5.1f}x  ARI {ari:.4f}  noise agreement {noise_match:.4f}")
+        print(line)
+
+
+def bench_risk_batch(n, n_loop=10_000):
+    """compute_risk per location vs. one compute_risk_batch call"""
+    engine = AdvancedRiskEngine()
+    rng = np.random.default_rng(5)
+    historical, traffic, infra = rng.random((3, n))
+    weather = engine.weather_severities(rng.choice(['clear', 'light rain', 'storm', 'fog'], n))
+
+    n_loop = min(n, n_loop)
+    start = time.perf_counter()
+    for i in range(n_loop):
+        engine.compute_risk({'historical_rate': historical[i], 'traffic_level': traffic[i],
+                             'weather_severity': weather[i], 'infrastructure_score': infra[i]})
+    loop_s = (time.perf_counter() - start) / n_loop * n
+
+    start = time.perf_counter()
+    engine.compute_risk_batch(historical, traffic, weather, infra)
+    batch_s = time.perf_counter() - start
+    print(f"{n} locations: loop {loop_s * 1000:.1f}ms (extrapolated from {n_loop})  "
+          f"batch {batch_s * 1000:.1f}ms  speedup {loop_s / batch_s:.0f}x")
+
+
+def bench_route_risk(n_routes=3, n_points=2000, n_hotspots=10_000):
+    """RouteRiskScorer on random-walk routes through the synthetic hotspots"""
+    hotspots = synthetic_hotspots(n_hotspots)
+    rng = np.random.default_rng(2)
+    for hotspot in hotspots:
+        hotspot['risk_score'] = float(rng.uniform(1, 5))
+    scorer = RouteRiskScorer(HotspotIndex(hotspots))
+
+    centers = np.array([[h['center']['lat'], h['center']['lng']] for h in hotspots])
+    routes = [
+        (centers[rng.integers(0, n_hotspots)] + rng.normal(0, 0.0003, size=(n_points, 2)).cumsum(axis=0)).tolist()
+        for _ in range(n_routes)
+    ]
+    scorer.score(routes)  # build the per-index risk arrays
+
+    start = time.perf_counter()
+    scores = scorer.score(routes)
+    elapsed = time.perf_counter() - start
+    print(f"{n_routes} routes x {n_points} points vs {n_hotspots} hotspots: {elapsed * 1000:.1f}ms, "
+          f"hotspots on route {[len(s['hotspots']) for s in scores]}")
+
+
+def synthetic_reports(n, vocabulary=50_000, words=12, seed=4):
+    """Report dicts with Zipf-distributed description words, generated lazily"""
+    rng = np.random.default_rng(seed)
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    vocab = [''.join(letters[rng.integers(0, 26, 7)]) for _ in range(vocabulary)]
+    for start in range(0, n, 10_000):
+        size = min(10_000, n - start)
+        ranks = np.minimum(rng.zipf(1.3, size=(size, words)), vocabulary) - 1
+        severities = rng.choice(['minor', 'major', 'dangerous'], size)
+        for i in range(size):
+            yield {
+                'description': ' '.join(vocab[r] for r in ranks[i]),
+                'severity': severities[i],
+                'district': f'district-{(start + i) % 25}'
+            }
+
+
+def bench_summarize(n, workers=None, capacity=10_000, pool_min_reports=500_000):
+    """summarize_reports on a list vs. the streaming summarizer on a generator"""
+    generator = AccidentReportGenerator()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    reports = list(synthetic_reports(n))
+    legacy = generator.summarize_reports(reports)
+    legacy_s = time.perf_counter() - start
+    _, legacy_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del reports
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    summarizer = generator.summarize_stream(synthetic_reports(n), group_by='district',
+                                            workers=workers, capacity=capacity,
+                                            pool_min_reports=pool_min_reports)
+    stream_s = time.perf_counter() - start
+    _, stream_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    overlap = len(set(legacy['common_terms']) & set(summarizer.summary()['common_terms']))
+    print(f"{n} reports (times incl. generation): summarize_reports on a list {legacy_s:.2f}s "
+          f"(peak {legacy_peak / 1e6:.0f}MB)  streaming {stream_s:.2f}s (peak {stream_peak / 1e6:.0f}MB, "
+          f"{len(summarizer.groups())} districts)  top-10 overlap {overlap}/10")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='benchmark', required=True)
+
+    p = sub.add_parser('hotspot-summaries', help='HotspotDetector per-cluster statistics')
+    p.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    p.add_argument('--clusters', type=int, default=500)
+
+    p = sub.add_parser('alert-index', help='HotspotIndex radius queries')
+    p.add_argument('--hotspots', type=int, default=100_000)
+    p.add_argument('--queries', type=int, default=2000)
+
+    p = sub.add_parser('alert-batch', help='AlertEngine batch location checks')
+    p.add_argument('--positions', type=int, default=10_000)
+    p.add_argument('--hotspots', type=int, default=10_000)
+
+    p = sub.add_parser('severity-predict', help='SeverityPredictor single-row latency')
+    p.add_argument('--calls', type=int, default=2000)
+
+    p = sub.add_parser('clustering', help='Exact vs. microcluster DBSCAN')
+    p.add_argument('--sizes', type=int, nargs='+', default=[100_000, 300_000, 1_000_000])
+    p.add_argument('--eps-m', type=float, default=100, help='DBSCAN radius in metres')
+    p.add_argument('--min-samples', type=int, default=10)
+    p.add_argument('--cell-fraction', type=float, default=0.25)
+    p.add_argument('--exact-max', type=int, default=1_000_000, help='Skip exact DBSCAN above this size')
+
+    p = sub.add_parser('ingestion', help='Accident payload parsing by format')
+    p.add_argument('--rows', type=int, default=1_000_000)
+
+    p = sub.add_parser('risk-batch', help='AdvancedRiskEngine scalar vs. vectorized scoring')
+    p.add_argument('--locations', type=int, default=1_000_000)
+
+    p = sub.add_parser('route-risk', help='Route scoring against the hotspot index')
+    p.add_argument('--routes', type=int, default=3)
+    p.add_argument('--points', type=int, default=2000)
+    p.add_argument('--hotspots', type=int, default=10_000)
+
+    p = sub.add_parser('summarize', help='Report text summarization, list vs. streaming')
+    p.add_argument('--reports', type=int, default=1_000_000)
+    p.add_argument('--workers', type=int, default=None)
+    p.add_argument('--capacity', type=int, default=10_000)
+    p.add_argument('--pool-min-reports', type=int, default=500_000,
+                   help='Reports tokenized in-process before the worker pool starts (0: always use it)')
+
+    args = parser.parse_args()
+    if args.benchmark == 'hotspot-summaries':
+        bench_hotspot_summaries(args.sizes, n_clusters=args.clusters)
+    elif args.benchmark == 'alert-index':
+        bench_alert_index(args.hotspots, n_queries=args.queries)
+    elif args.benchmark == 'alert-batch':
+        bench_alert_batch(args.positions, n_hotspots=args.hotspots)
+    elif args.benchmark == 'severity-predict':
+        bench_severity_predict(args.calls)
+    elif args.benchmark == 'clustering':
+        bench_clustering(args.sizes, args.eps_m, args.min_samples, args.cell_fraction, args.exact_max)
+    elif args.benchmark == 'ingestion':
+        bench_ingestion(args.rows)
+    elif args.benchmark == 'risk-batch':
+        bench_risk_batch(args.locations)
+    elif args.benchmark == 'route-risk':
+        bench_route_risk(args.routes, args.points, args.hotspots)
+    elif args.benchmark == 'summarize':
+        bench_summarize(args.reports, args.workers, args.capacity, args.pool_min_reports)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+# bulk_forecasting.py
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from time_series_forecasting import HAS_PROPHET, fit_seasonal_smoothing, forecast_seasonal_smoothing
+
+
+class ForecastStore:
+    """Per-region forecasts on disk, one JSON document per grouping.
+
+    `forecasts/<group_by>.json` holds `{'generated_at', 'periods', 'regions':
+    {region: {...}}}`. Files are replaced atomically, so dashboards reading
+    them never see a half-written job.
+    """
+
+    def __init__(self, root=os.path.join('ai_models', 'forecast_store')):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def save(self, group_by, document):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(group_by)
+        tmp = f'{path}.tmp'
+        with self._lock:
+            with open(tmp, 'w') as f:
+                json.dump(document, f)
+            os.replace(tmp, path)
+
+    def load(self, group_by):
+        """Stored document for `group_by`, or None"""
+        path = self._path(group_by)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def groupings(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(f[:-5] for f in os.listdir(self.root) if f.endswith('.json'))
+
+    def _path(self, group_by):
+        if os.path.basename(group_by) != group_by or group_by in ('.', '..'):
+            raise ValueError(f'Invalid grouping {group_by!r}')
+        return os.path.join(self.root, f'{group_by}.json')
+
+
+def _fit_prophet_series(region, dates, values, periods):
+    """Process-pool worker: fit Prophet on one daily series"""
+    from prophet import Prophet
+
+    model = Prophet()
+    model.fit(pd.DataFrame({'ds': pd.to_datetime(dates), 'y': values}))
+    future = model.make_future_dataframe(periods=periods, freq='D')
+    forecast = model.predict(future)[['ds', 'yhat']].tail(periods)
+    return region, forecast['yhat'].clip(lower=0).to_numpy()
+
+
+class BulkForecaster:
+    """Forecast daily accident counts for every region in one job.
+
+    Accidents are grouped by a column (e.g. `district`), by `grid` cell, or
+    by nearest `hotspot`, and counted per day on a shared date axis. Series
+    with at least `min_prophet_days` days of history are fitted with Prophet
+    across a process pool; the rest (or all of them, without Prophet) use the
+    vectorized seasonal exponential smoothing model in one numpy pass.
+    """
+
+    def __init__(self, store=None, max_workers=None, min_prophet_days=60):
+        self.store = store or ForecastStore()
+        self.max_workers = max_workers
+        self.min_prophet_days = min_prophet_days
+
+    def run(self, accidents_df, group_by='district', periods=14, grid_size=0.01, hotspot_index=None):
+        """Forecast all regions, save them to the store and return a job summary"""
+        start = time.perf_counter()
+        regions = self._regions(accidents_df, group_by, grid_size, hotspot_index)
+        counts, first_day = self._daily_counts(accidents_df, regions)
+        if counts.empty:
+            raise ValueError('No accidents could be assigned to a region')
+
+        days = counts.columns
+        # A copy: a dense counts frame can hand back a read-only view of its block
+        values = counts.to_numpy(dtype=float, copy=True)
+        # Days before a region's first accident are unobserved, not zero
+        values[np.arange(values.shape[1])[None, :] < first_day[:, None]] = np.nan
+        observed_days = values.shape[1] - first_day
+
+        use_prophet = HAS_PROPHET & (observed_days >= self.min_prophet_days)
+        yhat = np.empty((len(counts), periods))
+        if (~use_prophet).any():
+            level, seasonal = fit_seasonal_smoothing(values[~use_prophet])
+            yhat[~use_prophet] = forecast_seasonal_smoothing(level, seasonal, values.shape[1], periods)
+        if use_prophet.any():
+            rows = {region: i for i, region in enumerate(counts.index)}
+            for region, forecast in self._fit_prophet(counts.index[use_prophet], days, values, first_day, rows, periods):
+                yhat[rows[region]] = forecast
+
+        future = pd.date_range(days[-1] + pd.Timedelta(days=1), periods=periods, freq='D')
+        future_iso = [d.date().isoformat() for d in future]
+        totals = np.nansum(values, axis=1)
+        regions_out = {}
+        for i, region in enumerate(counts.index):
+            regions_out[str(region)] = {
+                'method': 'prophet' if use_prophet[i] else 'seasonal_smoothing',
+                'observed_days': int(observed_days[i]),
+                'total_accidents': int(totals[i]),
+                'forecast': [{'ds': ds, 'yhat': round(float(y), 3)} for ds, y in zip(future_iso, yhat[i])]
+            }
+
+        document = {
+            'group_by': group_by,
+            'generated_at': datetime.now().isoformat(),
+            'periods': periods,
+            'history_end': days[-1].date().isoformat(),
+            'regions': regions_out
+        }
+        self.store.save(group_by, document)
+
+        return {
+            'group_by': group_by,
+            'regions': len(regions_out),
+            'prophet_series': int(use_prophet.sum()),
+            'fallback_series': int((~use_prophet).sum()),
+            'elapsed_seconds': round(time.perf_counter() - start, 3),
+            'generated_at': document['generated_at']
+        }
+
+    def _fit_prophet(self, regions, days, values, first_day, rows, periods):
+        dates = [d.isoformat() for d in days]
+        # spawn: forking a threaded Flask process is unsafe
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as pool:
+            futures = []
+            for region in regions:
+                i = rows[region]
+                futures.append(pool.submit(
+                    _fit_prophet_series, region, dates[first_day[i]:], values[i, first_day[i]:], periods
+                ))
+            for future in futures:
+                yield future.result()
+
+    @staticmethod
+    def _regions(df, group_by, grid_size, hotspot_index):
+        """Region label per accident (NaN when unassigned)"""
+        if group_by == 'grid':
+            lat = df['latitude'].astype(float)
+            lng = df['longitude'].astype(float)
+            cells = ((np.floor(lat / grid_size) * grid_size).round(6).astype(str) + ',' +
+                     (np.floor(lng / grid_size) * grid_size).round(6).astype(str))
+            return cells.where(lat.notna() & lng.notna()).astype(object)
+
+        if group_by == 'hotspot':
+            if hotspot_index is None:
+                raise ValueError('Grouping by hotspot needs a hotspot index')
+            point_idx, hotspot_idx, dist = hotspot_index.query_radius_many(
+                df['latitude'].to_numpy(), df['longitude'].to_numpy(), 0.5
+            )
+            # Nearest hotspot within range for each accident
+            order = np.lexsort((dist, point_idx))
+            point_idx, hotspot_idx = point_idx[order], hotspot_idx[order]
+            first = np.unique(point_idx, return_index=True)[1]
+            labels = pd.Series(np.nan, index=df.index, dtype=object)
+            ids = [str(hotspot_index.hotspots[h]['cluster_id']) for h in hotspot_idx[first]]
+            labels.iloc[point_idx[first]] = ids
+            return labels
+
+        if group_by not in df.columns:
+            raise ValueError(f'Unknown grouping {group_by!r}')
+        return df[group_by].where(df[group_by].notna()).astype(object)
+
+    @staticmethod
+    def _daily_counts(df, regions):
+        """(regions x days) accident counts and each region's first-day column"""
+        day = pd.to_datetime(df['accident_time']).dt.floor('D')
+        frame = pd.DataFrame({'region': regions.to_numpy(), 'day': day.to_numpy()}).dropna()
+        if frame.empty:
+            return pd.DataFrame(), np.empty(0, dtype=int)
+
+        frame['region'] = frame['region'].astype(str)
+        counts = frame.groupby(['region', 'day']).size().unstack(fill_value=0)
+        all_days = pd.date_range(counts.columns.min(), counts.columns.max(), freq='D')
+        counts = counts.reindex(columns=all_days, fill_value=0)
+        first_day = (counts.to_numpy() > 0).argmax(axis=1)
+        return counts, first_day
@@ -0,0 +1,82 @@
+# exif_cache.py
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+class ExifResultCache:
+    """LRU cache of EXIF/GPS extraction results keyed by a content digest.
+
+    Keys come from `ExifGPSExtractor` (a blake2b digest of the metadata
+    bytes it read and the image size), so an unchanged image is recognised
+    whatever its path or upload name. With `cache_dir`, results are also written there
+    as JSON and survive restarts.
+    """
+
+    def __init__(self, max_entries=4096, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Stored result for `key` (a copy), or None"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(result)
+
+        result = self._read_disk(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, result)
+        return dict(result)
+
+    def put(self, key, result):
+        with self._lock:
+            self._remember(key, dict(result))
+        self._write_disk(key, result)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+    def _remember(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key):
+        # Two-level fan-out keeps directories small
+        return os.path.join(self.cache_dir, key[:2], f'{key}.json')
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, result):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(result, f)
+            os.replace(tmp, path)
+        except OSError:
+            pass
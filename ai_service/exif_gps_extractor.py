@@ -4,15 +4,71 @@ Extracts GPS coordinates and metadata from image EXIF data
 """
 import piexif
 from PIL import Image
+import hashlib
+import io
 import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+JPEG_SOI = b'\xff\xd8'
+EXIF_HEADER = b'Exif\x00\x00'
+# Metadata segments sit at the front of a JPEG; give up scanning after this many bytes
+MAX_HEADER_SCAN = 1024 * 1024
+# Prefix handed to piexif for formats the segment reader does not walk (TIFF
+# and friends keep their first IFDs near the start)
+MAX_METADATA_READ = 64 * 1024
+
+
+def read_exif_segment(fileobj, max_scan=MAX_HEADER_SCAN):
+    """APP1/EXIF payload of a JPEG read from its header segments only.
+
+    Walks the marker segments from the start of `fileobj`, seeking (or
+    reading, for non-seekable streams) past everything but APP1, and stops
+    at the start of the image data. Returns the payload (starting with
+    `Exif\\0\\0`, as piexif.load accepts it), `b''` if the JPEG has no EXIF
+    segment, or None when the data is not a JPEG this reader handles and the
+    full parser should be used instead.
+    """
+    if fileobj.read(2) != JPEG_SOI:
+        return None
+    
+    scanned = 2
+    while scanned < max_scan:
+        header = fileobj.read(4)
+        if len(header) < 4 or header[0] != 0xFF:
+            return None
+        marker = header[1]
+        if marker in (0xDA, 0xD9):  # start of scan / end of image
+            return b''
+        length = struct.unpack('>H', header[2:])[0]
+        if length < 2:
+            return None
+        
+        if marker == 0xE1:
+            payload = fileobj.read(length - 2)
+            if payload.startswith(EXIF_HEADER):
+                return payload
+        elif fileobj.seekable():
+            fileobj.seek(length - 2, io.SEEK_CUR)
+        else:
+            fileobj.read(length - 2)
+        scanned += 2 + length
+    return None
+
 
 class ExifGPSExtractor:
     """Extract GPS and other metadata from images"""
     
-    def __init__(self):
+    def __init__(self, max_workers=8, cache=None):
         self.supported_formats = ['.jpg', '.jpeg', '.png']
+        self.max_workers = max_workers
+        # Optional ExifResultCache of results by metadata digest
+        self.cache = cache
+        self._pool = None
+        self._pool_lock = threading.Lock()
     
     def extract_gps(self, image_path):
         """
@@ -35,63 +91,23 @@ class ExifGPSExtractor:
                     'verified': False
                 }
             
-            # Try to extract EXIF data
-            try:
-                exif_dict = piexif.load(image_path)
-            except:
-                # Fallback for images without EXIF
-                return {
-                    'error': 'No EXIF data found',
-                    'has_gps': False,
-                    'verified': False
-                }
-            
-            # Extract GPS data
-            gps_ifd = exif_dict.get("GPS", {})
-            
-            if not gps_ifd:
-                return {
-                    'error': 'No GPS data in EXIF',
-                    'has_gps': False,
-                    'verified': False
-                }
-            
-            # Extract GPS coordinates
-            lat = self._get_decimal_from_dms(
-                gps_ifd.get(piexif.GPSIFD.GPSLatitude),
-                gps_ifd.get(piexif.GPSIFD.GPSLatitudeRef)
-            )
+            return self._gps_from_source(image_path)
             
-            lng = self._get_decimal_from_dms(
-                gps_ifd.get(piexif.GPSIFD.GPSLongitude),
-                gps_ifd.get(piexif.GPSIFD.GPSLongitudeRef)
-            )
-            
-            # Extract altitude if available
-            altitude = None
-            if piexif.GPSIFD.GPSAltitude in gps_ifd:
-                alt_data = gps_ifd[piexif.GPSIFD.GPSAltitude][0]
-                altitude = alt_data[0] / alt_data[1] if alt_data[1] != 0 else None
-            
-            # Validate coordinates
-            is_valid = self._validate_coordinates(lat, lng)
-            
-            result = {
-                'latitude': lat,
-                'longitude': lng,
-                'altitude': altitude,
-                'has_gps': True,
-                'verified': is_valid,
-                'source': 'EXIF'
+        except Exception as e:
+            return {
+                'error': str(e),
+                'has_gps': False,
+                'verified': False
             }
-            
-            # Extract timestamp
-            timestamp = self._extract_timestamp(exif_dict)
-            if timestamp:
-                result['timestamp'] = timestamp
-            
-            return result
-            
+    
+    def extract_gps_bytes(self, data, size=None):
+        """Same as `extract_gps` for an image in memory or an open binary stream.
+
+        `size` is the stream's total length when known (e.g. a zip member's
+        `file_size`); otherwise a seekable stream is measured.
+        """
+        try:
+            return self._gps_from_source(data, size)
         except Exception as e:
             return {
                 'error': str(e),
@@ -99,6 +115,151 @@ class ExifGPSExtractor:
                 'verified': False
             }
     
+    def extract_gps_batch(self, images):
+        """Extract GPS from many images (paths or bytes) on the worker pool.
+
+        Items may be paths, bytes, open binary streams or (stream, size)
+        pairs. Returns results in input order plus timing:
+        {'results': [...], 'elapsed_ms': float, 'images_per_second': float}
+        """
+        start = time.perf_counter()
+        results = list(self._get_pool().map(self._extract_one, images)) if images else []
+        elapsed = time.perf_counter() - start
+        return {
+            'results': results,
+            'elapsed_ms': round(elapsed * 1000, 2),
+            'images_per_second': round(len(results) / elapsed, 1) if elapsed > 0 and results else 0.0
+        }
+    
+    def _extract_one(self, image):
+        if isinstance(image, str):
+            return self.extract_gps(image)
+        if isinstance(image, tuple):
+            return self.extract_gps_bytes(*image)
+        return self.extract_gps_bytes(image)
+    
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='exif')
+        return self._pool
+    
+    def _read_metadata(self, source, size=None):
+        """(metadata bytes, total size) for a path, bytes or binary stream.
+
+        For JPEGs the metadata is the EXIF segment found by
+        `read_exif_segment` (or `b''` without one), so only the header is
+        read; other formats (and JPEGs it cannot walk) give the first
+        `MAX_METADATA_READ` bytes for piexif's full parser.
+        """
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                return self._read_stream(f), os.fstat(f.fileno()).st_size
+        
+        if isinstance(source, (bytes, bytearray)):
+            return self._read_stream(io.BytesIO(source)), len(source)
+        
+        if size is None and source.seekable():
+            size = source.seek(0, io.SEEK_END)
+            source.seek(0)
+        return self._read_stream(source), size
+    
+    @staticmethod
+    def _read_stream(stream):
+        segment = read_exif_segment(stream)
+        if segment is None:
+            stream.seek(0)
+            return stream.read(MAX_METADATA_READ)
+        return segment
+    
+    def _gps_from_source(self, source, size=None):
+        """GPS result dict from a path, image bytes or binary stream"""
+        try:
+            metadata, size = self._read_metadata(source, size)
+        except:
+            return {
+                'error': 'No EXIF data found',
+                'has_gps': False,
+                'verified': False
+            }
+        
+        # Results are keyed by the bytes read plus the image size, so a
+        # re-submitted image skips parsing and validation whatever its name
+        key = None
+        if metadata and self.cache is not None:
+            digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+            digest.update(b'\0')
+            digest.update(metadata)
+            key = digest.hexdigest()
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        result = self._gps_from_metadata(metadata)
+        if key is not None:
+            self.cache.put(key, result)
+        return result
+    
+    def _gps_from_metadata(self, metadata):
+        """GPS result dict from the bytes returned by `_read_metadata`"""
+        # Try to extract EXIF data
+        try:
+            exif_dict = piexif.load(metadata) if metadata else {}
+        except:
+            # Fallback for images without EXIF
+            return {
+                'error': 'No EXIF data found',
+                'has_gps': False,
+                'verified': False
+            }
+        
+        # Extract GPS data
+        gps_ifd = exif_dict.get("GPS", {})
+        
+        if not gps_ifd:
+            return {
+                'error': 'No GPS data in EXIF',
+                'has_gps': False,
+                'verified': False
+            }
+        
+        # Extract GPS coordinates
+        lat = self._get_decimal_from_dms(
+            gps_ifd.get(piexif.GPSIFD.GPSLatitude),
+            gps_ifd.get(piexif.GPSIFD.GPSLatitudeRef)
+        )
+        
+        lng = self._get_decimal_from_dms(
+            gps_ifd.get(piexif.GPSIFD.GPSLongitude),
+            gps_ifd.get(piexif.GPSIFD.GPSLongitudeRef)
+        )
+        
+        # Extract altitude if available
+        altitude = None
+        if piexif.GPSIFD.GPSAltitude in gps_ifd:
+            alt_data = gps_ifd[piexif.GPSIFD.GPSAltitude][0]
+            altitude = alt_data[0] / alt_data[1] if alt_data[1] != 0 else None
+        
+        # Validate coordinates
+        is_valid = self._validate_coordinates(lat, lng)
+        
+        result = {
+            'latitude': lat,
+            'longitude': lng,
+            'altitude': altitude,
+            'has_gps': True,
+            'verified': is_valid,
+            'source': 'EXIF'
+        }
+        
+        # Extract timestamp
+        timestamp = self._extract_timestamp(exif_dict)
+        if timestamp:
+            result['timestamp'] = timestamp
+        
+        return result
+    
     def _get_decimal_from_dms(self, dms_data, ref):
         """Convert DMS (Degrees, Minutes, Seconds) to decimal coordinates"""
         if not dms_data:
@@ -154,15 +315,15 @@ class ExifGPSExtractor:
             if not os.path.exists(image_path):
                 return None
             
-            img = Image.open(image_path)
-            
-            return {
-                'filename': os.path.basename(image_path),
-                'format': img.format,
-                'size': img.size,  # (width, height)
-                'file_size': os.path.getsize(image_path),  # bytes
-                'mode': img.mode
-            }
+            # Image.open only parses the header; the context manager closes the file
+            with Image.open(image_path) as img:
+                return {
+                    'filename': os.path.basename(image_path),
+                    'format': img.format,
+                    'size': img.size,  # (width, height)
+                    'file_size': os.path.getsize(image_path),  # bytes
+                    'mode': img.mode
+                }
         except Exception as e:
             return {'error': str(e)}
 
@@ -194,14 +355,6 @@ def extract_gps_from_image(path: str):
         }
     return None
 
-            lon = _convert_to_degrees(gps_longitude)
-            if gps_longitude_ref != 'E':
-                lon = -lon
-
-            return {'lat': lat, 'lon': lon}
-    except Exception:
-        return None
-
 
 if __name__ == '__main__':
     print('EXIF GPS extractor ready')
@@ -0,0 +1,110 @@
+# facility_index.py
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+from hotspot_index import EARTH_RADIUS_KM
+
+# Columns of a facility record, as in the emergency_services table
+FACILITY_FIELDS = ('id', 'name', 'service_type', 'latitude', 'longitude', 'phone_number', 'is_24_hours')
+
+
+def read_facilities(path):
+    """Facility dicts from a JSON snapshot (a list, or `{"facilities": [...]}`) or a CSV"""
+    if path.endswith('.csv'):
+        df = pd.read_csv(path)
+        return df.astype(object).where(df.notna(), None).to_dict('records')
+    with open(path) as f:
+        data = json.load(f)
+    return data['facilities'] if isinstance(data, dict) else data
+
+
+class _Snapshot:
+    """BallTrees over one loaded facility list: all facilities and one per service type"""
+
+    def __init__(self, facilities, mtime=None):
+        self.facilities = [f for f in facilities if f.get('latitude') is not None and f.get('longitude') is not None]
+        self.mtime = mtime
+        self.trees = {}
+        if not self.facilities:
+            return
+
+        coords = np.radians([[float(f['latitude']), float(f['longitude'])] for f in self.facilities])
+        self.trees[None] = (BallTree(coords, metric='haversine'), np.arange(len(coords)))
+        types = pd.Series([f.get('service_type') for f in self.facilities], dtype=object)
+        for service_type, positions in types.groupby(types).indices.items():
+            self.trees[service_type] = (BallTree(coords[positions], metric='haversine'), positions)
+
+
+class FacilityIndex:
+    """Nearest emergency facilities from a local snapshot file.
+
+    The snapshot (see `read_facilities`) is loaded on first use. At most
+    every `refresh_interval` seconds a query checks the file's modification
+    time and, if it changed, builds a new snapshot and swaps it in, so
+    in-flight queries keep the one they started with.
+    """
+
+    def __init__(self, path, refresh_interval=300):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = 0.0
+
+    def __len__(self):
+        return len(self._get().facilities)
+
+    def nearest(self, lat, lng, k=5, radius_km=None, service_type=None):
+        """Up to `k` facilities closest to a point, nearest first, each with `distance_km`"""
+        if k < 1:
+            raise ValueError('k must be at least 1')
+        snapshot = self._get()
+        tree = snapshot.trees.get(service_type)
+        if tree is None:
+            return []
+        tree, positions = tree
+
+        k = min(k, len(positions))
+        dist, ind = tree.query(np.radians([[lat, lng]]), k=k)
+        results = []
+        for d, i in zip(dist[0] * EARTH_RADIUS_KM, ind[0]):
+            if radius_km is not None and d > radius_km:
+                break
+            results.append({**snapshot.facilities[positions[i]], 'distance_km': round(float(d), 3)})
+        return results
+
+    def refresh(self):
+        """Reload the snapshot file now; returns the number of facilities"""
+        with self._lock:
+            self._load()
+            return len(self._snapshot.facilities)
+
+    def _get(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.time() - self._checked_at < self.refresh_interval:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is None or time.time() - self._checked_at >= self.refresh_interval:
+                self._checked_at = time.time()
+                if self._snapshot is None or self._mtime() != self._snapshot.mtime:
+                    self._load()
+            return self._snapshot
+
+    def _mtime(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def _load(self):
+        mtime = self._mtime()
+        facilities = read_facilities(self.path) if mtime is not None else []
+        self._snapshot = _Snapshot(facilities, mtime)
+        self._checked_at = time.time()
@@ -0,0 +1,117 @@
+# forecast_cache.py
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+
+import pandas as pd
+
+from time_series_forecasting import AccidentForecaster
+
+
+class ForecastCache:
+    """LRU cache of fitted AccidentForecasters keyed by series fingerprint.
+
+    A request whose `ds`/`y` series has been seen before reuses the fitted
+    model (and its forecast for the same horizon) instead of refitting.
+    Fitted models are also persisted with `AccidentForecaster.save` under
+    `cache_dir`, so they survive restarts. Each fingerprint gets its own
+    forecaster and a per-key lock, so concurrent requests never share or
+    overwrite a model and identical requests fit only once.
+    """
+
+    def __init__(self, max_entries=64, cache_dir=os.path.join('ai_models', 'forecasts'), max_disk_entries=512):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()  # fingerprint -> {'forecaster', 'forecasts'}
+        self._lock = threading.Lock()
+        self._key_locks = {}  # fingerprint -> [lock, threads holding or waiting]
+
+    @staticmethod
+    def fingerprint(df):
+        """Stable hash of the `ds`/`y` series"""
+        # Same instants hash the same whatever resolution the payload parsed to
+        series = pd.DataFrame({'ds': df['ds'].astype('datetime64[ns]'), 'y': df['y']})
+        hashed = pd.util.hash_pandas_object(series, index=False)
+        return hashlib.sha1(hashed.values.tobytes()).hexdigest()
+
+    def forecast(self, df, periods, freq='D'):
+        """Forecast `periods` steps for series `df`; returns (forecast_df, cache_hit)"""
+        key = self.fingerprint(df)
+        # Fallback forecasts are anchored on the current date, so include it in the memo key
+        horizon = (periods, freq, date.today().isoformat())
+
+        with self._key_lock(key):
+            entry, hit = self._lookup(key)
+            if entry is None:
+                forecaster = AccidentForecaster(model_path=self._path(key))
+                forecaster.fit(df)
+                forecaster.save()
+                self._prune_disk()
+                entry = {'forecaster': forecaster, 'forecasts': {}}
+                self._store(key, entry)
+
+            forecast = entry['forecasts'].get(horizon)
+            if forecast is None:
+                forecast = entry['forecaster'].predict(periods=periods, freq=freq)
+                entry['forecasts'] = {horizon: forecast}
+            else:
+                hit = True
+            return forecast.copy(), hit
+
+    def _lookup(self, key):
+        """Memory, then disk; returns (entry, found)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry, True
+
+        forecaster = AccidentForecaster(model_path=self._path(key))
+        if forecaster.load():
+            entry = {'forecaster': forecaster, 'forecasts': {}}
+            self._store(key, entry)
+            return entry, True
+        return None, False
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @contextmanager
+    def _key_lock(self, key):
+        """Hold the lock for `key`; it is dropped once no thread holds or waits for it"""
+        with self._lock:
+            slot = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    del self._key_locks[key]
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.joblib')
+
+    def _prune_disk(self):
+        """Drop the least recently written models beyond `max_disk_entries`"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        files = [os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir) if f.endswith('.joblib')]
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -1,31 +1,130 @@
 import os
-import googlemaps
+import threading
+import time
+from collections import OrderedDict
 from typing import Dict, Any
 
+_GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash(lat: float, lng: float, precision: int = 7) -> str:
+    """Geohash of a point; precision 6 is a ~1.2 km cell, 7 ~150 m"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+class TTLCache:
+    """Thread-safe LRU of responses that expire `ttl` seconds after being stored"""
+
+    def __init__(self, max_entries=1024, ttl=900):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
 
 class GoogleMapsIntegration:
-    def __init__(self, api_key: str = None):
+    """Google Maps Directions and Places calls with a response cache.
+
+    Requests are keyed by the geohash cells of their points (plus the other
+    arguments), so repeated lookups from roughly the same place within
+    `cache_ttl` seconds are answered from memory. All calls share one pooled
+    HTTP session. Pass `client` (anything with `directions` and
+    `places_nearby`) to run against a local stand-in instead of the API.
+    """
+
+    def __init__(self, api_key: str = None, client=None, cache_ttl: float = 900, cache_size: int = 2048,
+                 directions_precision: int = 7, places_precision: int = 6, pool_size: int = 10):
+        self.directions_precision = directions_precision
+        self.places_precision = places_precision
+        self.cache = TTLCache(max_entries=cache_size, ttl=cache_ttl)
+        if client is not None:
+            self.client = client
+            return
+
         key = api_key or os.environ.get('GOOGLE_MAPS_API_KEY')
         if not key:
             raise RuntimeError('GOOGLE_MAPS_API_KEY is required')
-        self.client = googlemaps.Client(key=key)
+        import googlemaps
+        import requests
+
+        # Keep-alive connections shared by every call (and thread) of this client
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        self.client = googlemaps.Client(key=key, requests_session=session)
 
     def directions(self, origin: Dict[str, float], destination: Dict[str, float], alternatives: bool = True):
         """Get directions from Google Maps.
 
         origin/destination are dicts with `lat` and `lng`.
         """
-        orig = f"{origin['lat']},{origin['lng']}"
-        dest = f"{destination['lat']},{destination['lng']}"
-        return self.client.directions(orig, dest, alternatives=alternatives)
+        key = ('directions',
+               geohash(origin['lat'], origin['lng'], self.directions_precision),
+               geohash(destination['lat'], destination['lng'], self.directions_precision),
+               alternatives)
+        return self._cached(key, lambda: self.client.directions(
+            f"{origin['lat']},{origin['lng']}",
+            f"{destination['lat']},{destination['lng']}",
+            alternatives=alternatives
+        ))
 
     def nearby_emergency(self, location: Dict[str, float], radius_meters: int = 5000):
         """Search for nearby emergency services using Places API.
 
         Returns raw Places results.
         """
-        loc = (location['lat'], location['lng'])
-        return self.client.places_nearby(location=loc, radius=radius_meters, type='hospital')
+        key = ('places', geohash(location['lat'], location['lng'], self.places_precision), int(radius_meters))
+        return self._cached(key, lambda: self.client.places_nearby(
+            location=(location['lat'], location['lng']), radius=radius_meters, type='hospital'
+        ))
+
+    def _cached(self, key, fetch):
+        response = self.cache.get(key)
+        if response is None:
+            response = fetch()
+            self.cache.put(key, response)
+        return response
 
 
 if __name__ == '__main__':
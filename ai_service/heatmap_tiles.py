@@ -0,0 +1,198 @@
+# heatmap_tiles.py
+import math
+import threading
+
+import numpy as np
+
+# Cell sizes in degrees, coarse to fine
+DEFAULT_LEVELS = (0.1, 0.05, 0.02, 0.01, 0.005, 0.002, 0.001)
+
+# Roughly how many heatmap cells a 256px map tile should span at a given zoom
+CELLS_PER_TILE = 16
+
+# Batches up to this size are binned in pure Python on ingest
+SMALL_BATCH = 16
+
+
+def cell_indices(lats, lngs, grid_size):
+    """Integer grid cell of each point; cell * grid_size equals `lat // grid_size * grid_size`"""
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    return (np.floor_divide(lats, grid_size).astype(np.int64),
+            np.floor_divide(lngs, grid_size).astype(np.int64))
+
+
+def aggregate_cells(lats, lngs, dangerous, grid_size):
+    """Incident and dangerous counts per grid cell, vectorized.
+
+    Returns (lat_cells, lng_cells, counts, dangerous_counts) sorted by
+    (lat_cell, lng_cell). Points with missing coordinates are skipped.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    dangerous = np.asarray(dangerous, dtype=bool)
+    valid = np.isfinite(lats) & np.isfinite(lngs)
+    if not valid.all():
+        lats, lngs, dangerous = lats[valid], lngs[valid], dangerous[valid]
+    if lats.size == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, empty
+
+    ci, cj = cell_indices(lats, lngs, grid_size)
+    # One int64 key per cell orders cells by (lat_cell, lng_cell) like a 2-column sort
+    ci0, cj0 = ci.min(), cj.min()
+    width = cj.max() - cj0 + 1
+    keys, inverse = np.unique((ci - ci0) * width + (cj - cj0), return_inverse=True)
+    counts = np.bincount(inverse)
+    danger = np.bincount(inverse, weights=dangerous).astype(np.int64)
+    return keys // width + ci0, keys % width + cj0, counts, danger
+
+
+def cell_records(lat_cells, lng_cells, counts, danger, grid_size, total=None):
+    """`/heatmap-data` cell dicts for aggregated cells"""
+    total = counts.sum() if total is None else total
+    intensity = np.round(counts / total * 100, 2) if total else np.zeros(len(counts))
+    danger_pct = np.round(danger / counts * 100, 2)
+    return [
+        {
+            'latitude': float(i * grid_size),
+            'longitude': float(j * grid_size),
+            'incident_count': int(c),
+            'dangerous_count': int(d),
+            'intensity': float(x),
+            'danger_percentage': float(p)
+        }
+        for i, j, c, d, x, p in zip(lat_cells, lng_cells, counts, danger, intensity, danger_pct)
+    ]
+
+
+class _Level:
+    """Cell counters for one grid size, stored in growable arrays"""
+
+    def __init__(self, grid_size):
+        self.grid_size = grid_size
+        self.slots = {}     # (lat_cell, lng_cell) -> row in the arrays
+        self.size = 0
+        self.ci = np.empty(1024, dtype=np.int64)
+        self.cj = np.empty(1024, dtype=np.int64)
+        self.count = np.zeros(1024, dtype=np.int64)
+        self.danger = np.zeros(1024, dtype=np.int64)
+
+    def add(self, lats, lngs, dangerous):
+        if len(lats) <= SMALL_BATCH:
+            # Single reports: plain floats are much cheaper than a NumPy aggregation
+            cells = [
+                (int(lat // self.grid_size), int(lng // self.grid_size), 1, int(d))
+                for lat, lng, d in zip(lats.tolist(), lngs.tolist(), dangerous.tolist())
+                if math.isfinite(lat) and math.isfinite(lng)
+            ]
+        else:
+            cells = zip(*(a.tolist() for a in aggregate_cells(lats, lngs, dangerous, self.grid_size)))
+        for i, j, c, d in cells:
+            slot = self.slots.get((i, j))
+            if slot is None:
+                slot = self._new_slot(i, j)
+            self.count[slot] += c
+            self.danger[slot] += d
+
+    def _new_slot(self, i, j):
+        if self.size == len(self.ci):
+            capacity = 2 * len(self.ci)
+            for name in ('ci', 'cj', 'count', 'danger'):
+                old = getattr(self, name)
+                grown = np.zeros(capacity, dtype=old.dtype)
+                grown[:self.size] = old[:self.size]
+                setattr(self, name, grown)
+        slot = self.size
+        self.ci[slot] = i
+        self.cj[slot] = j
+        self.slots[(i, j)] = slot
+        self.size += 1
+        return slot
+
+    def window(self, bounds):
+        """Copies of the (ci, cj, count, danger) rows whose cells overlap `bounds`"""
+        n = self.size
+        ci, cj, count, danger = self.ci[:n], self.cj[:n], self.count[:n], self.danger[:n]
+        if bounds is not None:
+            min_lng, min_lat, max_lng, max_lat = bounds
+            g = self.grid_size
+            mask = ((ci + 1) * g > min_lat) & (ci * g <= max_lat) & \
+                   ((cj + 1) * g > min_lng) & (cj * g <= max_lng)
+            ci, cj, count, danger = ci[mask], cj[mask], count[mask], danger[mask]
+        order = np.lexsort((cj, ci))
+        return ci[order], cj[order], count[order], danger[order]
+
+
+class HeatmapTiles:
+    """Pre-aggregated heatmap cells at several grid resolutions.
+
+    Every report increments one cell per level, so ingest costs O(levels)
+    and a viewport request is a vectorized mask over one level's cells
+    instead of a groupby over all accidents. Cells use the same floor
+    binning as `/heatmap-data`, so a level answers exactly what that
+    endpoint would compute for the same grid size.
+    """
+
+    def __init__(self, levels=DEFAULT_LEVELS):
+        self.levels = tuple(sorted(levels, reverse=True))
+        self._lock = threading.Lock()
+        self.version = 0
+        self._reset()
+
+    def _reset(self):
+        self._levels = {g: _Level(g) for g in self.levels}
+        self.total = 0
+
+    def load(self, accidents_df):
+        """Rebuild all levels from a full accident DataFrame"""
+        lats, lngs, dangerous = self._columns(accidents_df)
+        with self._lock:
+            self._reset()
+            self._add(lats, lngs, dangerous)
+            return self.total
+
+    def add_many(self, reports):
+        """Count new report dicts (latitude, longitude, severity) into every level"""
+        lats = [r.get('latitude', r.get('lat')) for r in reports]
+        lngs = [r.get('longitude', r.get('lng')) for r in reports]
+        dangerous = [r.get('severity') == 'dangerous' for r in reports]
+        lats = np.array([np.nan if v is None else float(v) for v in lats])
+        lngs = np.array([np.nan if v is None else float(v) for v in lngs])
+        with self._lock:
+            self._add(lats, lngs, np.array(dangerous, dtype=bool))
+
+    def level_for(self, grid_size=None, zoom=None):
+        """Closest precomputed grid size to `grid_size`, or to a web-map `zoom`"""
+        if grid_size is None:
+            if zoom is None:
+                return self.levels[len(self.levels) // 2]
+            grid_size = 360 / (2 ** float(zoom)) / CELLS_PER_TILE
+        grid_size = float(grid_size)
+        if grid_size <= 0:
+            raise ValueError('grid_size must be positive')
+        return min(self.levels, key=lambda g: abs(math.log(g / grid_size)))
+
+    def query(self, bounds=None, grid_size=None, zoom=None):
+        """Cells of the chosen level inside `bounds` (min_lng, min_lat, max_lng, max_lat).
+
+        Returns (grid_size, records, total_incidents in the viewport).
+        """
+        level = self.level_for(grid_size, zoom)
+        with self._lock:
+            ci, cj, count, danger = self._levels[level].window(bounds)
+        total = int(count.sum())
+        return level, cell_records(ci, cj, count, danger, level, total), total
+
+    def _add(self, lats, lngs, dangerous):
+        for level in self._levels.values():
+            level.add(lats, lngs, dangerous)
+        self.total += int((np.isfinite(lats) & np.isfinite(lngs)).sum())
+        self.version += 1
+
+    @staticmethod
+    def _columns(df):
+        if df.empty:
+            return np.empty(0), np.empty(0), np.empty(0, dtype=bool)
+        dangerous = (df['severity'] == 'dangerous').to_numpy() if 'severity' in df.columns else np.zeros(len(df), dtype=bool)
+        return (df['latitude'].to_numpy(dtype=float), df['longitude'].to_numpy(dtype=float), dangerous)
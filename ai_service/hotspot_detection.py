@@ -1,17 +1,115 @@
 # hotspot_detection.py
+from sklearn.base import clone
 from sklearn.cluster import DBSCAN
+from sklearn.neighbors import NearestNeighbors
+from scipy.sparse.csgraph import connected_components
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from collections import Counter
+
+from time_utils import is_night_hour
+
+CLUSTERING_MODES = ('exact', 'approximate', 'auto')
+
+
+def microcluster_dbscan(coords, eps, min_samples, cell_fraction=0.25):
+    """Approximate haversine DBSCAN over grid microclusters.
+
+    `coords` are (lat, lng) radians. Points are snapped to cubes of side
+    `cell_fraction * eps` on the unit sphere; each occupied cube becomes one
+    microcluster at its points' mean position, weighted by its size.
+    Weighted DBSCAN runs on the microclusters and every point takes its
+    microcluster's label, so points are never more than one cube diagonal
+    (about 0.43 eps at the default fraction) away from where exact DBSCAN
+    measured them. Labels are renumbered by first appearance, as in
+    exact DBSCAN.
+    """
+    coords = np.asarray(coords, dtype=float)
+    if len(coords) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    lat, lng = coords[:, 0], coords[:, 1]
+    cos_lat = np.cos(lat)
+    xyz = np.column_stack([cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)])
+    chord = 2 * np.sin(eps / 2)
+    cells = np.floor(xyz / (chord * cell_fraction)).astype(np.int64)
+
+    # One int64 key per cube when the occupied extent allows it
+    cells -= cells.min(axis=0)
+    extent = cells.max(axis=0) + 1
+    if np.prod(extent.astype(float)) < 2 ** 62:
+        keys = (cells[:, 0] * extent[1] + cells[:, 1]) * extent[2] + cells[:, 2]
+        _, inverse = np.unique(keys, return_inverse=True)
+    else:
+        _, inverse = np.unique(cells, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+
+    weights = np.bincount(inverse)
+    centers = np.column_stack([np.bincount(inverse, weights=xyz[:, k]) for k in range(3)])
+    centers /= np.linalg.norm(centers, axis=1)[:, None]
+    # Chord distance on the unit sphere is monotone in great-circle distance,
+    # so a euclidean (k-d tree) search on xyz finds the same neighbours
+    micro_labels = _weighted_dbscan(centers, weights, chord, min_samples)
+
+    labels = micro_labels[inverse]
+    clustered = labels != -1
+    order = pd.unique(labels[clustered])
+    remap = np.full(int(micro_labels.max()) + 1 if len(order) else 0, -1, dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    labels[clustered] = remap[labels[clustered]]
+    return labels
+
+
+def _weighted_dbscan(points, weights, radius, min_samples):
+    """DBSCAN over weighted points via a sparse neighbour graph.
+
+    Core points are those whose neighbourhood weight reaches `min_samples`;
+    clusters are connected components of the core-core graph and each
+    border point joins the cluster of one core neighbour.
+    """
+    graph = NearestNeighbors(radius=radius, n_jobs=-1).fit(points).radius_neighbors_graph(points, mode='connectivity')
+    graph = graph.tocsr()
+    core = graph @ weights >= min_samples
+
+    labels = np.full(len(points), -1, dtype=np.int64)
+    core_idx = np.flatnonzero(core)
+    if len(core_idx) == 0:
+        return labels
+    _, labels[core_idx] = connected_components(graph[core_idx][:, core_idx], directed=False)
+
+    border_idx = np.flatnonzero(~core)
+    to_core = graph[border_idx][:, core_idx].tocsr()
+    has_core = np.diff(to_core.indptr) > 0
+    labels[border_idx[has_core]] = labels[core_idx[to_core.indices[to_core.indptr[:-1][has_core]]]]
+    return labels
+
 
 class HotspotDetector:
-    def __init__(self, eps=0.01, min_samples=3):
+    def __init__(self, eps=0.01, min_samples=3, mode='exact', approx_threshold=200_000, cell_fraction=0.25):
+        """`mode` is 'exact' (DBSCAN), 'approximate' (microcluster_dbscan) or
+        'auto' (approximate above `approx_threshold` points)."""
+        if mode not in CLUSTERING_MODES:
+            raise ValueError(f'Unknown clustering mode {mode!r}')
         self.eps = eps  # ~1km in decimal degrees
         self.min_samples = min_samples
+        self.mode = mode
+        self.approx_threshold = approx_threshold
+        self.cell_fraction = cell_fraction
         self.dbscan = DBSCAN(eps=eps, min_samples=min_samples, metric='haversine')
         self.hotspots = []
+    
+    def cluster(self, coords, mode=None):
+        """DBSCAN labels for (lat, lng) radians, exact or approximate per `mode`"""
+        mode = mode or self.mode
+        if mode not in CLUSTERING_MODES:
+            raise ValueError(f'Unknown clustering mode {mode!r}')
+        if mode == 'approximate' or (mode == 'auto' and len(coords) > self.approx_threshold):
+            return microcluster_dbscan(coords, self.eps, self.min_samples, self.cell_fraction)
+        # fit_predict stores labels on the estimator, so each call fits its own copy
+        return clone(self.dbscan).fit_predict(coords)
         
-    def detect_hotspots(self, accidents_df):
+    def detect_hotspots(self, accidents_df, mode=None):
         """Detect accident hotspots using spatial-temporal clustering"""
         if accidents_df.empty:
             return []
@@ -20,120 +118,223 @@ class HotspotDetector:
         coords = np.radians(accidents_df[['latitude', 'longitude']].values)
         
         # Perform DBSCAN clustering
-        clusters = self.dbscan.fit_predict(coords)
+        clusters = self.cluster(coords, mode)
         
         # Add cluster labels to dataframe
         accidents_df['cluster'] = clusters
         
-        # Filter out noise (cluster = -1)
-        valid_clusters = accidents_df[accidents_df['cluster'] != -1]
+        hotspots = self._summarize_clusters(accidents_df, clusters)
+        
+        self.hotspots = hotspots
+        return hotspots
+    
+    def find_hotspots(self, accidents_df, mode=None):
+        """Hotspots for `accidents_df`, without storing them or labelling the frame.
+
+        Unlike `detect_hotspots` it leaves the detector untouched, so
+        concurrent requests and background jobs can share one detector.
+        """
+        if accidents_df.empty:
+            return []
+        coords = np.radians(accidents_df[['latitude', 'longitude']].values)
+        return self._summarize_clusters(accidents_df, self.cluster(coords, mode))
+    
+    def _summarize_clusters(self, accidents_df, clusters):
+        """Build every hotspot summary from one grouped pass over the labels.
+
+        Rows are stably sorted by cluster so each cluster is a contiguous
+        slice; histograms come from `np.bincount` over combined
+        (cluster, value) codes and extremes from `reduceat`.
+        """
+        clusters = np.asarray(clusters)
+        valid = clusters != -1
+        if not valid.any():
+            return []
+        
+        # Hotspots are reported in order of first appearance, like Series.unique()
+        cluster_order = pd.unique(clusters[valid])
+        n_clusters = int(clusters[valid].max()) + 1
+        
+        labels = clusters[valid]
+        positions = np.flatnonzero(valid)
+        order = np.argsort(labels, kind='stable')
+        counts = np.bincount(labels, minlength=n_clusters)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        present = counts > 0
+        
+        lat = accidents_df['latitude'].to_numpy(dtype=float)[positions][order]
+        lng = accidents_df['longitude'].to_numpy(dtype=float)[positions][order]
+        lat_min = np.minimum.reduceat(lat, starts[present])
+        lat_max = np.maximum.reduceat(lat, starts[present])
+        lng_min = np.minimum.reduceat(lng, starts[present])
+        lng_max = np.maximum.reduceat(lng, starts[present])
+        slot = np.cumsum(present) - 1  # cluster label -> index into the reduceat results
+        
+        # Severity histogram
+        severity_levels = ['minor', 'major', 'dangerous']
+        severity_codes = pd.Categorical(accidents_df['severity'].to_numpy()[positions], categories=severity_levels).codes
+        known = severity_codes != -1
+        severity_hist = np.bincount(
+            labels[known] * 3 + severity_codes[known], minlength=n_clusters * 3
+        ).reshape(n_clusters, 3)
+        
+        # Hour-of-day and day-of-week histograms from a single datetime parse
+        times = pd.DatetimeIndex(pd.to_datetime(accidents_df['accident_time']))[positions]
+        has_time = ~times.isna()
+        hour = times.hour.to_numpy()[has_time].astype(np.int64)
+        dow = times.dayofweek.to_numpy()[has_time].astype(np.int64)
+        timed_labels = labels[has_time]
+        hour_hist = np.bincount(timed_labels * 24 + hour, minlength=n_clusters * 24).reshape(n_clusters, 24)
+        dow_keys = timed_labels * 7 + dow
+        dow_hist = np.bincount(dow_keys, minlength=n_clusters * 7).reshape(n_clusters, 7)
+        
+        # Row position where each (cluster, day) first occurs, for value_counts-style ties
+        day_first = np.full(n_clusters * 7, np.iinfo(np.int64).max)
+        first_keys, first_idx = np.unique(dow_keys, return_index=True)
+        day_first[first_keys] = first_idx
+        day_first = day_first.reshape(n_clusters, 7)
+        
+        # Latest accident per cluster (max skips NaT, as Series.max does)
+        last_accident = pd.Series(times).groupby(labels).max()
+        
+        # Weather counts and rainy share
+        has_weather = 'weather_condition' in accidents_df.columns
+        if has_weather:
+            weather = accidents_df['weather_condition'].to_numpy()[positions]
+            weather_codes, weather_levels = pd.factorize(weather)
+            n_weather = len(weather_levels)
+            seen = weather_codes != -1
+            weather_keys = labels[seen] * n_weather + weather_codes[seen]
+            weather_hist = np.bincount(weather_keys, minlength=n_clusters * n_weather).reshape(n_clusters, n_weather)
+            weather_first = np.full(n_clusters * n_weather, np.iinfo(np.int64).max)
+            first_keys, first_idx = np.unique(weather_keys, return_index=True)
+            weather_first[first_keys] = first_idx
+            weather_first = weather_first.reshape(n_clusters, n_weather)
+            is_rainy = pd.Series(weather).str.contains('rain', case=False, na=False).to_numpy()
+            rainy = np.bincount(labels[is_rainy], minlength=n_clusters)
         
-        # Analyze each cluster
         hotspots = []
-        for cluster_id in valid_clusters['cluster'].unique():
-            cluster_data = valid_clusters[valid_clusters['cluster'] == cluster_id]
-            
-            # Calculate cluster center
-            center_lat = cluster_data['latitude'].mean()
-            center_lng = cluster_data['longitude'].mean()
-            
-            # Calculate risk metrics
-            total_accidents = len(cluster_data)
-            severity_scores = {
-                'minor': len(cluster_data[cluster_data['severity'] == 'minor']),
-                'major': len(cluster_data[cluster_data['severity'] == 'major']),
-                'dangerous': len(cluster_data[cluster_data['severity'] == 'dangerous'])
+        for cluster_id in cluster_order:
+            start, count = starts[cluster_id], counts[cluster_id]
+            i = slot[cluster_id]
+            stats = {
+                'count': count,
+                # Slice sums keep the same pairwise summation as Series.mean
+                'lat_sum': lat[start:start + count].sum(),
+                'lng_sum': lng[start:start + count].sum(),
+                'lat_min': lat_min[i],
+                'lat_max': lat_max[i],
+                'lng_min': lng_min[i],
+                'lng_max': lng_max[i],
+                'severity': dict(zip(severity_levels, severity_hist[cluster_id].tolist())),
+                'hours': hour_hist[cluster_id],
+                'days': dow_hist[cluster_id],
+                'day_first': day_first[cluster_id],
+                'weather': None,
+                'last_accident': last_accident[cluster_id]
             }
             
-            # Calculate risk score (weighted)
-            risk_score = (
-                severity_scores['minor'] * 1 +
-                severity_scores['major'] * 3 +
-                severity_scores['dangerous'] * 5
-            ) / total_accidents
-            
-            # Determine risk level
-            if risk_score >= 4:
-                risk_level = 'high'
-            elif risk_score >= 2.5:
-                risk_level = 'medium'
-            else:
-                risk_level = 'low'
-            
-            # Analyze time patterns
-            time_patterns = self._analyze_time_patterns(cluster_data)
-            
-            # Analyze weather patterns
-            weather_patterns = self._analyze_weather_patterns(cluster_data)
+            if has_weather:
+                nonzero = np.flatnonzero(weather_hist[cluster_id])
+                stats['weather'] = Counter({weather_levels[j]: int(weather_hist[cluster_id, j]) for j in nonzero})
+                stats['weather_first'] = {weather_levels[j]: int(weather_first[cluster_id, j]) for j in nonzero}
+                stats['rainy'] = int(rainy[cluster_id])
             
-            hotspot = {
-                'cluster_id': int(cluster_id),
-                'center': {'lat': center_lat, 'lng': center_lng},
-                'bounding_box': self._calculate_bounding_box(cluster_data),
-                'total_accidents': int(total_accidents),
-                'severity_distribution': severity_scores,
-                'risk_score': float(risk_score),
-                'risk_level': risk_level,
-                'time_patterns': time_patterns,
-                'weather_patterns': weather_patterns,
-                'last_accident': cluster_data['accident_time'].max().isoformat() if isinstance(cluster_data['accident_time'].max(), datetime) else str(cluster_data['accident_time'].max()),
-                'recommendations': self._generate_recommendations(risk_level, time_patterns)
-            }
-            
-            hotspots.append(hotspot)
+            hotspots.append(self._build_hotspot(cluster_id, stats))
         
-        self.hotspots = hotspots
         return hotspots
     
-    def _analyze_time_patterns(self, cluster_data):
-        """Analyze when accidents occur in this hotspot"""
-        # Ensure accident_time is datetime
-        cluster_data['accident_time'] = pd.to_datetime(cluster_data['accident_time'])
+    def _classify_risk(self, severity_scores, total_accidents):
+        """Weighted severity score and the matching risk level"""
+        risk_score = (
+            severity_scores['minor'] * 1 +
+            severity_scores['major'] * 3 +
+            severity_scores['dangerous'] * 5
+        ) / total_accidents
         
-        # Extract hour of day
-        cluster_data['hour'] = cluster_data['accident_time'].dt.hour
+        if risk_score >= 4:
+            risk_level = 'high'
+        elif risk_score >= 2.5:
+            risk_level = 'medium'
+        else:
+            risk_level = 'low'
         
-        # Group by hour
-        hourly_counts = cluster_data['hour'].value_counts().sort_index()
+        return risk_score, risk_level
+    
+    def _build_hotspot(self, cluster_id, stats):
+        """Build a hotspot summary from pre-aggregated cluster statistics.
+
+        `stats` holds running aggregates for one cluster: `count`, `lat_sum`,
+        `lng_sum`, `lat_min`, `lat_max`, `lng_min`, `lng_max`, `severity`
+        (minor/major/dangerous counts), `hours` (24-bin histogram), `days`
+        (7-bin histogram), `weather` (Counter, or None when no weather data),
+        `rainy` and `last_accident`. Optional `day_first` (7 values) and
+        `weather_first` (dict) hold the row position where each day/weather
+        value first occurred and break ties the way `value_counts` does. The
+        result has the same shape as the entries returned by `detect_hotspots`.
+        """
+        total_accidents = int(stats['count'])
+        severity_scores = {k: int(stats['severity'].get(k, 0)) for k in ('minor', 'major', 'dangerous')}
+        risk_score, risk_level = self._classify_risk(severity_scores, total_accidents)
+        
+        time_patterns = self._time_patterns_from_histograms(stats['hours'], stats['days'], stats.get('day_first'))
         
-        # Find peak hours (top 3 hours with most accidents)
-        peak_hours = hourly_counts.nlargest(3).index.tolist()
+        if stats['weather'] is None:
+            weather_patterns = {}
+        else:
+            weather_first = stats.get('weather_first') or {}
+            weather_patterns = {
+                'most_common_weather': min(stats['weather'], key=lambda w: (-stats['weather'][w], weather_first.get(w, 0))) if stats['weather'] else 'unknown',
+                'rainy_percentage': stats['rainy'] / total_accidents * 100
+            }
         
-        # Analyze day of week patterns
-        cluster_data['day_of_week'] = cluster_data['accident_time'].dt.dayofweek
-        weekday_counts = cluster_data['day_of_week'].value_counts()
+        padding = 0.001
+        last_accident = stats['last_accident']
         
         return {
-            'peak_hours': peak_hours,
-            'hourly_distribution': hourly_counts.to_dict(),
-            'busiest_day': int(weekday_counts.idxmax()) if not weekday_counts.empty else None,
-            'is_night_hotspot': len(cluster_data[cluster_data['hour'].between(18, 6)]) > len(cluster_data) * 0.5
+            'cluster_id': int(cluster_id),
+            'center': {'lat': stats['lat_sum'] / total_accidents, 'lng': stats['lng_sum'] / total_accidents},
+            'bounding_box': {
+                'north': float(stats['lat_max'] + padding),
+                'south': float(stats['lat_min'] - padding),
+                'east': float(stats['lng_max'] + padding),
+                'west': float(stats['lng_min'] - padding)
+            },
+            'total_accidents': total_accidents,
+            'severity_distribution': severity_scores,
+            'risk_score': float(risk_score),
+            'risk_level': risk_level,
+            'time_patterns': time_patterns,
+            'weather_patterns': weather_patterns,
+            'last_accident': last_accident.isoformat() if isinstance(last_accident, datetime) else str(last_accident),
+            'recommendations': self._generate_recommendations(risk_level, time_patterns)
         }
     
-    def _analyze_weather_patterns(self, cluster_data):
-        """Analyze weather conditions during accidents"""
-        if 'weather_condition' not in cluster_data.columns:
-            return {}
+    def _time_patterns_from_histograms(self, hours, days, day_first=None):
+        """Time patterns from hour-of-day and day-of-week histograms"""
+        hourly_distribution = {h: int(c) for h, c in enumerate(hours) if c > 0}
         
-        weather_counts = cluster_data['weather_condition'].value_counts()
+        # Top 3 hours, ties broken by the earlier hour (same as Series.nlargest)
+        peak_hours = sorted(hourly_distribution, key=lambda h: (-hourly_distribution[h], h))[:3]
         
-        return {
-            'most_common_weather': weather_counts.idxmax() if not weather_counts.empty else 'unknown',
-            'rainy_percentage': (len(cluster_data[cluster_data['weather_condition'].str.contains('rain', case=False, na=False)]) / len(cluster_data) * 100) if not cluster_data.empty else 0
-        }
-    
-    def _calculate_bounding_box(self, cluster_data, padding=0.001):
-        """Calculate bounding box for hotspot visualization"""
-        min_lat = cluster_data['latitude'].min() - padding
-        max_lat = cluster_data['latitude'].max() + padding
-        min_lng = cluster_data['longitude'].min() - padding
-        max_lng = cluster_data['longitude'].max() + padding
+        night_count = sum(c for h, c in hourly_distribution.items() if is_night_hour(h))
+        total = sum(hourly_distribution.values())
+        
+        days = np.asarray(days)
+        if days.sum() == 0:
+            busiest_day = None
+        elif day_first is None:
+            busiest_day = int(np.argmax(days))
+        else:
+            # Among the most frequent days, pick the one seen first
+            candidates = np.flatnonzero(days == days.max())
+            busiest_day = int(candidates[np.argmin(np.asarray(day_first)[candidates])])
         
         return {
-            'north': float(max_lat),
-            'south': float(min_lat),
-            'east': float(max_lng),
-            'west': float(min_lng)
+            'peak_hours': peak_hours,
+            'hourly_distribution': hourly_distribution,
+            'busiest_day': busiest_day,
+            'is_night_hotspot': night_count > total * 0.5
         }
     
     def _generate_recommendations(self, risk_level, time_patterns):
@@ -0,0 +1,155 @@
+# hotspot_index.py
+import hashlib
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371
+
+RISK_LEVELS = ('low', 'medium', 'high')
+
+
+class HotspotIndex:
+    """BallTree (haversine metric) over hotspot centres.
+
+    Built once per hotspot set and shared read-only across requests. Radius
+    queries return hotspot positions in list order together with great-circle
+    distances in kilometres.
+    """
+
+    def __init__(self, hotspots, version=None):
+        self.hotspots = list(hotspots or [])
+        self.version = version
+
+        if self.hotspots:
+            centers = np.array(
+                [[h['center']['lat'], h['center']['lng']] for h in self.hotspots],
+                dtype=float
+            )
+            self.centers = np.radians(centers)
+            self.tree = BallTree(self.centers, metric='haversine')
+        else:
+            self.centers = np.empty((0, 2))
+            self.tree = None
+
+        self._risk_patterns = None
+        self._risk_scores = None
+        self._alert_version = None
+
+    def __len__(self):
+        return len(self.hotspots)
+
+    def query_radius(self, lat, lng, radius_km):
+        """Hotspots within `radius_km` of one point -> (indices, distances_km)"""
+        if self.tree is None:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+
+        point = np.radians([[lat, lng]])
+        ind, dist = self.tree.query_radius(point, r=radius_km / EARTH_RADIUS_KM, return_distance=True)
+        order = np.argsort(ind[0])
+        return ind[0][order], dist[0][order] * EARTH_RADIUS_KM
+
+    def query_radius_many(self, lats, lngs, radius_km):
+        """Radius query for many points at once.
+
+        Returns flat arrays (point_idx, hotspot_idx, distance_km) with one
+        entry per (point, hotspot) pair within range.
+        """
+        lats = np.asarray(lats, dtype=float)
+        lngs = np.asarray(lngs, dtype=float)
+        if self.tree is None or lats.size == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), np.empty(0)
+
+        points = np.radians(np.column_stack([lats, lngs]))
+        ind, dist = self.tree.query_radius(points, r=radius_km / EARTH_RADIUS_KM, return_distance=True)
+        counts = np.fromiter((len(i) for i in ind), dtype=np.intp, count=len(ind))
+        point_idx = np.repeat(np.arange(len(ind)), counts)
+        if counts.sum() == 0:
+            return point_idx, np.empty(0, dtype=np.intp), np.empty(0)
+
+        hotspot_idx = np.concatenate(ind).astype(np.intp)
+        distances = np.concatenate(dist) * EARTH_RADIUS_KM
+        order = np.lexsort((hotspot_idx, point_idx))
+        return point_idx[order], hotspot_idx[order], distances[order]
+
+    def risk_patterns(self):
+        """Per-hotspot arrays used by batch risk checks (built once per index).
+
+        Returns a dict with `peak_hours` (n x 24 bool), `night` (n bool),
+        and the lower-cased most common weather factorized into
+        `weather_codes` (n ints) and `weather_levels` (distinct values).
+        """
+        if self._risk_patterns is None:
+            n = len(self.hotspots)
+            peak_hours = np.zeros((n, 24), dtype=bool)
+            night = np.zeros(n, dtype=bool)
+            weather = np.empty(n, dtype=object)
+            for i, hotspot in enumerate(self.hotspots):
+                time_patterns = hotspot.get('time_patterns', {})
+                hours = [int(h) for h in time_patterns.get('peak_hours', []) if 0 <= int(h) < 24]
+                peak_hours[i, hours] = True
+                night[i] = bool(time_patterns.get('is_night_hotspot', False))
+                weather[i] = (hotspot.get('weather_patterns', {}).get('most_common_weather') or '').lower()
+
+            weather_codes, weather_levels = pd.factorize(weather)
+            self._risk_patterns = {
+                'peak_hours': peak_hours,
+                'night': night,
+                'weather_codes': weather_codes,
+                'weather_levels': list(weather_levels)
+            }
+        return self._risk_patterns
+
+    def alert_version(self):
+        """Digest of what alerts depend on: centres (to ~10 m), risk levels and patterns.
+
+        Unlike `version`, it stays the same when new reports only change
+        counts, so per-device alert state need not be re-evaluated.
+        """
+        if self._alert_version is None:
+            entries = []
+            for hotspot in self.hotspots:
+                time_patterns = hotspot.get('time_patterns', {})
+                entries.append(json.dumps([
+                    round(hotspot['center']['lat'], 4),
+                    round(hotspot['center']['lng'], 4),
+                    hotspot.get('risk_level'),
+                    sorted(int(h) for h in time_patterns.get('peak_hours', [])),
+                    bool(time_patterns.get('is_night_hotspot', False)),
+                    hotspot.get('weather_patterns', {}).get('most_common_weather')
+                ]))
+            # Sorted, so renumbering or reordering clusters does not change the digest
+            digest = hashlib.blake2b('\n'.join(sorted(entries)).encode(), digest_size=8)
+            self._alert_version = digest.hexdigest()
+        return self._alert_version
+
+    def risk_scores(self):
+        """(risk_score floats, risk level codes into RISK_LEVELS) per hotspot, built once per index"""
+        if self._risk_scores is None:
+            scores = np.array([float(h.get('risk_score') or 0.0) for h in self.hotspots])
+            levels = np.array([RISK_LEVELS.index(h['risk_level']) if h.get('risk_level') in RISK_LEVELS else 0
+                               for h in self.hotspots], dtype=np.intp)
+            self._risk_scores = (scores, levels)
+        return self._risk_scores
+
+
+class HotspotIndexCache:
+    """Keep the index for the current hotspot-set version in the process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+
+    def get(self, version, load_hotspots):
+        """Return the index for `version`, building it from `load_hotspots()` on a miss"""
+        index = self._index
+        if index is not None and index.version == version:
+            return index
+
+        with self._lock:
+            if self._index is None or self._index.version != version:
+                self._index = HotspotIndex(load_hotspots(), version=version)
+            return self._index
@@ -0,0 +1,115 @@
+# hotspot_store.py
+import json
+import os
+import threading
+import time
+
+from hotspot_index import HotspotIndex
+
+
+class HotspotStore:
+    """Versioned, in-memory hotspot set shared by the alert endpoints.
+
+    `loader()` returns `(version, hotspots)`. `version_source()`, if given,
+    is a cheap call that returns only the current version; when it differs
+    from the loaded one the store reloads straight away. Otherwise the data
+    is reloaded once `ttl` seconds have passed. Readers get an immutable
+    `HotspotIndex` snapshot, so a refresh never disturbs in-flight requests.
+    """
+
+    def __init__(self, loader, version_source=None, ttl=300):
+        self.loader = loader
+        self.version_source = version_source
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._loaded_at = 0.0
+
+    @property
+    def version(self):
+        snapshot = self._snapshot
+        return snapshot.version if snapshot is not None else None
+
+    def get(self):
+        """Current hotspot index, reloading it first if stale"""
+        snapshot = self._snapshot
+        if snapshot is not None and not self._is_stale(snapshot):
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is None or self._is_stale(self._snapshot):
+                self._reload()
+            return self._snapshot
+
+    def refresh(self):
+        """Force a reload from the source"""
+        with self._lock:
+            self._reload()
+            return self._snapshot
+
+    def _is_stale(self, snapshot):
+        if self.version_source is not None and self.version_source() != snapshot.version:
+            return True
+        return self.ttl is not None and time.time() - self._loaded_at >= self.ttl
+
+    def _reload(self):
+        version, hotspots = self.loader()
+        self._snapshot = HotspotIndex(hotspots, version=version)
+        self._loaded_at = time.time()
+
+
+def engine_source(engine):
+    """(loader, version_source) pair backed by an IncrementalHotspotEngine"""
+    def loader():
+        with engine._lock:
+            return engine.version, engine.hotspots()
+
+    return loader, lambda: engine.version
+
+
+def database_source(dsn=None):
+    """(loader, version_source) pair backed by the `hotspots` table.
+
+    There is no cheap per-request version check against the database, so
+    this source relies on the store TTL (or an explicit `refresh`).
+    """
+    import psycopg2
+
+    dsn = dsn or os.environ.get('DATABASE_URL')
+
+    def loader():
+        with psycopg2.connect(dsn) as conn, conn.cursor() as cur:
+            cur.execute('SELECT COUNT(*), MAX(last_updated) FROM hotspots')
+            count, last_updated = cur.fetchone()
+            cur.execute("""
+                SELECT id,
+                       ST_Y(center_point::geometry) AS lat,
+                       ST_X(center_point::geometry) AS lng,
+                       risk_level, accident_count, severity_score,
+                       time_patterns, weather_patterns
+                FROM hotspots
+                WHERE center_point IS NOT NULL
+            """)
+            hotspots = [_hotspot_from_row(row) for row in cur.fetchall()]
+        return f"{count}:{last_updated.isoformat() if last_updated else ''}", hotspots
+
+    return loader, None
+
+
+def _hotspot_from_row(row):
+    hotspot_id, lat, lng, risk_level, accident_count, severity_score, time_patterns, weather_patterns = row
+    if isinstance(time_patterns, str):
+        time_patterns = json.loads(time_patterns)
+    if isinstance(weather_patterns, str):
+        weather_patterns = json.loads(weather_patterns)
+
+    return {
+        'cluster_id': hotspot_id,
+        'center': {'lat': float(lat), 'lng': float(lng)},
+        'risk_level': risk_level or 'low',
+        'total_accidents': accident_count or 0,
+        'risk_score': float(severity_score) if severity_score is not None else 0.0,
+        'severity_distribution': {},
+        'time_patterns': time_patterns or {},
+        'weather_patterns': weather_patterns or {}
+    }
@@ -0,0 +1,479 @@
+# incremental_hotspots.py
+import math
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import DBSCAN
+from sklearn.neighbors import NearestNeighbors
+
+from hotspot_detection import HotspotDetector
+from time_utils import local_naive
+
+# int64 nanoseconds of NaT; sorts below every real time
+_NAT = pd.NaT.value
+
+
+def dbscan_graph(coords, eps, min_samples):
+    """Haversine DBSCAN from a single neighbour search.
+
+    Returns (labels, neighbour counts including the point itself); the
+    radius graph built once is fed to DBSCAN as a precomputed metric.
+    """
+    if len(coords) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    graph = NearestNeighbors(radius=eps, metric='haversine').fit(coords).radius_neighbors_graph(coords, mode='distance')
+    counts = np.diff(graph.indptr)
+    labels = DBSCAN(eps=eps, min_samples=min_samples, metric='precomputed').fit_predict(graph)
+    return labels, counts
+
+
+class IncrementalHotspotEngine:
+    """Keep DBSCAN hotspots up to date one report at a time.
+
+    Points live in a uniform grid over unit-sphere coordinates, so finding the
+    eps-neighbours of a new report only touches the 27 surrounding cells.
+    Core points are tracked with a union-find structure: a new core point
+    joins (and possibly merges) the clusters of the cores around it, and only
+    the summaries of those clusters are rebuilt. Border assignment depends on
+    arrival order, so a full DBSCAN pass (`reconcile`) runs periodically on a
+    background thread to remove any drift from the batch result.
+
+    `eps` and `min_samples` have the same meaning as in `HotspotDetector`
+    (eps is a haversine distance in radians). Accident times are stored as
+    naive local time (see `local_naive`).
+    """
+
+    # Per-point columns, grown together
+    _COLUMNS = (
+        ('_xyz', (3,), np.float64),
+        ('_lat', (), np.float64),
+        ('_lng', (), np.float64),
+        ('_hour', (), np.int8),         # -1 when the time is unknown
+        ('_dow', (), np.int8),
+        ('_severity', (), np.int32),    # code into _severity_levels
+        ('_weather', (), np.int32),     # code into _weather_levels, -1 for none
+        ('_time', (), np.int64)         # ns since the epoch, _NAT when unknown
+    )
+
+    def __init__(self, eps=0.01, min_samples=3, reconcile_every=5000, reconcile_interval=3600):
+        self.eps = eps
+        self.min_samples = min_samples
+        self.reconcile_every = reconcile_every
+        self.reconcile_interval = reconcile_interval
+        self.detector = HotspotDetector(eps=eps, min_samples=min_samples)
+
+        # Chord length on the unit sphere that matches a great-circle distance of eps
+        self._radius = 2 * math.sin(eps / 2)
+        self._lock = threading.RLock()
+        # Serializes reconciles; held while DBSCAN runs outside _lock
+        self._reconcile_lock = threading.Lock()
+        self._reconcile_thread = None
+        self.version = 0
+        self._generation = 0
+        self._severity_levels, self._severity_codes = [], {}
+        self._weather_levels, self._weather_codes, self._weather_rainy = [], {}, []
+        self._reset()
+
+    def _reset(self, capacity=1024):
+        for name, shape, dtype in self._COLUMNS:
+            setattr(self, name, np.empty((capacity,) + shape, dtype=dtype))
+        self._size = 0
+        self._grid = {}
+        self._neighbor_counts = []
+        self._parent = []           # union-find parent, -1 for non-core points
+        self._anchor = []           # core point a border/core point is attached to, -1 for noise
+        self._stats = {}            # union-find root -> cluster aggregates
+        self._cluster_ids = {}      # union-find root -> public cluster id
+        self._summaries = {}        # union-find root -> cached hotspot dict
+        self._dirty = set()
+        self._next_cluster_id = 0
+        self._has_weather = False
+        self._inserts_since_reconcile = 0
+        self._last_reconcile = time.time()
+        self._generation += 1
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def insert(self, report):
+        """Insert one accident report and return the hotspots it changed"""
+        return self.insert_many([report])
+
+    def insert_many(self, reports):
+        """Insert several reports and return the hotspots they changed.
+
+        Every report is validated first, so a bad one leaves the engine
+        unchanged.
+        """
+        with self._lock:
+            points = [self._parse(report) for report in reports]
+            touched = set()
+            for point in points:
+                touched |= self._link(self._append_point(point))
+                self._inserts_since_reconcile += 1
+
+            if self._reconcile_due():
+                self._start_reconcile()
+
+            roots = {self._find(r) for r in touched}
+            return [self._summary(root) for root in sorted(roots, key=lambda r: self._cluster_ids[r])]
+
+    def load(self, accidents_df):
+        """Replace the point set with `accidents_df` and cluster it from scratch"""
+        with self._lock:
+            points = [self._parse(report) for report in accidents_df.to_dict('records')]
+
+        coords = np.radians(np.array([(p[0], p[1]) for p in points], dtype=float).reshape(-1, 2))
+        with self._reconcile_lock:
+            labels, counts = dbscan_graph(coords, self.eps, self.min_samples)
+            with self._lock:
+                self._reset(max(1024, len(points)))
+                for point in points:
+                    self._append_point(point)
+                self._apply_labels(len(points), labels, counts)
+                return self.hotspots()
+
+    def hotspots(self):
+        """Return summaries for every current hotspot"""
+        with self._lock:
+            roots = [r for r in self._stats if self._parent[r] == r]
+            return [self._summary(root) for root in sorted(roots, key=lambda r: self._cluster_ids[r])]
+
+    def cluster_sizes(self):
+        """Points per cluster id, with noise under -1 (like DBSCAN label counts)"""
+        with self._lock:
+            sizes = {self._cluster_ids[r]: stats['count'] for r, stats in self._stats.items() if self._parent[r] == r}
+            noise = self._size - sum(sizes.values())
+            if noise:
+                sizes[-1] = noise
+            return sizes
+
+    def reconcile(self):
+        """Re-run exact DBSCAN over all stored points and rebuild the clusters.
+
+        DBSCAN runs on a snapshot of the coordinates without holding the
+        engine lock, so inserts and readers carry on meanwhile; points
+        inserted during the run are then replayed incrementally on top of
+        the result. Returns False if `load` replaced the points meanwhile.
+        """
+        with self._reconcile_lock:
+            with self._lock:
+                generation, n = self._generation, self._size
+                coords = np.radians(np.column_stack([self._lat[:n], self._lng[:n]]))
+                self._last_reconcile = time.time()
+
+            labels, counts = dbscan_graph(coords, self.eps, self.min_samples)
+
+            with self._lock:
+                if generation != self._generation:
+                    return False
+                self._apply_labels(n, labels, counts)
+                return True
+
+    def _start_reconcile(self):
+        """Run `reconcile` on a background thread unless one is already running"""
+        if self._reconcile_thread is not None and self._reconcile_thread.is_alive():
+            return
+        self._last_reconcile = time.time()
+        self._reconcile_thread = threading.Thread(target=self.reconcile, name='hotspot-reconcile', daemon=True)
+        self._reconcile_thread.start()
+
+    def _apply_labels(self, n, labels, counts):
+        """Install DBSCAN results for the first `n` points and replay the rest"""
+        size = self._size
+        self._parent = [-1] * size
+        self._anchor = [-1] * size
+        self._neighbor_counts = counts.tolist() + [0] * (size - n)
+        self._stats = {}
+        self._cluster_ids = {}
+        self._summaries = {}
+        self._dirty = set()
+
+        roots = {}
+        for idx in np.flatnonzero(counts >= self.min_samples).tolist():
+            label = labels[idx]
+            if label not in roots:
+                roots[label] = idx
+                self._stats[idx] = self._empty_stats()
+                self._cluster_ids[idx] = int(label)
+                self._dirty.add(idx)
+            self._parent[idx] = roots[label]
+        self._next_cluster_id = len(roots)
+
+        for idx in np.flatnonzero(labels != -1).tolist():
+            root = roots[labels[idx]]
+            self._anchor[idx] = root
+            self._add_to_stats(self._stats[root], idx)
+
+        for idx in range(n, size):
+            self._link(idx)
+        self._inserts_since_reconcile = size - n
+        self.version += 1
+
+    # ------------------------------------------------------------------
+    # Incremental DBSCAN
+    # ------------------------------------------------------------------
+
+    def _link(self, idx):
+        """Update cluster membership for stored point `idx`; returns touched roots.
+
+        Only points up to `idx` are taken into account, so replaying stored
+        points in order reproduces their original insertion.
+        """
+        neighbors = self._neighbors(idx, idx)
+        self._neighbor_counts[idx] = len(neighbors)
+
+        new_cores = []
+        for q in neighbors:
+            if q == idx:
+                continue
+            self._neighbor_counts[q] += 1
+            if self._neighbor_counts[q] == self.min_samples:
+                new_cores.append(q)
+        if self._neighbor_counts[idx] >= self.min_samples:
+            new_cores.append(idx)
+
+        touched = set()
+        for core in new_cores:
+            touched.add(self._promote_core(core, idx, neighbors if core == idx else None))
+
+        # A non-core new point joins the cluster of any core within eps
+        if self._anchor[idx] == -1:
+            for q in neighbors:
+                if self._parent[q] != -1:
+                    root = self._find(q)
+                    self._attach(idx, q, root)
+                    touched.add(root)
+                    break
+
+        roots = {self._find(r) for r in touched}
+        self._dirty |= roots
+        if roots:
+            self.version += 1
+        return roots
+
+    def _promote_core(self, core, upto, neighbors=None):
+        """Turn `core` into a core point, merging and claiming its neighbourhood"""
+        if neighbors is None:
+            neighbors = self._neighbors(core, upto)
+
+        self._parent[core] = core
+        previous_root = self._find(self._anchor[core]) if self._anchor[core] != -1 else None
+        self._stats[core] = self._empty_stats()
+        self._cluster_ids[core] = self._next_cluster_id
+        self._next_cluster_id += 1
+        root = core
+
+        if previous_root is not None:
+            root = self._union(root, previous_root)
+        else:
+            self._anchor[core] = core
+            self._add_to_stats(self._stats[root], core)
+
+        for q in neighbors:
+            if q == core:
+                continue
+            if self._parent[q] != -1:
+                root = self._union(root, self._find(q))
+            elif self._anchor[q] == -1:
+                self._attach(q, core, root)
+
+        return root
+
+    def _attach(self, idx, core, root):
+        self._anchor[idx] = core
+        self._add_to_stats(self._stats[root], idx)
+
+    def _find(self, idx):
+        parent = self._parent
+        root = idx
+        while parent[root] != root:
+            root = parent[root]
+        while parent[idx] != root:
+            parent[idx], idx = root, parent[idx]
+        return root
+
+    def _union(self, a, b):
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return a
+
+        # Keep the larger cluster's id so established hotspots stay stable
+        if self._stats[a]['count'] < self._stats[b]['count']:
+            a, b = b, a
+        self._parent[b] = a
+        self._merge_stats(self._stats[a], self._stats.pop(b))
+        self._cluster_ids.pop(b)
+        self._summaries.pop(b, None)
+        self._dirty.discard(b)
+        self._dirty.add(a)
+        return a
+
+    def _reconcile_due(self):
+        if self.reconcile_every and self._inserts_since_reconcile >= self.reconcile_every:
+            return True
+        if self.reconcile_interval and time.time() - self._last_reconcile >= self.reconcile_interval:
+            return True
+        return False
+
+    # ------------------------------------------------------------------
+    # Neighbour index
+    # ------------------------------------------------------------------
+
+    def _parse(self, report):
+        """Validate and convert one report; raises before any state changes"""
+        lat = float(report['latitude'])
+        lng = float(report['longitude'])
+        if not (math.isfinite(lat) and math.isfinite(lng)):
+            raise ValueError(f'Invalid coordinates ({lat}, {lng})')
+        accident_time = local_naive(report.get('accident_time'))
+        weather = report.get('weather_condition')
+        weather = weather if isinstance(weather, str) else None
+
+        severity = self._severity_codes.get(report.get('severity'))
+        if severity is None:
+            severity = self._severity_codes[report.get('severity')] = len(self._severity_levels)
+            self._severity_levels.append(report.get('severity'))
+        weather_code = -1
+        if weather is not None:
+            weather_code = self._weather_codes.get(weather)
+            if weather_code is None:
+                weather_code = self._weather_codes[weather] = len(self._weather_levels)
+                self._weather_levels.append(weather)
+                self._weather_rainy.append('rain' in weather.lower())
+
+        lat_rad, lng_rad = math.radians(lat), math.radians(lng)
+        xyz = (math.cos(lat_rad) * math.cos(lng_rad), math.cos(lat_rad) * math.sin(lng_rad), math.sin(lat_rad))
+        timed = not pd.isna(accident_time)
+        return (
+            lat, lng, xyz,
+            accident_time.hour if timed else -1,
+            accident_time.dayofweek if timed else -1,
+            severity, weather_code,
+            accident_time.value if timed else _NAT,
+            'weather_condition' in report
+        )
+
+    def _append_point(self, point):
+        lat, lng, xyz, hour, dow, severity, weather, accident_time, has_weather = point
+        if self._size == len(self._lat):
+            for name, _, _ in self._COLUMNS:
+                column = getattr(self, name)
+                setattr(self, name, np.concatenate([column, np.empty_like(column)]))
+
+        idx = self._size
+        self._xyz[idx] = xyz
+        self._lat[idx] = lat
+        self._lng[idx] = lng
+        self._hour[idx] = hour
+        self._dow[idx] = dow
+        self._severity[idx] = severity
+        self._weather[idx] = weather
+        self._time[idx] = accident_time
+        self._has_weather = self._has_weather or has_weather
+        self._size += 1
+        self._grid.setdefault(self._cell(xyz), []).append(idx)
+
+        self._neighbor_counts.append(0)
+        self._parent.append(-1)
+        self._anchor.append(-1)
+        return idx
+
+    def _cell(self, xyz):
+        return tuple(int(math.floor(c / self._radius)) for c in xyz)
+
+    def _neighbors(self, idx, upto):
+        """Indices up to `upto` of stored points within eps of point `idx` (including itself)"""
+        cx, cy, cz = self._cell(self._xyz[idx])
+        candidates = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    candidates.extend(self._grid.get((cx + dx, cy + dy, cz + dz), ()))
+
+        candidates = np.asarray(candidates, dtype=np.intp)
+        candidates = candidates[candidates <= upto]
+        diff = self._xyz[candidates] - self._xyz[idx]
+        within = np.einsum('ij,ij->i', diff, diff) <= self._radius ** 2
+        return candidates[within].tolist()
+
+    # ------------------------------------------------------------------
+    # Cluster summaries
+    # ------------------------------------------------------------------
+
+    def _empty_stats(self):
+        return {
+            'count': 0,
+            'lat_sum': 0.0,
+            'lng_sum': 0.0,
+            'lat_min': math.inf,
+            'lat_max': -math.inf,
+            'lng_min': math.inf,
+            'lng_max': -math.inf,
+            'severity': Counter(),
+            'hours': np.zeros(24, dtype=np.int64),
+            'days': np.zeros(7, dtype=np.int64),
+            'day_first': np.full(7, np.iinfo(np.int64).max),
+            'weather': Counter(),
+            'weather_first': {},
+            'rainy': 0,
+            'last_accident': _NAT
+        }
+
+    def _add_to_stats(self, stats, idx):
+        lat, lng = float(self._lat[idx]), float(self._lng[idx])
+        stats['count'] += 1
+        stats['lat_sum'] += lat
+        stats['lng_sum'] += lng
+        stats['lat_min'] = min(stats['lat_min'], lat)
+        stats['lat_max'] = max(stats['lat_max'], lat)
+        stats['lng_min'] = min(stats['lng_min'], lng)
+        stats['lng_max'] = max(stats['lng_max'], lng)
+        stats['severity'][self._severity_levels[self._severity[idx]]] += 1
+        hour = self._hour[idx]
+        if hour >= 0:
+            dow = self._dow[idx]
+            stats['hours'][hour] += 1
+            stats['days'][dow] += 1
+            stats['day_first'][dow] = min(stats['day_first'][dow], idx)
+        weather = self._weather[idx]
+        if weather >= 0:
+            name = self._weather_levels[weather]
+            stats['weather'][name] += 1
+            stats['weather_first'][name] = min(stats['weather_first'].get(name, idx), idx)
+            if self._weather_rainy[weather]:
+                stats['rainy'] += 1
+        stats['last_accident'] = max(stats['last_accident'], int(self._time[idx]))
+
+    def _merge_stats(self, into, other):
+        into['count'] += other['count']
+        into['lat_sum'] += other['lat_sum']
+        into['lng_sum'] += other['lng_sum']
+        into['lat_min'] = min(into['lat_min'], other['lat_min'])
+        into['lat_max'] = max(into['lat_max'], other['lat_max'])
+        into['lng_min'] = min(into['lng_min'], other['lng_min'])
+        into['lng_max'] = max(into['lng_max'], other['lng_max'])
+        into['severity'].update(other['severity'])
+        into['hours'] += other['hours']
+        into['days'] += other['days']
+        np.minimum(into['day_first'], other['day_first'], out=into['day_first'])
+        into['weather'].update(other['weather'])
+        for weather, first in other['weather_first'].items():
+            into['weather_first'][weather] = min(into['weather_first'].get(weather, first), first)
+        into['rainy'] += other['rainy']
+        into['last_accident'] = max(into['last_accident'], other['last_accident'])
+
+    def _summary(self, root):
+        if root in self._dirty or root not in self._summaries:
+            stats = dict(self._stats[root])
+            if not self._has_weather:
+                stats['weather'] = None
+            last = stats['last_accident']
+            stats['last_accident'] = pd.Timestamp(last) if last != _NAT else pd.NaT
+            self._summaries[root] = self.detector._build_hotspot(self._cluster_ids[root], stats)
+            self._dirty.discard(root)
+        return self._summaries[root]
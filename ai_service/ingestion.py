@@ -0,0 +1,101 @@
+# ingestion.py
+import json
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.json as pa_json
+    HAS_PYARROW = True
+except Exception:
+    HAS_PYARROW = False
+
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+ARROW_FILE = 'application/vnd.apache.arrow.file'
+NDJSON = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+NDJSON_CHUNK_ROWS = 100_000
+
+# Read as text: pyarrow would otherwise parse ISO times itself and drop their offsets
+TEXT_TIME_COLUMNS = ('accident_time',)
+
+
+def read_accidents(req, key='accidents', source=None):
+    """Accident rows of a Flask request as a DataFrame, plus the request options.
+
+    Accepted bodies, by Content-Type:
+
+    - Arrow IPC (`application/vnd.apache.arrow.stream` or `.file`; needs
+      pyarrow): one table, converted to pandas column by column.
+    - NDJSON (`application/x-ndjson`): one accident per line, parsed
+      incrementally (pyarrow's columnar reader when installed, otherwise
+      pandas in chunks of NDJSON_CHUNK_ROWS lines).
+    - JSON: `{"columns": {name: [values]}}`, or the legacy `{key: [rows]}` or
+      bare `[rows]`.
+    - JSON `{"filter": {...}}` with an AccidentSource as `source`: the rows
+      are queried from the database instead of sent by the caller.
+
+    For JSON bodies the options are the remaining top-level fields; for the
+    binary and NDJSON bodies they come from the query string.
+    """
+    mimetype = req.mimetype
+    if mimetype in (ARROW_STREAM, ARROW_FILE):
+        return _read_arrow(req, mimetype == ARROW_STREAM), _query_options(req)
+    if mimetype in NDJSON:
+        return _read_ndjson(req.stream), _query_options(req)
+
+    data = req.get_json()
+    if isinstance(data, list):
+        return pd.DataFrame(data), {}
+    data = data or {}
+    options = {k: v for k, v in data.items() if k not in (key, 'columns', 'filter')}
+    if 'filter' in data and source is not None:
+        return source.query(data['filter']), options
+    if 'columns' in data:
+        return pd.DataFrame(data['columns']), options
+    return pd.DataFrame(data.get(key, [])), options
+
+
+def _require_pyarrow():
+    if not HAS_PYARROW:
+        raise RuntimeError('Arrow payloads need pyarrow installed')
+
+
+def _read_arrow(req, stream):
+    _require_pyarrow()
+    if stream:
+        table = pa.ipc.open_stream(req.stream).read_all()
+    else:
+        # The file format needs random access, so buffer the body
+        table = pa.ipc.open_file(pa.py_buffer(req.get_data())).read_all()
+    return _to_pandas(table)
+
+
+def _read_ndjson(stream):
+    if HAS_PYARROW:
+        schema = pa.schema([(name, pa.string()) for name in TEXT_TIME_COLUMNS])
+        table = pa_json.read_json(stream, parse_options=pa_json.ParseOptions(explicit_schema=schema))
+        # The explicit schema adds its columns even when no row has them
+        absent = [name for name in TEXT_TIME_COLUMNS if table.column(name).null_count == table.num_rows]
+        return _to_pandas(table.drop_columns(absent))
+
+    chunks = list(pd.read_json(stream, lines=True, chunksize=NDJSON_CHUNK_ROWS, convert_dates=False))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _to_pandas(table):
+    # Release Arrow buffers as columns are converted to keep peak memory down
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _query_options(req):
+    """Query-string options, with numbers and booleans decoded"""
+    options = {}
+    for name, value in req.args.items():
+        try:
+            options[name] = json.loads(value)
+        except ValueError:
+            options[name] = value
+    return options
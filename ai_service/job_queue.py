@@ -0,0 +1,151 @@
+# job_queue.py
+import hashlib
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+def job_key(kind, df=None, options=None):
+    """Dedup key for a job: its kind plus a hash of the input rows and options"""
+    digest = hashlib.sha1(kind.encode())
+    if df is not None and not df.empty:
+        digest.update(','.join(map(str, df.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    if options:
+        digest.update(json.dumps(options, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class JobQueue:
+    """In-process background jobs for slow AI work.
+
+    Jobs run on a thread pool of `max_workers`; the executor's queue holds
+    the backlog, so no external broker is needed. A job submitted with the
+    same `key` as one still queued or running is not started again: the
+    caller gets the existing job. Finished jobs (and their results) are kept
+    for `ttl` seconds, and at most `max_finished` of them. `error_status` is
+    the HTTP status to answer with if the job fails.
+    """
+
+    def __init__(self, max_workers=2, ttl=3600, max_finished=1000):
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.max_finished = max_finished
+        self._jobs = {}         # job id -> job dict, in submission order
+        self._active = {}       # dedup key -> id of the queued/running job
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def submit(self, kind, func, key=None, error_status=500):
+        """Queue `func()`; returns (job status dict, deduplicated)"""
+        with self._lock:
+            self._evict()
+            if key is not None and key in self._active:
+                return self._status(self._jobs[self._active[key]]), True
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'kind': kind,
+                'key': key,
+                'status': QUEUED,
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None,
+                'error_status': error_status
+            }
+            self._jobs[job['id']] = job
+            if key is not None:
+                self._active[key] = job['id']
+            status = self._status(job)
+
+        self._get_pool().submit(self._run, job, func)
+        return status, False
+
+    def status(self, job_id):
+        """Status dict of a job (without its result), or None if unknown or expired"""
+        with self._lock:
+            self._evict()
+            job = self._jobs.get(job_id)
+            return self._status(job) if job is not None else None
+
+    def result(self, job_id):
+        """(status dict, result); the result is None until the job has succeeded"""
+        with self._lock:
+            self._evict()
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None, None
+            return self._status(job), job['result']
+
+    def jobs(self, kind=None):
+        with self._lock:
+            self._evict()
+            return [self._status(j) for j in self._jobs.values() if kind is None or j['kind'] == kind]
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job has finished (for scripts and tests); returns its status"""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            status = self.status(job_id)
+            if status is None or status['status'] in (SUCCEEDED, FAILED):
+                return status
+            if deadline is not None and time.time() >= deadline:
+                return status
+            time.sleep(0.01)
+
+    def shutdown(self, wait=True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+    def _run(self, job, func):
+        with self._lock:
+            job['status'] = RUNNING
+            job['started_at'] = time.time()
+        try:
+            result, error, status = func(), None, SUCCEEDED
+        except Exception as e:
+            result, error, status = None, str(e), FAILED
+        with self._lock:
+            job.update(status=status, result=result, error=error, finished_at=time.time())
+            if self._active.get(job['key']) == job['id']:
+                del self._active[job['key']]
+
+    def _evict(self):
+        """Drop finished jobs older than `ttl`, then the oldest beyond `max_finished`"""
+        now = time.time()
+        finished = [j for j in self._jobs.values() if j['finished_at'] is not None]
+        expired = [j for j in finished if now - j['finished_at'] > self.ttl]
+        kept = len(finished) - len(expired)
+        if kept > self.max_finished:
+            alive = sorted((j for j in finished if now - j['finished_at'] <= self.ttl),
+                           key=lambda j: j['finished_at'])
+            expired.extend(alive[:kept - self.max_finished])
+        for job in expired:
+            del self._jobs[job['id']]
+
+    @staticmethod
+    def _status(job):
+        status = {k: v for k, v in job.items() if k not in ('key', 'result')}
+        if job['started_at'] is not None:
+            end = job['finished_at'] or time.time()
+            status['run_seconds'] = round(end - job['started_at'], 3)
+        return status
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+        return self._pool
@@ -0,0 +1,122 @@
+# model_registry.py
+import os
+import threading
+import time
+
+from severity_prediction import SeverityPredictor
+
+MODEL_FILES = ('severity_model.pkl', 'scaler.pkl', 'label_encoder.pkl', 'features.json')
+
+
+class ModelRegistry:
+    """Versioned severity models with warm-up and atomic hot-swap.
+
+    Layout under `root`:
+
+        models/
+            CURRENT                 # name of the active version
+            2024-06-01T02-00/       # one directory per version, as written
+            2024-06-02T02-00/       # by SeverityPredictor.save_model
+                severity_model.pkl, scaler.pkl, label_encoder.pkl, features.json
+
+    A flat `root` that holds the model files directly is served as version
+    "default". A swap replaces one reference, so requests that already hold
+    the previous predictor finish on it.
+    """
+
+    def __init__(self, root='models'):
+        self.root = root
+        self._lock = threading.Lock()
+        self._active = None  # (version, predictor, loaded_at)
+
+    @property
+    def version(self):
+        active = self._active
+        return active[0] if active is not None else None
+
+    def get(self):
+        """Active predictor; raises if no model has been loaded"""
+        active = self._active
+        if active is None:
+            raise RuntimeError('No severity model loaded')
+        return active[1]
+
+    def versions(self):
+        """Available model versions, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        found = sorted(
+            name for name in os.listdir(self.root)
+            if self._is_model_dir(os.path.join(self.root, name))
+        )
+        if not found and self._is_model_dir(self.root):
+            found = ['default']
+        return found
+
+    def current_version(self):
+        """Version named by CURRENT, else the newest available one"""
+        pointer = os.path.join(self.root, 'CURRENT')
+        if os.path.exists(pointer):
+            with open(pointer) as f:
+                version = f.read().strip()
+            if version:
+                return version
+
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def load(self, version=None):
+        """Load, warm up and activate `version` (default: current_version())"""
+        version = version or self.current_version()
+        if version is None:
+            raise RuntimeError(f'No model versions found in {self.root}')
+        if os.path.basename(version) != version or version in ('.', '..'):
+            raise ValueError(f'Invalid model version {version!r}')
+
+        path = self.root if version == 'default' else os.path.join(self.root, version)
+        if not self._is_model_dir(path):
+            raise RuntimeError(f'Model version {version} not found')
+
+        # Build and warm the new predictor outside the lock; serving continues on the old one
+        predictor = SeverityPredictor()
+        predictor.load_model(path)
+        self._warm_up(predictor)
+
+        with self._lock:
+            self._active = (version, predictor, time.time())
+        return version
+
+    def activate(self, version):
+        """Point CURRENT at `version` and hot-swap to it"""
+        loaded = self.load(version)
+
+        pointer = os.path.join(self.root, 'CURRENT')
+        tmp = f'{pointer}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(loaded)
+        os.replace(tmp, pointer)
+        return loaded
+
+    def reload_if_changed(self):
+        """Hot-swap when CURRENT names a version other than the active one"""
+        version = self.current_version()
+        if version is not None and version != self.version:
+            return self.load(version)
+        return self.version
+
+    def status(self):
+        active = self._active
+        return {
+            'active_version': active[0] if active else None,
+            'loaded_at': active[2] if active else None,
+            'available_versions': self.versions()
+        }
+
+    def _warm_up(self, predictor):
+        """Run one single-row and one small batch inference to build the fast path"""
+        predictor.predict({})
+        predictor.predict_batch([{}] * 8)
+
+    @staticmethod
+    def _is_model_dir(path):
+        return os.path.isdir(path) and all(os.path.exists(os.path.join(path, f)) for f in MODEL_FILES)
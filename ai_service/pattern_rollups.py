@@ -0,0 +1,151 @@
+# pattern_rollups.py
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from time_utils import local_naive, local_naive_times
+
+
+def _empty_counters():
+    return {'hour': [0] * 24, 'dow': [0] * 7, 'month': [0] * 12, 'severity': {}, 'total': 0}
+
+
+class PatternRollups:
+    """Running hour/day/month/severity counters for `/analyze-patterns`.
+
+    Counters are kept for all accidents and, when reports carry
+    `region_field`, per region. A report updates a fixed number of counters
+    and a query reads them directly, so neither depends on history size.
+    The counters are written to `path` as JSON every `save_every` updates or
+    `save_interval` seconds and reloaded on start; `rebuild` recomputes them
+    from a full accident DataFrame (e.g. the database). Times are counted in
+    local time (see `time_utils.local_naive`), so ingested ISO strings with
+    an offset land in the same bins as the naive times the database holds.
+    """
+
+    def __init__(self, path=os.path.join('ai_models', 'pattern_rollups.json'), region_field='district',
+                 save_every=500, save_interval=60):
+        self.path = path
+        self.region_field = region_field
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._scopes = {None: _empty_counters()}
+        self._unsaved = 0
+        self._saved_at = time.time()
+        self.load()
+
+    def add_many(self, reports):
+        """Count new report dicts into the rollups"""
+        with self._lock:
+            for report in reports:
+                self._add(report)
+            self._unsaved += len(reports)
+            if self._unsaved >= self.save_every or time.time() - self._saved_at >= self.save_interval:
+                self._save()
+
+    def rebuild(self, accidents_df):
+        """Replace all counters with ones computed from `accidents_df`"""
+        scopes = {None: self._count_frame(accidents_df)}
+        if self.region_field in accidents_df.columns:
+            regions = accidents_df[self.region_field]
+            for region, group in accidents_df[regions.notna()].groupby(regions.astype(str)):
+                scopes[region] = self._count_frame(group)
+
+        with self._lock:
+            self._scopes = scopes
+            self._save()
+        return scopes[None]['total']
+
+    def patterns(self, region=None):
+        """Counters for all accidents or one region, in the `/analyze-patterns` shape"""
+        with self._lock:
+            counters = self._scopes.get(region)
+            if counters is None:
+                return None
+            hourly = {h: c for h, c in enumerate(counters['hour']) if c}
+            daily = {d: c for d, c in enumerate(counters['dow']) if c}
+            monthly = {m + 1: c for m, c in enumerate(counters['month']) if c}
+            severity = dict(sorted(counters['severity'].items(), key=lambda item: -item[1]))
+            total = counters['total']
+
+        return {
+            'hourly': hourly,
+            'daily': daily,
+            'monthly': monthly,
+            'severity': severity,
+            'total_accidents': total,
+            'peak_hour': max(hourly, key=hourly.get) if hourly else None,
+            'peak_day': max(daily, key=daily.get) if daily else None
+        }
+
+    def regions(self):
+        with self._lock:
+            return sorted(r for r in self._scopes if r is not None)
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def load(self):
+        """Restore counters saved by a previous process, if any"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            saved = json.load(f)
+        scopes = {None: saved['all']}
+        scopes.update(saved.get('regions', {}))
+        with self._lock:
+            self._scopes = scopes
+        return True
+
+    def _add(self, report):
+        scopes = [self._scopes[None]]
+        region = report.get(self.region_field)
+        if region is not None and not pd.isna(region):
+            scopes.append(self._scopes.setdefault(str(region), _empty_counters()))
+
+        accident_time = local_naive(report.get('accident_time'))
+        severity = report.get('severity')
+        for counters in scopes:
+            counters['total'] += 1
+            if not pd.isna(accident_time):
+                counters['hour'][accident_time.hour] += 1
+                counters['dow'][accident_time.dayofweek] += 1
+                counters['month'][accident_time.month - 1] += 1
+            if severity is not None:
+                counters['severity'][severity] = counters['severity'].get(severity, 0) + 1
+
+    @staticmethod
+    def _count_frame(df):
+        counters = _empty_counters()
+        counters['total'] = len(df)
+        if df.empty:
+            return counters
+
+        times = local_naive_times(df['accident_time']).dropna()
+        counters['hour'] = np.bincount(times.dt.hour, minlength=24).tolist()
+        counters['dow'] = np.bincount(times.dt.dayofweek, minlength=7).tolist()
+        counters['month'] = np.bincount(times.dt.month - 1, minlength=12).tolist()
+        if 'severity' in df.columns:
+            counters['severity'] = {str(k): int(v) for k, v in df['severity'].value_counts().items()}
+        return counters
+
+    def _save(self):
+        self._unsaved = 0
+        self._saved_at = time.time()
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        document = {
+            'all': self._scopes[None],
+            'regions': {r: c for r, c in self._scopes.items() if r is not None}
+        }
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(document, f)
+        os.replace(tmp, self.path)
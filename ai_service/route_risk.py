@@ -0,0 +1,175 @@
+# route_risk.py
+import math
+
+import numpy as np
+
+from hotspot_index import EARTH_RADIUS_KM, RISK_LEVELS
+
+# Cumulative risk (hotspot risk score x km of exposure) that maps to ~63/100
+RISK_SCALE = 5.0
+
+
+def decode_polyline(encoded):
+    """Google encoded polyline -> (lats, lngs) arrays"""
+    values = []
+    index, length = 0, len(encoded)
+    while index < length:
+        result, shift = 0, 0
+        while True:
+            b = ord(encoded[index]) - 63
+            index += 1
+            result |= (b & 0x1F) << shift
+            shift += 5
+            if b < 0x20:
+                break
+        values.append(~(result >> 1) if result & 1 else result >> 1)
+
+    coords = np.cumsum(np.array(values, dtype=np.int64).reshape(-1, 2), axis=0) / 1e5
+    return coords[:, 0], coords[:, 1]
+
+
+def route_points(route):
+    """(lats, lngs) of a route given as an encoded polyline, a Google Directions
+    route, `{"polyline": ...}`, `{"points": [...]}` or a list of points.
+
+    Points may be `[lat, lng]` pairs or `{"lat", "lng"}` dicts.
+    """
+    if isinstance(route, str):
+        return decode_polyline(route)
+    if isinstance(route, dict):
+        if 'overview_polyline' in route:
+            return decode_polyline(route['overview_polyline']['points'])
+        if 'polyline' in route:
+            polyline = route['polyline']
+            return decode_polyline(polyline['points'] if isinstance(polyline, dict) else polyline)
+        route = route['points']
+
+    if route and isinstance(route[0], dict):
+        coords = np.array([[p['lat'], p['lng']] for p in route], dtype=float)
+    else:
+        coords = np.array(route, dtype=float).reshape(-1, 2)
+    return coords[:, 0], coords[:, 1]
+
+
+def segment_lengths_km(lats, lngs):
+    """Length of each polyline segment (equirectangular; segments are short)"""
+    lat_rad = np.radians(lats)
+    dlat = np.diff(lat_rad)
+    dlng = np.diff(np.radians(lngs)) * np.cos((lat_rad[1:] + lat_rad[:-1]) / 2)
+    return np.hypot(dlat, dlng) * EARTH_RADIUS_KM
+
+
+def densify(lats, lngs, step_km):
+    """Points every `step_km` or closer along a polyline.
+
+    Returns (lats, lngs, segment, weight_km): the original segment each
+    point lies on and the route length it stands for (the final point,
+    which stands for none, weighs 0).
+    """
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    if lats.size < 2:
+        return lats, lngs, np.zeros(lats.size, dtype=np.intp), np.zeros(lats.size)
+
+    lengths = segment_lengths_km(lats, lngs)
+    steps = np.maximum(1, np.ceil(lengths / step_km)).astype(np.intp)
+    segment = np.repeat(np.arange(len(steps)), steps)
+    starts = np.cumsum(steps) - steps
+    t = (np.arange(len(segment)) - starts[segment]) / steps[segment]
+
+    dense_lats = np.append(lats[segment] + t * np.diff(lats)[segment], lats[-1])
+    dense_lngs = np.append(lngs[segment] + t * np.diff(lngs)[segment], lngs[-1])
+    weights = np.append((lengths / steps)[segment], 0.0)
+    return dense_lats, dense_lngs, np.append(segment, len(steps) - 1), weights
+
+
+class RouteRiskScorer:
+    """Score candidate routes against a HotspotIndex.
+
+    Every route is densified to a point at least every `step_km`, and the
+    points of all routes go through one `query_radius_many` call. Each
+    (point, hotspot) pair within `radius_km` adds the hotspot's risk score
+    x proximity (1 at the centre, 0 at the radius) x the route length the
+    point stands for, so a route's cumulative risk is in risk-score-km.
+    Polyline segments passing hotspots are reported merged into runs.
+    """
+
+    def __init__(self, index, radius_km=0.5, step_km=0.05):
+        self.index = index
+        self.radius_km = radius_km
+        self.step_km = step_km
+
+    def score(self, routes):
+        """Risk summary for each route (see `route_points` for route formats)"""
+        points = [route_points(route) for route in routes]
+        dense = [densify(lats, lngs, self.step_km) for lats, lngs in points]
+        sizes = np.array([len(d[0]) for d in dense], dtype=np.intp)
+        route_of = np.repeat(np.arange(len(dense)), sizes)
+        lats = np.concatenate([d[0] for d in dense]) if dense else np.empty(0)
+        lngs = np.concatenate([d[1] for d in dense]) if dense else np.empty(0)
+        segment = np.concatenate([d[2] for d in dense]) if dense else np.empty(0, dtype=np.intp)
+        weight = np.concatenate([d[3] for d in dense]) if dense else np.empty(0)
+
+        point_idx, hotspot_idx, distances = self.index.query_radius_many(lats, lngs, self.radius_km)
+        risk_scores, risk_levels = self.index.risk_scores()
+        pair_route = route_of[point_idx]
+        contribution = risk_scores[hotspot_idx] * (1 - distances / self.radius_km) * weight[point_idx]
+        cumulative = np.bincount(pair_route, weights=contribution, minlength=len(routes))
+
+        results = []
+        for r, (route_lats, route_lngs) in enumerate(points):
+            in_route = pair_route == r
+            hotspots = np.unique(hotspot_idx[in_route])
+            length_km = float(segment_lengths_km(route_lats, route_lngs).sum()) if len(route_lats) > 1 else 0.0
+            results.append({
+                'cumulative_risk': round(float(cumulative[r]), 4),
+                'risk_per_km': round(float(cumulative[r]) / length_km, 4) if length_km else 0.0,
+                'overall_risk_score': round(100 * (1 - math.exp(-cumulative[r] / RISK_SCALE)), 2),
+                'distance_km': round(length_km, 3),
+                'points': int(len(route_lats)),
+                'hotspots': [self._hotspot_summary(h) for h in hotspots],
+                'offending_segments': self._segments(
+                    route_lats, route_lngs, segment[point_idx[in_route]], hotspot_idx[in_route],
+                    risk_levels, risk_scores
+                )
+            })
+        return results
+
+    def _hotspot_summary(self, h):
+        hotspot = self.index.hotspots[h]
+        return {
+            'cluster_id': hotspot.get('cluster_id'),
+            'center': hotspot['center'],
+            'risk_level': hotspot.get('risk_level'),
+            'risk_score': hotspot.get('risk_score'),
+            'total_accidents': hotspot.get('total_accidents')
+        }
+
+    def _segments(self, lats, lngs, segments, hotspot_idx, risk_levels, risk_scores):
+        """Runs of consecutive polyline segments that pass hotspots"""
+        if len(segments) == 0 or len(lats) < 2:
+            return []
+        order = np.lexsort((hotspot_idx, segments))
+        segments, hotspot_idx = segments[order], hotspot_idx[order]
+        distinct = np.unique(segments)
+        run_starts = distinct[np.r_[True, np.diff(distinct) != 1]]
+        run_of_pair = np.searchsorted(run_starts, segments, side='right') - 1
+        lengths = segment_lengths_km(lats, lngs)
+
+        runs = []
+        for k, start in enumerate(run_starts):
+            in_run = run_of_pair == k
+            run_segments = np.unique(segments[in_run])
+            end = int(run_segments[-1])
+            hotspots = np.unique(hotspot_idx[in_run])
+            runs.append({
+                'start_index': int(start),
+                'end_index': end + 1,
+                'start': {'lat': float(lats[start]), 'lng': float(lngs[start])},
+                'end': {'lat': float(lats[end + 1]), 'lng': float(lngs[end + 1])},
+                'length_km': round(float(lengths[start:end + 1].sum()), 3),
+                'hotspot_ids': [self.index.hotspots[h].get('cluster_id') for h in hotspots],
+                'risk_level': RISK_LEVELS[int(risk_levels[hotspots].max())],
+                'max_risk_score': float(risk_scores[hotspots].max())
+            })
+        return runs
@@ -7,6 +7,7 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 import joblib
 import json
+import threading
 
 class SeverityPredictor:
     def __init__(self):
@@ -17,9 +18,16 @@ class SeverityPredictor:
                         'is_rainy', 'is_night', 'is_weekend',
                         'location_cluster', 'previous_accidents_count',
                         'road_type', 'speed_limit']
+        self.location_model = None
+        self.fit_times = {}
+        self._fast_path = None
+        self._local = threading.local()
         
-    def load_training_data(self, db_connection):
-        """Load historical accident data from database"""
+    def load_training_data(self, db_connection, chunksize=None):
+        """Load historical accident data from database.
+
+        With `chunksize`, returns an iterator of DataFrames instead of one frame.
+        """
         query = """
         SELECT EXTRACT(HOUR FROM accident_time) as hour_of_day,
                EXTRACT(DOW FROM accident_time) as day_of_week,
@@ -32,16 +40,24 @@ class SeverityPredictor:
         FROM accident_reports
         WHERE severity IS NOT NULL
         """
-        df = pd.read_sql(query, db_connection)
+        df = pd.read_sql(query, db_connection, chunksize=chunksize)
         return df
     
-    def preprocess_data(self, df):
-        """Preprocess and feature engineering"""
+    def preprocess_data(self, df, location_model=None):
+        """Preprocess and feature engineering
+
+        Pass a fitted `location_model` (KMeans) to reuse it instead of
+        re-clustering the coordinates.
+        """
         # Add location clustering
         from sklearn.cluster import KMeans
         coords = df[['latitude', 'longitude']].fillna(0)
-        kmeans = KMeans(n_clusters=50, random_state=42)
-        df['location_cluster'] = kmeans.fit_predict(coords)
+        if location_model is None:
+            location_model = KMeans(n_clusters=50, random_state=42)
+            df['location_cluster'] = location_model.fit_predict(coords)
+        else:
+            df['location_cluster'] = location_model.predict(coords)
+        self.location_model = location_model
         
         # Add previous accidents count per location
         df['previous_accidents_count'] = df.groupby('location_cluster').cumcount()
@@ -58,24 +74,42 @@ class SeverityPredictor:
         
         return X_scaled, y, df
     
-    def train_model(self, X, y):
-        """Train ensemble model"""
+    def train_model(self, X, y, n_jobs=None):
+        """Train ensemble model
+
+        The forest builds its trees on `n_jobs` cores while the logistic
+        regression fits alongside it on a separate thread. Fixed seeds keep
+        results reproducible. Per-member fit times go to `self.fit_times`.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        import time
+        
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
-        # Train Random Forest
-        rf_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        rf_model.fit(X_train, y_train)
-        
-        # Train Logistic Regression
+        rf_model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=n_jobs)
         lr_model = LogisticRegression(max_iter=1000, random_state=42)
-        lr_model.fit(X_train, y_train)
+        
+        def timed_fit(model):
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            return time.perf_counter() - start
+        
+        # Train Random Forest and Logistic Regression concurrently
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            rf_future = pool.submit(timed_fit, rf_model)
+            lr_future = pool.submit(timed_fit, lr_model)
+            self.fit_times = {
+                'random_forest': rf_future.result(),
+                'logistic_regression': lr_future.result()
+            }
         
         # Create ensemble (simple averaging)
         self.model = {
             'random_forest': rf_model,
             'logistic_regression': lr_model
         }
+        self._fast_path = None
         
         # Evaluate
         rf_score = rf_model.score(X_test, y_test)
@@ -88,23 +122,14 @@ class SeverityPredictor:
     
     def predict(self, features_dict):
         """Predict severity for new accident"""
-        # Convert input to dataframe
-        input_df = pd.DataFrame([features_dict])
-        
-        # Ensure all features are present
-        for feature in self.features:
-            if feature not in input_df.columns:
-                input_df[feature] = 0
-        
-        # Scale features
-        input_scaled = self.scaler.transform(input_df[self.features])
+        if self._fast_path is None:
+            self._build_fast_path()
         
-        # Get predictions from both models
-        rf_pred = self.model['random_forest'].predict_proba(input_scaled)
-        lr_pred = self.model['logistic_regression'].predict_proba(input_scaled)
+        # Raw feature row in `self.features` order; missing features are 0
+        row = self._feature_row(features_dict)
         
-        # Average probabilities
-        avg_proba = (rf_pred + lr_pred) / 2
+        # Scaling happens inside the fast path, so the raw row goes straight in
+        avg_proba = self._ensemble_proba(row)
         
         # Get predicted class and confidence
         predicted_class = np.argmax(avg_proba[0])
@@ -122,6 +147,149 @@ class SeverityPredictor:
             }
         }
     
+    def predict_batch(self, features, chunk_size=4096):
+        """Predict severity for many accidents.
+
+        `features` is either a list of feature dicts or a columnar dict of
+        {feature: list of values}. Rows are scored `chunk_size` at a time, so
+        each ensemble member runs once per chunk and the working arrays stay
+        bounded. Returns one result per row, shaped like `predict`.
+        """
+        if self._fast_path is None:
+            self._build_fast_path()
+        
+        results = []
+        for X in self._iter_feature_chunks(features, chunk_size):
+            avg_proba = self._ensemble_proba(X)
+            predicted = np.argmax(avg_proba, axis=1)
+            severities = self.label_encoder.inverse_transform(predicted)
+            confidences = avg_proba.max(axis=1)
+            
+            for severity, confidence, proba in zip(severities, confidences.tolist(), avg_proba.tolist()):
+                results.append({
+                    'severity': severity,
+                    'confidence': confidence,
+                    'probabilities': {
+                        'minor': proba[0],
+                        'major': proba[1],
+                        'dangerous': proba[2]
+                    }
+                })
+        return results
+    
+    def _iter_feature_chunks(self, features, chunk_size):
+        """Yield raw feature matrices of at most `chunk_size` rows"""
+        index = self._fast_path['index']
+        
+        if isinstance(features, dict):
+            lengths = {len(values) for values in features.values()}
+            if len(lengths) > 1:
+                raise ValueError('All feature columns must have the same length')
+            n_rows = lengths.pop() if lengths else 0
+            columns = [(index[name], values) for name, values in features.items() if name in index]
+            
+            for start in range(0, n_rows, chunk_size):
+                stop = min(start + chunk_size, n_rows)
+                X = np.zeros((stop - start, len(self.features)))
+                for i, values in columns:
+                    X[:, i] = values[start:stop]
+                yield X
+        else:
+            for start in range(0, len(features), chunk_size):
+                chunk = features[start:start + chunk_size]
+                X = np.zeros((len(chunk), len(self.features)))
+                for r, row in enumerate(chunk):
+                    for name, value in row.items():
+                        i = index.get(name)
+                        if i is not None:
+                            X[r, i] = value
+                yield X
+    
+    def _build_fast_path(self):
+        """Prepare plain NumPy arrays for low-latency inference.
+
+        The scaler is folded into the logistic regression
+        (w' = w / scale, b' = b - w' . mean). Forest split thresholds are
+        not folded: a threshold can sit exactly on a scaled float32 value,
+        so the raw row is scaled with the same arithmetic as
+        StandardScaler.transform instead. Leaf values are pre-normalised
+        to probabilities so each tree is a single `apply` plus a lookup.
+        """
+        if self.model is None:
+            raise RuntimeError('Model is not loaded')
+        
+        n_features = len(self.features)
+        mean = getattr(self.scaler, 'mean_', None)
+        scale = getattr(self.scaler, 'scale_', None)
+        mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=float)
+        scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=float)
+        
+        lr = self.model['logistic_regression']
+        coef = lr.coef_ / scale
+        intercept = lr.intercept_ - coef @ mean
+        if coef.shape[0] == 1:
+            lr_mode = 'binary'
+        elif getattr(lr, 'multi_class', 'auto') == 'ovr' or lr.solver == 'liblinear':
+            lr_mode = 'ovr'
+        else:
+            lr_mode = 'multinomial'
+        
+        trees = []
+        for estimator in self.model['random_forest'].estimators_:
+            tree = estimator.tree_
+            value = tree.value[:, 0, :]
+            leaf_proba = value / np.maximum(value.sum(axis=1, keepdims=True), np.finfo(float).tiny)
+            trees.append((tree, leaf_proba))
+        
+        self._fast_path = {
+            'index': {name: i for i, name in enumerate(self.features)},
+            'mean': mean,
+            'scale': scale,
+            'coef': coef.T.copy(),
+            'intercept': intercept,
+            'lr_mode': lr_mode,
+            'trees': trees
+        }
+    
+    def _feature_row(self, features_dict):
+        """Write `features_dict` into this thread's preallocated feature row"""
+        row = getattr(self._local, 'row', None)
+        if row is None or row.shape[1] != len(self.features):
+            row = self._local.row = np.zeros((1, len(self.features)))
+        else:
+            row.fill(0)
+        
+        index = self._fast_path['index']
+        for name, value in features_dict.items():
+            i = index.get(name)
+            if i is not None:
+                row[0, i] = value
+        return row
+    
+    def _ensemble_proba(self, X):
+        """Average of forest and logistic regression probabilities on raw features"""
+        fast = self._fast_path
+        
+        X32 = np.ascontiguousarray((X - fast['mean']) / fast['scale'], dtype=np.float32)
+        rf_proba = 0
+        for tree, leaf_proba in fast['trees']:
+            rf_proba = rf_proba + leaf_proba[tree.apply(X32)]
+        rf_proba = rf_proba / len(fast['trees'])
+        
+        decision = X @ fast['coef'] + fast['intercept']
+        if fast['lr_mode'] == 'binary':
+            p = 1 / (1 + np.exp(-decision))
+            lr_proba = np.hstack([1 - p, p])
+        elif fast['lr_mode'] == 'ovr':
+            p = 1 / (1 + np.exp(-decision))
+            lr_proba = p / p.sum(axis=1, keepdims=True)
+        else:
+            decision = decision - decision.max(axis=1, keepdims=True)
+            exp = np.exp(decision)
+            lr_proba = exp / exp.sum(axis=1, keepdims=True)
+        
+        return (rf_proba + lr_proba) / 2
+    
     def save_model(self, path='models/'):
         """Save trained model and preprocessing objects"""
         import os
@@ -143,3 +311,5 @@ class SeverityPredictor:
         
         with open(f'{path}/features.json', 'r') as f:
             self.features = json.load(f)
+        
+        self._build_fast_path()
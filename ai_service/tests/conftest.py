@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Service modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_accidents(n, seed=0, centers=20):
+    """Synthetic accidents around `centers` points in Colombo, about 20% noise"""
+    rng = np.random.default_rng(seed)
+    hubs = rng.uniform([6.8, 79.8], [7.0, 80.0], (centers, 2))
+    points = hubs[rng.integers(0, centers, n)] + rng.normal(0, 0.003, (n, 2))
+    noise = rng.random(n) < 0.2
+    points[noise] = rng.uniform([6.8, 79.8], [7.0, 80.0], (noise.sum(), 2))
+    times = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, n), unit='s')
+    return pd.DataFrame({
+        'id': np.arange(n),
+        'latitude': points[:, 0],
+        'longitude': points[:, 1],
+        'accident_time': times.astype(str),
+        'severity': rng.choice(['minor', 'major', 'dangerous'], n),
+        'weather_condition': rng.choice(['clear', 'rain', 'light rain', 'fog'], n)
+    })
+
+
+def make_training_rows(n=300, seed=0):
+    """Synthetic rows with the load_training_data columns"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'hour_of_day': rng.integers(0, 24, n),
+        'day_of_week': rng.integers(0, 7, n),
+        'month': rng.integers(1, 13, n),
+        'is_rainy': rng.integers(0, 2, n),
+        'is_night': rng.integers(0, 2, n),
+        'is_weekend': rng.integers(0, 2, n),
+        'road_type': rng.integers(0, 3, n),
+        'speed_limit': rng.choice([40, 60, 80], n),
+        'latitude': rng.uniform(6.8, 7.0, n),
+        'longitude': rng.uniform(79.8, 80.0, n),
+        'severity': rng.choice(['minor', 'major', 'dangerous'], n)
+    })
+
+
+@pytest.fixture
+def accidents():
+    return make_accidents
+
+
+@pytest.fixture(scope='session')
+def training_rows():
+    return make_training_rows
+
+
+@pytest.fixture
+def local_zone(monkeypatch):
+    """Set the process time zone (e.g. 'Asia/Colombo') for one test"""
+    def set_zone(zone):
+        monkeypatch.setenv('TZ', zone)
+        time.tzset()
+    yield set_zone
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.fixture(scope='session')
+def service(tmp_path_factory):
+    """The ai_service module, with every on-disk path under a temporary directory"""
+    root = tmp_path_factory.mktemp('ai_service')
+    os.environ.pop('DATABASE_URL', None)
+    os.environ.update({
+        'MODEL_DIR': str(root / 'models'),
+        'FORECAST_CACHE_DIR': str(root / 'forecasts'),
+        'FORECAST_STORE_DIR': str(root / 'forecast_store'),
+        'PATTERN_ROLLUPS_PATH': str(root / 'pattern_rollups.json'),
+        'FACILITY_SNAPSHOT': str(root / 'emergency_facilities.json')
+    })
+    import ai_service
+    return ai_service
+
+
+@pytest.fixture
+def client(service):
+    return service.app.test_client()
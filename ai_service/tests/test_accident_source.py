@@ -0,0 +1,143 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from accident_source import AccidentSource, parse_bbox, parse_filter
+
+
+class _Cursor:
+    def __init__(self, rows, log):
+        self.rows = list(rows)
+        self.log = log
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        self.log.append((sql, params))
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+
+class _Connection:
+    closed = False
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self, name=None):
+        assert name and name.startswith('accidents_')
+        return _Cursor(self.pool.rows, self.pool.executed)
+
+    def rollback(self):
+        pass
+
+
+class _Pool:
+    """Stands in for ThreadedConnectionPool; every connection serves `rows`"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+        self.returned = 0
+
+    def getconn(self):
+        return _Connection(self)
+
+    def putconn(self, conn, close=False):
+        self.returned += 1
+
+
+@pytest.mark.parametrize('payload', [
+    {'start': 'not a date'},
+    {'end': '2024-13-01'},
+    {'start': '2024-02-01', 'end': '2024-01-01'},
+    {'severity': 'fatal'},
+    {'severity': ['minor', 'catastrophic']},
+    {'bbox': [79.8, 6.8, 80.0]},
+    {'bbox': [79.8, -91, 80.0, 7.0]},
+    {'bbox': {'min_lat': 6.8, 'min_lng': 79.8, 'max_lat': 7.0, 'max_lng': 181}},
+    {'bbox': [80.0, 6.8, 79.8, 7.0]},
+    {'bbox': [79.8, float('nan'), 80.0, 7.0]},
+    {'limit': 0},
+    {'limit': 'ten'},
+])
+def test_invalid_filters_raise_value_error(payload):
+    with pytest.raises(ValueError):
+        parse_filter(payload)
+
+
+def test_filter_sql_and_parameters():
+    where, params, limit = parse_filter({
+        'start': '2024-01-01',
+        'end': '2024-02-01T00:00:00',
+        'bbox': {'min_lat': 6.8, 'min_lng': 79.8, 'max_lat': 7.0, 'max_lng': 80.0},
+        'severity': 'dangerous',
+        'limit': '500'
+    })
+    assert where == ('latitude IS NOT NULL AND longitude IS NOT NULL AND accident_time >= %s AND accident_time < %s'
+                     ' AND location && ST_MakeEnvelope(%s, %s, %s, %s, 4326)::geography AND severity = ANY(%s)')
+    assert params == [datetime(2024, 1, 1), datetime(2024, 2, 1), 79.8, 6.8, 80.0, 7.0, ['dangerous']]
+    assert limit == 500
+    assert parse_filter(None) == ('latitude IS NOT NULL AND longitude IS NOT NULL', [], None)
+    assert parse_bbox([79.8, 6.8, 80.0, 7.0]) == (79.8, 6.8, 80.0, 7.0)
+
+
+def test_offset_times_are_filtered_in_local_time(local_zone):
+    local_zone('Asia/Colombo')
+    _, params, _ = parse_filter({'start': '2024-01-01T00:00:00Z'})
+    assert params == [datetime(2024, 1, 1, 5, 30)]
+
+
+def test_query_executes_the_parameterised_sql_and_builds_columns():
+    rows = [
+        (1, 6.9, 79.9, 1_704_067_200_000_000, 'minor', 'clear'),
+        (2, 6.91, 79.91, 1_704_070_800_000_000, 'dangerous', None),
+        (3, 6.92, 79.92, 1_704_074_400_000_000, 'major', 'rain'),
+    ]
+    source = AccidentSource('postgresql://stub', batch_size=2)
+    source._pool = _Pool(rows)
+
+    df = source.query({'severity': ['minor', 'dangerous'], 'limit': 10})
+    (sql, params), = source._pool.executed
+    assert sql == """
+SELECT id,
+       latitude::float8,
+       longitude::float8,
+       (EXTRACT(EPOCH FROM accident_time) * 1000000)::bigint AS accident_time_us,
+       severity,
+       weather_condition
+FROM accident_reports
+WHERE latitude IS NOT NULL AND longitude IS NOT NULL AND severity = ANY(%s)
+ORDER BY accident_time
+LIMIT %s"""
+    assert params == (['minor', 'dangerous'], 10)
+    assert source._pool.returned == 1
+
+    assert df['id'].tolist() == [1, 2, 3] and df['latitude'].dtype == float
+    assert df['accident_time'].tolist() == [pd.Timestamp('2024-01-01 00:00'), pd.Timestamp('2024-01-01 01:00'),
+                                            pd.Timestamp('2024-01-01 02:00')]
+    assert df['weather_condition'].isna().tolist() == [False, True, False]
+
+
+def test_query_without_rows_returns_typed_empty_columns():
+    source = AccidentSource('postgresql://stub')
+    source._pool = _Pool([])
+    df = source.query()
+    assert len(df) == 0
+    assert list(df.columns) == ['id', 'latitude', 'longitude', 'accident_time', 'severity', 'weather_condition']
+    assert df['id'].dtype == np.int64 and str(df['accident_time'].dtype).startswith('datetime64')
+    assert source._pool.executed[0][0].rstrip().endswith('ORDER BY accident_time')
+
+
+def test_missing_dsn_is_reported(monkeypatch):
+    monkeypatch.delenv('DATABASE_URL', raising=False)
+    with pytest.raises(RuntimeError, match='DATABASE_URL'):
+        AccidentSource().query()
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+from alert_engine import AlertEngine
+from hotspot_index import HotspotIndex
+
+
+def _hotspots(n=300, seed=3):
+    """Hotspots packed into a few kilometres, with varied risk patterns"""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform([6.90, 79.85], [6.95, 79.90], size=(n, 2))
+    return [{
+        'cluster_id': i,
+        'center': {'lat': float(lat), 'lng': float(lng)},
+        'risk_level': str(rng.choice(['low', 'medium', 'high'])),
+        'total_accidents': int(rng.integers(3, 30)),
+        'severity_distribution': {'minor': 2, 'major': 1, 'dangerous': int(rng.integers(0, 3))},
+        'time_patterns': {'peak_hours': rng.choice(24, 3, replace=False).tolist(),
+                          'is_night_hotspot': bool(rng.random() < 0.3)},
+        'weather_patterns': {'most_common_weather': str(rng.choice(['rain', 'light rain', 'clear', 'fog']))}
+    } for i, (lat, lng) in enumerate(centers)]
+
+
+def _positions(n=200, seed=4):
+    rng = np.random.default_rng(seed)
+    return rng.uniform([6.895, 79.845], [6.955, 79.905], size=(n, 2))
+
+
+def test_radius_queries_match_a_haversine_scan():
+    hotspots = _hotspots()
+    index = HotspotIndex(hotspots)
+    engine = AlertEngine(hotspots, index=index)
+    lats, lngs = _positions().T
+
+    point_idx, hotspot_idx, distances = index.query_radius_many(lats, lngs, 0.5)
+    assert len(np.unique(point_idx)) > 50
+    for p, (lat, lng) in enumerate(zip(lats, lngs)):
+        scan = [(h, engine._calculate_distance(lat, lng, hs['center']['lat'], hs['center']['lng']))
+                for h, hs in enumerate(hotspots)]
+        expected = [(h, d) for h, d in scan if d <= 0.5]
+        nearby, nearby_distances = index.query_radius(lat, lng, 0.5)
+        assert nearby.tolist() == [h for h, _ in expected]
+        assert np.allclose(nearby_distances, [d for _, d in expected], rtol=1e-9, atol=1e-12)
+
+        mine = point_idx == p
+        assert hotspot_idx[mine].tolist() == nearby.tolist()
+        assert np.allclose(distances[mine], nearby_distances)
+
+
+def test_empty_index_returns_no_neighbours():
+    index = HotspotIndex([])
+    assert len(index.query_radius(6.9, 79.9, 0.5)[0]) == 0
+    assert all(len(a) == 0 for a in index.query_radius_many([6.9], [79.9], 0.5))
+
+
+def test_check_alerts_rejects_missing_coordinates(client):
+    response = client.post('/check-alerts', json={'latitude': 6.9, 'hotspots': _hotspots(5)})
+    assert response.status_code == 400 and 'error' in response.get_json()
+
+
+def test_check_alerts_with_a_versioned_hotspot_list(client):
+    hotspots = _hotspots()
+    hotspots[0]['time_patterns']['peak_hours'] = [8]
+    center = hotspots[0]['center']
+    payload = {'latitude': center['lat'], 'longitude': center['lng'], 'timestamp': '2030-01-01T08:00:00',
+               'weather': {'condition': 'rain'}, 'hotspots': hotspots}
+    unversioned = client.post('/check-alerts', json=payload).get_json()
+    versioned = client.post('/check-alerts', json={**payload, 'hotspots_version': 'test-v1'}).get_json()
+    assert versioned['hotspots_version'] == 'test-v1'
+    assert [a['hotspot_id'] for a in versioned['alerts']] == [a['hotspot_id'] for a in unversioned['alerts']]
+    assert 0 in [a['hotspot_id'] for a in versioned['alerts']]
+
+
+def _without_validity(alerts):
+    return [{k: v for k, v in alert.items() if k != 'valid_until'} for alert in alerts]
+
+
+def test_batch_checks_match_single_checks():
+    hotspots = _hotspots()
+    engine = AlertEngine(None, {'condition': 'clear'}, index=HotspotIndex(hotspots))
+    positions = _positions()
+    rng = np.random.default_rng(5)
+    device_ids = [f'device-{i}' for i in range(len(positions))]
+    timestamps = [f'2030-01-0{1 + i % 7}T{h:02d}:15:00' for i, h in enumerate(rng.integers(0, 24, len(positions)))]
+    weathers = [rng.choice([None, 'rain', {'condition': 'Light Rain'}, {'condition': 'fog'}]) for _ in positions]
+
+    batch = engine.check_locations_batch(device_ids, positions[:, 0], positions[:, 1], timestamps, weathers)
+    alerted = 0
+    for device_id, (lat, lng), ts, weather in zip(device_ids, positions, timestamps, weathers):
+        if isinstance(weather, str):
+            weather = {'condition': weather}
+        single = engine.check_user_location(lat, lng, pd.Timestamp(ts).to_pydatetime(), weather)
+        assert _without_validity(batch[device_id]) == _without_validity(single)
+        alerted += bool(single)
+    assert alerted > 20
+
+
+def test_check_alerts_batch_rejects_bad_payloads(client):
+    mismatched = client.post('/check-alerts/batch', json={'device_id': ['a', 'b'], 'latitude': [6.9], 'longitude': [79.9]})
+    assert mismatched.status_code == 400 and not mismatched.get_json()['success']
+
+    missing = client.post('/check-alerts/batch', json={'locations': [{'device_id': 'a', 'latitude': 6.9}]})
+    assert missing.status_code == 400 and not missing.get_json()['success']
+
+    empty = client.post('/check-alerts/batch', json={'locations': []})
+    assert empty.get_json()['success'] and empty.get_json()['positions_checked'] == 0
+
+
+def test_night_risk_covers_the_hours_after_midnight():
+    hotspot, = _hotspots(1)
+    hotspot['time_patterns'] = {'peak_hours': [12], 'is_night_hotspot': True}
+    hotspot['weather_patterns'] = {'most_common_weather': 'fog'}
+    engine = AlertEngine(None, {'condition': 'clear'}, index=HotspotIndex([hotspot]))
+    lat, lng = hotspot['center']['lat'], hotspot['center']['lng']
+
+    for hour, night in [(3, True), (6, True), (7, False), (17, False), (18, True), (23, True)]:
+        risk = engine._check_risk_conditions(hotspot, hour, {'condition': 'fog'})
+        assert risk['is_night_risk'] is night and risk['risk_score'] == 2 + night
+        batch = engine.check_locations_batch(['d'], [lat], [lng], [f'2030-01-01T{hour:02d}:30:00'], ['fog'])
+        assert ('nighttime risk area' in batch['d'][0]['message']) is night
@@ -0,0 +1,91 @@
+from alert_engine import AlertEngine
+from alert_sessions import AlertSessionStore
+from hotspot_index import HotspotIndex
+from hotspot_store import HotspotStore
+
+
+def _hotspot(cluster_id, lat, lng, total=20):
+    return {
+        'cluster_id': cluster_id,
+        'center': {'lat': lat, 'lng': lng},
+        'risk_level': 'high',
+        'total_accidents': total,
+        'severity_distribution': {'dangerous': 2},
+        'time_patterns': {'peak_hours': [8], 'is_night_hotspot': False},
+        'weather_patterns': {'most_common_weather': 'rain'}
+    }
+
+
+def _ping(sessions, index, lat, lng, hour=8):
+    engine = AlertEngine(None, {'condition': 'rain'}, index=index)
+    return sessions.check('device', lat, lng, lambda: engine.check_user_location(lat, lng),
+                          hour=hour, weather='rain', version=index.alert_version())
+
+
+def test_renumbered_hotspots_do_not_re_enter_or_exit():
+    sessions = AlertSessionStore()
+    first = _ping(sessions, HotspotIndex([_hotspot(0, 6.9, 79.9), _hotspot(1, 6.95, 79.95)], version=1), 6.9001, 79.9)
+    assert first['evaluated'] and [a['hotspot_id'] for a in first['entered']] == [0]
+
+    # A reconcile swaps the cluster ids and a new report nudges the centre
+    index = HotspotIndex([_hotspot(0, 6.95, 79.95), _hotspot(1, 6.90002, 79.9, total=21)], version=2)
+    moved = _ping(sessions, index, 6.9006, 79.9)
+    assert moved['evaluated']
+    assert moved['entered'] == [] and moved['exited'] == []
+    assert [a['hotspot_id'] for a in moved['active']] == [0]
+
+    left = _ping(sessions, index, 6.95, 79.95)
+    assert [a['hotspot_id'] for a in left['entered']] == [0] and left['exited'] == [0]
+
+
+def test_count_only_changes_do_not_trigger_re_evaluation():
+    sessions = AlertSessionStore()
+    before = HotspotIndex([_hotspot(0, 6.9, 79.9)], version=1)
+    after = HotspotIndex([_hotspot(0, 6.9, 79.9, total=25)], version=2)
+    assert before.alert_version() == after.alert_version()
+
+    _ping(sessions, before, 6.9001, 79.9)
+    assert not _ping(sessions, after, 6.9001, 79.9)['evaluated']
+    assert _ping(sessions, after, 6.9001, 79.9, hour=9)['evaluated']
+
+
+
+def test_expired_alerts_refresh_inside_the_hotspot_and_exit_outside():
+    sessions = AlertSessionStore()
+    index = HotspotIndex([_hotspot(0, 6.9, 79.9), _hotspot(1, 6.95, 79.95)], version=1)
+    first = _ping(sessions, index, 6.9001, 79.9)
+    alert, = first['entered']
+
+    def expire():
+        for active in sessions._sessions['device']['active']:
+            active['valid_until'] = '2000-01-01T00:00:00'
+
+    expire()
+    still_inside = _ping(sessions, index, 6.9001, 79.9)
+    assert still_inside['evaluated'] and still_inside['entered'] == [] and still_inside['exited'] == []
+    refreshed, = still_inside['refreshed']
+    assert refreshed['hotspot_id'] == alert['hotspot_id'] and refreshed['valid_until'] > alert['valid_until']
+    assert still_inside['active'] == [refreshed]
+    assert not _ping(sessions, index, 6.9001, 79.9)['evaluated']
+
+    expire()
+    outside = _ping(sessions, index, 6.92, 79.92)
+    assert outside['exited'] == [0] and outside['entered'] == [] and outside['refreshed'] == []
+    assert outside['active'] == []
+
+
+def test_real_time_endpoint_reads_offsets_as_local_time(service, client, local_zone, monkeypatch):
+    local_zone('Asia/Colombo')
+    hotspot = _hotspot(0, 6.9, 79.9)
+    hotspot['time_patterns']['peak_hours'] = [13]
+    monkeypatch.setattr(service, 'hotspot_store', HotspotStore(lambda: ('test', [hotspot]), ttl=None))
+    response = client.post('/alerts/real-time', json={
+        'device_id': 'offset-device',
+        'location': {'lat': 6.9001, 'lng': 79.9},
+        'conditions': {'timestamp': '2030-01-01T07:30:00Z', 'weather': 'clear'}
+    })
+    service.alert_sessions.end('offset-device')
+    body = response.get_json()
+    # 07:30 UTC is 13:00 in Colombo, the hotspot's peak hour
+    assert body['success'] and body['alert_triggered']
+    assert body['alert']['hotspot_id'] == 0
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from bulk_forecasting import BulkForecaster, ForecastStore
+
+
+def _dense_accidents(regions=3, days=90, per_day=20, seed=0):
+    """Every region has accidents on every day, so the counts frame is one dense block"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for region in range(regions):
+        for day in pd.date_range('2024-01-01', periods=days, freq='D'):
+            for _ in range(rng.integers(1, per_day)):
+                rows.append({
+                    'district': f'district-{region}',
+                    'latitude': 6.9 + 0.1 * region + rng.normal(0, 0.001),
+                    'longitude': 79.9 + rng.normal(0, 0.001),
+                    'accident_time': day + pd.Timedelta(hours=int(rng.integers(0, 24)))
+                })
+    return pd.DataFrame(rows)
+
+
+def _forecaster(tmp_path):
+    return BulkForecaster(ForecastStore(str(tmp_path)), min_prophet_days=10 ** 6)
+
+
+def test_dense_region_day_matrix(tmp_path):
+    df = _dense_accidents()
+    summary = _forecaster(tmp_path).run(df, group_by='district', periods=7)
+    assert summary['regions'] == 3
+
+    document = ForecastStore(str(tmp_path)).load('district')
+    assert sorted(document['regions']) == ['district-0', 'district-1', 'district-2']
+    for region, forecast in document['regions'].items():
+        assert forecast['observed_days'] == 90
+        assert forecast['total_accidents'] == int((df['district'] == region).sum())
+        assert len(forecast['forecast']) == 7
+
+
+def test_grid_regions_skip_missing_coordinates(tmp_path):
+    df = _dense_accidents(regions=2, days=30)
+    df.loc[df.index[::7], 'latitude'] = np.nan
+    df.loc[df.index[1::11], 'longitude'] = None
+
+    regions = BulkForecaster._regions(df, 'grid', 0.01, None)
+    assert regions[df['latitude'].isna() | df['longitude'].isna()].isna().all()
+    assert not any('nan' in str(region) for region in regions.dropna())
+
+    _forecaster(tmp_path).run(df, group_by='grid', periods=3)
+    document = ForecastStore(str(tmp_path)).load('grid')
+    valid = df.dropna(subset=['latitude', 'longitude'])
+    assert sum(r['total_accidents'] for r in document['regions'].values()) == len(valid)
@@ -0,0 +1,81 @@
+import io
+import zipfile
+
+import piexif
+from PIL import Image
+
+import exif_gps_extractor
+from exif_cache import ExifResultCache
+from exif_gps_extractor import ExifGPSExtractor
+
+
+def _jpeg(color=(200, 0, 0), lat=(6, 55, 30), lng=(79, 51, 15)):
+    gps = {
+        piexif.GPSIFD.GPSLatitudeRef: 'N',
+        piexif.GPSIFD.GPSLatitude: tuple((v, 1) for v in lat),
+        piexif.GPSIFD.GPSLongitudeRef: 'E',
+        piexif.GPSIFD.GPSLongitude: tuple((v, 1) for v in lng)
+    }
+    out = io.BytesIO()
+    Image.new('RGB', (32, 32), color).save(out, 'JPEG', exif=piexif.dump({'GPS': gps}))
+    return out.getvalue()
+
+
+class CountingStream(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def test_gps_from_jpeg_bytes():
+    result = ExifGPSExtractor().extract_gps_bytes(_jpeg())
+    assert result['has_gps'] and result['verified']
+    assert round(result['latitude'], 4) == 6.925 and round(result['longitude'], 4) == 79.8542
+
+
+def test_cache_key_covers_image_size():
+    extractor = ExifGPSExtractor(cache=ExifResultCache())
+    small, large = _jpeg(), _jpeg() + b'\0' * 100
+    extractor.extract_gps_bytes(small)
+    extractor.extract_gps_bytes(large)
+    extractor.extract_gps_bytes(small)
+    assert extractor.cache.stats()['entries'] == 2
+    assert (extractor.cache.hits, extractor.cache.misses) == (1, 2)
+
+
+def test_non_jpeg_input_is_read_up_to_the_cap():
+    stream = CountingStream(b'II*\0' + b'\0' * (4 * exif_gps_extractor.MAX_METADATA_READ))
+    result = ExifGPSExtractor().extract_gps_bytes(stream)
+    assert not result['has_gps']
+    assert stream.bytes_read <= exif_gps_extractor.MAX_METADATA_READ + 4
+
+
+def test_batch_endpoint_reads_archives(client):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr('a.jpg', _jpeg())
+        zf.writestr('b.jpg', _jpeg(color=(0, 0, 200)))
+    response = client.post('/extract-exif/batch', data={'archive': (io.BytesIO(archive.getvalue()), 'photos.zip')})
+    body = response.get_json()
+    assert response.status_code == 200 and body['count'] == 2
+    assert all(r['gps_data']['has_gps'] for r in body['results'])
+
+
+def test_batch_endpoint_rejects_oversized_archive_members(service, client, monkeypatch):
+    monkeypatch.setattr(service, 'MAX_ARCHIVE_MEMBER_BYTES', 1024)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('bomb.jpg', b'\0' * (1024 * 1024))
+    response = client.post('/extract-exif/batch', data={'archive': (io.BytesIO(archive.getvalue()), 'photos.zip')})
+    assert response.status_code == 400
+    assert 'bomb.jpg' in response.get_json()['error']
+
+
+def test_batch_endpoint_without_images(client):
+    response = client.post('/extract-exif/batch', json={'images': []})
+    assert response.status_code == 400 and response.get_json()['success'] is False
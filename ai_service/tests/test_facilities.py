@@ -0,0 +1,122 @@
+import json
+
+import pytest
+
+from facility_index import FacilityIndex
+from google_maps_integration import GoogleMapsIntegration, TTLCache, geohash
+
+FACILITIES = [
+    {'id': 1, 'name': 'National Hospital', 'service_type': 'hospital', 'latitude': 6.9175, 'longitude': 79.8654},
+    {'id': 2, 'name': 'Borella Police', 'service_type': 'police', 'latitude': 6.9147, 'longitude': 79.8778},
+    {'id': 3, 'name': 'Lady Ridgeway', 'service_type': 'hospital', 'latitude': 6.9194, 'longitude': 79.8753},
+    {'id': 4, 'name': 'Kandy General', 'service_type': 'hospital', 'latitude': 7.2868, 'longitude': 80.6317},
+    {'id': 5, 'name': 'No position', 'service_type': 'fire', 'latitude': None, 'longitude': None}
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / 'facilities.json'
+    path.write_text(json.dumps({'facilities': FACILITIES}))
+    return FacilityIndex(str(path), refresh_interval=0)
+
+
+class StandInClient:
+    """Records calls made through GoogleMapsIntegration"""
+
+    def __init__(self):
+        self.calls = []
+
+    def places_nearby(self, location, radius, type):
+        self.calls.append(('places', location, radius))
+        return {'results': [{'place_id': 'p1', 'name': 'Stand-in Hospital', 'vicinity': 'Colombo',
+                             'geometry': {'location': {'lat': location[0], 'lng': location[1]}}}]}
+
+    def directions(self, origin, destination, alternatives=True):
+        self.calls.append(('directions', origin, destination))
+        return [{'summary': 'A1'}]
+
+
+def test_empty_index(tmp_path):
+    index = FacilityIndex(str(tmp_path / 'missing.json'))
+    assert len(index) == 0
+    assert index.nearest(6.9, 79.9) == []
+
+
+def test_nearest_orders_by_distance_and_skips_unpositioned(index):
+    results = index.nearest(6.9170, 79.8660, k=10)
+    assert [f['id'] for f in results] == [1, 3, 2, 4]
+    assert results[0]['distance_km'] < results[1]['distance_km']
+    assert len(index) == 4
+
+
+def test_radius_and_service_type_filters(index):
+    assert [f['id'] for f in index.nearest(6.9170, 79.8660, k=10, radius_km=2)] == [1, 3, 2]
+    assert [f['id'] for f in index.nearest(6.9170, 79.8660, k=10, service_type='hospital')] == [1, 3, 4]
+    assert [f['id'] for f in index.nearest(6.9170, 79.8660, k=10, radius_km=2, service_type='police')] == [2]
+    assert index.nearest(6.9170, 79.8660, service_type='ambulance') == []
+
+
+def test_k_bounds(index):
+    assert len(index.nearest(6.9170, 79.8660, k=1)) == 1
+    assert len(index.nearest(6.9170, 79.8660, k=100)) == 4
+    with pytest.raises(ValueError):
+        index.nearest(6.9170, 79.8660, k=0)
+
+
+def test_index_reloads_when_the_snapshot_changes(index):
+    assert len(index) == 4
+    with open(index.path, 'w') as f:
+        json.dump(FACILITIES[:2], f)
+    assert index.refresh() == 2
+    assert [f['id'] for f in index.nearest(6.9170, 79.8660)] == [1, 2]
+
+
+def test_maps_responses_are_cached_by_geohash_cell():
+    client = StandInClient()
+    maps = GoogleMapsIntegration(client=client)
+    first = maps.nearby_emergency({'lat': 6.91750, 'lng': 79.86540})
+    # ~10 m away: same precision-6 cell
+    second = maps.nearby_emergency({'lat': 6.91755, 'lng': 79.86545})
+    assert first is second and len(client.calls) == 1
+
+    maps.nearby_emergency({'lat': 7.2868, 'lng': 80.6317})
+    maps.directions({'lat': 6.9, 'lng': 79.9}, {'lat': 7.0, 'lng': 80.0})
+    maps.directions({'lat': 6.9, 'lng': 79.9}, {'lat': 7.0, 'lng': 80.0})
+    assert [call[0] for call in client.calls] == ['places', 'places', 'directions']
+    assert maps.cache.stats() == {'entries': 3, 'hits': 2, 'misses': 3}
+
+
+def test_geohash_and_ttl_cache():
+    assert geohash(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+    cache = TTLCache(max_entries=2, ttl=0)
+    cache.put('a', 1)
+    assert cache.get('a') is None
+    cache = TTLCache(max_entries=2, ttl=60)
+    for key in 'abc':
+        cache.put(key, key)
+    assert cache.get('a') is None and cache.get('c') == 'c'
+
+
+def test_nearby_emergency_endpoint(service, client, index, monkeypatch):
+    monkeypatch.setattr(service, 'facility_index', index)
+    response = client.post('/navigation/nearby-emergency', json={
+        'location': {'lat': 6.9170, 'lng': 79.8660}, 'radius_meters': 2000, 'limit': 2, 'service_type': 'hospital'
+    })
+    body = response.get_json()
+    assert response.status_code == 200 and body['source'] == 'local_index'
+    assert [f['id'] for f in body['results']] == [1, 3]
+
+    response = client.post('/navigation/nearby-emergency', json={'location': {'lat': 6.9, 'lng': 79.9}, 'limit': 0})
+    assert response.status_code == 400
+    response = client.post('/navigation/nearby-emergency', json={'location': {'lat': 6.9}})
+    assert response.status_code == 400
+
+
+def test_nearby_emergency_falls_back_to_places(service, client, tmp_path, monkeypatch):
+    monkeypatch.setattr(service, 'facility_index', FacilityIndex(str(tmp_path / 'missing.json')))
+    monkeypatch.setattr(service, 'maps_client', GoogleMapsIntegration(client=StandInClient()))
+    response = client.post('/navigation/nearby-emergency', json={'location': {'lat': 6.9, 'lng': 79.9}})
+    body = response.get_json()
+    assert response.status_code == 200 and body['source'] == 'google_places'
+    assert body['results'][0]['name'] == 'Stand-in Hospital'
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import forecast_cache
+from forecast_cache import ForecastCache
+
+
+class _Forecaster:
+    """Stand-in for AccidentForecaster that counts fits"""
+    fits = 0
+    fail = False
+
+    def __init__(self, model_path=None):
+        self.model_path = model_path
+
+    def fit(self, df):
+        type(self).fits += 1
+        time.sleep(0.05)
+        if type(self).fail:
+            raise ValueError('fit failed')
+
+    def predict(self, periods=7, freq='D'):
+        return pd.DataFrame({'ds': pd.date_range('2030-01-01', periods=periods, freq=freq), 'yhat': 1.0})
+
+    def save(self):
+        pass
+
+    def load(self):
+        return False
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(_Forecaster, 'fits', 0)
+    monkeypatch.setattr(_Forecaster, 'fail', False)
+    monkeypatch.setattr(forecast_cache, 'AccidentForecaster', _Forecaster)
+    return ForecastCache(cache_dir=str(tmp_path))
+
+
+def _series(n=30):
+    return pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=n), 'y': range(n)})
+
+
+def test_concurrent_identical_requests_fit_once(cache):
+    df = _series()
+    threads = [threading.Thread(target=cache.forecast, args=(df, 7)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert _Forecaster.fits == 1
+    assert cache._key_locks == {}
+    assert cache.forecast(df, 7)[1] is True
+
+
+def test_failed_fits_do_not_leak_key_locks(cache):
+    _Forecaster.fail = True
+    for n in range(20, 25):
+        with pytest.raises(ValueError):
+            cache.forecast(_series(n), 7)
+    assert cache._key_locks == {} and cache._entries == {}
+
+
+def test_service_keeps_fitted_models_in_forecast_cache_dir(service, client, accidents, monkeypatch):
+    paths = []
+    monkeypatch.setattr(_Forecaster, 'save', lambda self: paths.append(self.model_path))
+    monkeypatch.setattr(forecast_cache, 'AccidentForecaster', _Forecaster)
+    df = accidents(60)
+    df['accident_time'] = df['accident_time'].astype(str)
+
+    response = client.post('/forecast-accidents', json={'accidents': df.to_dict('records'), 'periods': 3})
+    assert response.status_code == 200 and len(response.get_json()['forecast']) == 3
+    path, = paths
+    assert os.path.dirname(path) == service.forecast_cache.cache_dir == os.environ['FORECAST_CACHE_DIR']
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from heatmap_tiles import HeatmapTiles, aggregate_cells, cell_records
+
+
+def _grid_reference(df, grid_size):
+    """The groupby `/heatmap-data` used before the tiles existed"""
+    df = df.copy()
+    df['lat_bin'] = (df['latitude'] // grid_size * grid_size).astype(float)
+    df['lng_bin'] = (df['longitude'] // grid_size * grid_size).astype(float)
+    cells = df.groupby(['lat_bin', 'lng_bin']).agg({
+        'id': 'count',
+        'severity': lambda x: (x == 'dangerous').sum()
+    }).reset_index()
+    cells.columns = ['latitude', 'longitude', 'incident_count', 'dangerous_count']
+    cells['intensity'] = (cells['incident_count'] / df.shape[0] * 100).round(2)
+    cells['danger_percentage'] = (cells['dangerous_count'] / cells['incident_count'] * 100).round(2)
+    return cells.to_dict('records')
+
+
+def _cells(df, grid_size):
+    dangerous = (df['severity'] == 'dangerous').to_numpy()
+    aggregated = aggregate_cells(df['latitude'].to_numpy(dtype=float), df['longitude'].to_numpy(dtype=float),
+                                 dangerous, grid_size)
+    return cell_records(*aggregated, grid_size, total=len(df))
+
+
+@pytest.mark.parametrize('grid_size', [0.1, 0.01, 0.002, 0.001])
+def test_cell_records_match_the_groupby_grid(accidents, grid_size):
+    df = accidents(2000)
+    assert _cells(df, grid_size) == _grid_reference(df, grid_size)
+
+
+def test_every_level_answers_like_the_grid(accidents):
+    df = accidents(1500)
+    tiles = HeatmapTiles()
+    assert tiles.load(df) == len(df)
+    for level in tiles.levels:
+        grid_size, cells, total = tiles.query(grid_size=level)
+        assert grid_size == level and total == len(df)
+        assert cells == _grid_reference(df, level)
+
+
+def test_incremental_adds_match_a_load(accidents):
+    df = accidents(600)
+    reports = df.to_dict('records')
+    reports[5]['latitude'] = None
+    reports[300]['longitude'] = float('nan')
+
+    loaded = HeatmapTiles()
+    loaded.load(pd.DataFrame(reports))
+    added = HeatmapTiles()
+    # Single reports and small batches take the pure-Python path, larger ones the NumPy one
+    for start, stop in [(0, 1), (1, 10), (10, 26), (26, 400), (400, 600)]:
+        added.add_many(reports[start:stop])
+
+    assert added.total == loaded.total == 598
+    for level in loaded.levels:
+        assert added.query(grid_size=level) == loaded.query(grid_size=level)
+
+
+def test_viewport_and_level_selection(accidents):
+    df = accidents(1000)
+    tiles = HeatmapTiles()
+    tiles.load(df)
+
+    bounds = (79.853, 6.853, 79.897, 6.897)  # min_lng, min_lat, max_lng, max_lat
+    _, cells, total = tiles.query(bounds, grid_size=0.01)
+    inside = [c for c in _grid_reference(df, 0.01)
+              if c['latitude'] + 0.01 > 6.853 and c['latitude'] <= 6.897 and
+              c['longitude'] + 0.01 > 79.853 and c['longitude'] <= 79.897]
+    assert [(c['latitude'], c['longitude'], c['incident_count']) for c in cells] == \
+           [(c['latitude'], c['longitude'], c['incident_count']) for c in inside]
+    assert total == sum(c['incident_count'] for c in inside)
+
+    assert tiles.level_for(grid_size=0.011) == 0.01
+    assert tiles.level_for(zoom=12) == 0.005
+    with pytest.raises(ValueError):
+        tiles.level_for(grid_size=0)
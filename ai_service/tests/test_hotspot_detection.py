@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import _legacy_summaries, synthetic_accidents
+from hotspot_detection import HotspotDetector
+
+
+def test_grouped_summaries_match_the_per_cluster_loop():
+    detector = HotspotDetector()
+    df, labels = synthetic_accidents(3000, n_clusters=40)
+    grouped = detector._summarize_clusters(df.copy(), labels)
+    legacy = _legacy_summaries(detector, df.copy(), labels)
+    assert json.dumps(grouped, sort_keys=True, default=str) == json.dumps(legacy, sort_keys=True, default=str)
+
+
+def test_night_window_wraps_past_midnight():
+    detector = HotspotDetector()
+    hours = np.zeros(24, dtype=np.int64)
+    hours[[22, 23, 0, 3]] = 5
+    hours[12] = 4
+    patterns = detector._time_patterns_from_histograms(hours, np.ones(7))
+    assert patterns['is_night_hotspot']
+
+    hours[12] = 40
+    assert not detector._time_patterns_from_histograms(hours, np.ones(7))['is_night_hotspot']
+
+
+def test_detected_night_hotspot_gets_lighting_recommendation():
+    times = pd.Timestamp('2024-03-01 23:15') + pd.to_timedelta(np.arange(6) * 30, unit='min')
+    df = pd.DataFrame({
+        'latitude': 6.9 + np.arange(6) * 1e-5,
+        'longitude': 79.9 + np.arange(6) * 1e-5,
+        'accident_time': times.astype(str),
+        'severity': 'major',
+        'weather_condition': 'clear'
+    })
+    hotspot, = HotspotDetector(eps=0.0002).detect_hotspots(df)
+    assert hotspot['time_patterns']['is_night_hotspot']
+    assert 'Improve street lighting' in hotspot['recommendations']
+
+
+def test_detect_hotspots_job_leaves_the_shared_detector_alone(service, client, accidents):
+    service.hotspot_detector.hotspots = ['untouched']
+    rows = accidents(400).to_dict('records')
+
+    sync = client.post('/detect-hotspots', json={'accidents': rows}).get_json()
+    submitted = client.post('/detect-hotspots', json={'accidents': rows, 'async': True})
+    assert submitted.status_code == 202
+    job_id = submitted.get_json()['job']['id']
+    service.job_queue.wait(job_id, timeout=30)
+
+    result = client.get(f'/jobs/{job_id}/result').get_json()
+    assert result == sync and len(sync) > 0
+    assert service.hotspot_detector.hotspots == ['untouched']
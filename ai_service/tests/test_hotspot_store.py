@@ -0,0 +1,84 @@
+import pandas as pd
+
+from hotspot_index import HotspotIndex
+from hotspot_store import HotspotStore, _hotspot_from_row, engine_source
+from incremental_hotspots import IncrementalHotspotEngine
+
+
+def _hotspot(cluster_id, lat, lng, risk_score=3.0):
+    return {'cluster_id': cluster_id, 'center': {'lat': lat, 'lng': lng}, 'risk_level': 'medium', 'risk_score': risk_score}
+
+
+def test_store_reloads_only_when_the_version_changes():
+    state = {'version': 1, 'loads': 0}
+
+    def loader():
+        state['loads'] += 1
+        return state['version'], [_hotspot(0, 6.9, 79.9)]
+
+    store = HotspotStore(loader, version_source=lambda: state['version'], ttl=None)
+    first = store.get()
+    assert store.get() is first and state['loads'] == 1
+
+    state['version'] = 2
+    second = store.get()
+    assert second is not first and second.version == 2 and state['loads'] == 2
+    # Snapshots already handed out are left alone
+    assert first.version == 1 and len(first) == 1
+
+
+def test_store_without_version_source_uses_the_ttl():
+    loads = []
+    store = HotspotStore(lambda: (len(loads), loads.append(1) or []), ttl=0)
+    store.get()
+    store.get()
+    assert len(loads) == 2
+
+    store = HotspotStore(lambda: (len(loads), loads.append(1) or []), ttl=3600)
+    store.get()
+    store.get()
+    assert len(loads) == 3
+    assert store.refresh().version == 3
+
+
+def test_engine_source_follows_engine_inserts(accidents):
+    engine = IncrementalHotspotEngine(eps=0.0002, reconcile_every=0, reconcile_interval=0)
+    store = HotspotStore(*engine_source(engine), ttl=None)
+    assert len(store.get()) == 0
+
+    engine.load(accidents(500))
+    index = store.get()
+    assert index.version == engine.version and len(index) == len(engine.hotspots()) > 0
+
+
+def test_null_severity_score_scores_as_zero():
+    row = (7, 6.9, 79.9, None, None, None, '{"peak_hours": [8]}', None)
+    hotspot = _hotspot_from_row(row)
+    assert hotspot['risk_score'] == 0.0 and hotspot['risk_level'] == 'low'
+
+    index = HotspotIndex([hotspot, _hotspot(1, 6.91, 79.91, risk_score=None), _hotspot(2, 6.92, 79.92)])
+    scores, levels = index.risk_scores()
+    assert scores.tolist() == [0.0, 0.0, 3.0]
+    assert levels.tolist() == [0, 1, 1]
+
+
+def test_seeded_state_serves_check_alerts_and_tiles(service, client, accidents, monkeypatch):
+    df = accidents(800)
+    monkeypatch.setattr(service.accident_source, 'query', lambda filters=None: df.copy())
+    result = service.seed_live_state()
+    assert result['total_hotspots'] > 0 and result['total_incidents'] == len(df)
+
+    hotspot = service.hotspot_engine.hotspots()[0]
+    hour = hotspot['time_patterns']['peak_hours'][0]
+    response = client.post('/check-alerts', json={
+        'latitude': hotspot['center']['lat'],
+        'longitude': hotspot['center']['lng'],
+        'timestamp': pd.Timestamp('2024-06-03').replace(hour=hour).isoformat(),
+        'weather': {'condition': hotspot['weather_patterns']['most_common_weather']}
+    })
+    assert response.status_code == 200
+    assert response.get_json()['hotspots_version'] == service.hotspot_engine.version
+    assert any(alert['hotspot_id'] == hotspot['cluster_id'] for alert in response.get_json()['alerts'])
+
+    tiles = client.get('/heatmap/tiles', query_string={'grid_size': 0.01}).get_json()
+    assert tiles['total_incidents'] == len(df)
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hotspot_detection import HotspotDetector
+from incremental_hotspots import IncrementalHotspotEngine, dbscan_graph
+
+EPS = 0.0002
+
+
+def _normalized(hotspots):
+    """Hotspots by cluster id, centres rounded past float summation noise"""
+    return sorted(
+        ({**h, 'center': {k: round(float(v), 9) for k, v in h['center'].items()}} for h in hotspots),
+        key=lambda h: h['cluster_id']
+    )
+
+
+def _engine(**kwargs):
+    return IncrementalHotspotEngine(eps=EPS, reconcile_every=0, reconcile_interval=0, **kwargs)
+
+
+def test_dbscan_graph_matches_dbscan(accidents):
+    from sklearn.cluster import DBSCAN
+
+    coords = np.radians(accidents(1000)[['latitude', 'longitude']].to_numpy())
+    labels, counts = dbscan_graph(coords, EPS, 3)
+    expected = DBSCAN(eps=EPS, min_samples=3, metric='haversine').fit(coords)
+    np.testing.assert_array_equal(labels, expected.labels_)
+    np.testing.assert_array_equal(np.flatnonzero(counts >= 3), expected.core_sample_indices_)
+
+
+def test_load_matches_batch_detection(accidents):
+    df = accidents(1500)
+    batch = HotspotDetector(eps=EPS).detect_hotspots(df.copy(), mode='exact')
+    assert _normalized(_engine().load(df)) == _normalized(batch)
+
+
+def test_incremental_inserts_match_batch_cluster_sizes(accidents):
+    df = accidents(1500)
+    engine = _engine()
+    engine.insert_many(df.to_dict('records'))
+
+    labels = HotspotDetector(eps=EPS).cluster(np.radians(df[['latitude', 'longitude']].to_numpy()))
+    assert sorted(engine.cluster_sizes().values()) == sorted(pd.Series(labels).value_counts().tolist())
+
+    assert engine.reconcile()
+    batch = HotspotDetector(eps=EPS).detect_hotspots(df.copy(), mode='exact')
+    assert _normalized(engine.hotspots()) == _normalized(batch)
+
+
+def test_reconcile_replays_points_inserted_after_the_snapshot(accidents):
+    df = accidents(1200)
+    expected = _engine()
+    expected.load(df.iloc[:800])
+    expected.insert_many(df.iloc[800:].to_dict('records'))
+
+    engine = _engine()
+    engine.insert_many(df.iloc[:800].to_dict('records'))
+    labels, counts = dbscan_graph(np.radians(df[['latitude', 'longitude']].to_numpy()[:800]), EPS, 3)
+    engine.insert_many(df.iloc[800:].to_dict('records'))
+    with engine._lock:
+        engine._apply_labels(800, labels, counts)
+
+    assert engine.hotspots() == expected.hotspots()
+    assert engine.cluster_sizes() == expected.cluster_sizes()
+
+
+def test_periodic_reconcile_runs_in_the_background(accidents):
+    df = accidents(1000)
+    engine = IncrementalHotspotEngine(eps=EPS, reconcile_every=300, reconcile_interval=0)
+    records = df.to_dict('records')
+    for start in range(0, len(records), 100):
+        engine.insert_many(records[start:start + 100])
+    engine._reconcile_thread.join()
+    engine.reconcile()
+
+    batch = HotspotDetector(eps=EPS).detect_hotspots(df.copy(), mode='exact')
+    assert _normalized(engine.hotspots()) == _normalized(batch)
+
+
+@pytest.mark.parametrize('zone, expected', [('UTC', '2030-01-01T04:30:00'), ('Asia/Colombo', '2030-01-01T10:00:00')])
+def test_offset_times_are_stored_as_local_time(accidents, local_zone, zone, expected):
+    local_zone(zone)
+    df = accidents(300)
+    engine = _engine()
+    engine.load(df)
+
+    report = df.iloc[0].to_dict()
+    report['accident_time'] = '2030-01-01T10:00:00+05:30'
+    updated = engine.insert(report) or engine.hotspots()
+    assert max(h['last_accident'] for h in updated) == expected
+
+
+def test_invalid_report_leaves_the_engine_unchanged(accidents):
+    df = accidents(300)
+    engine = _engine()
+    engine.load(df)
+    before = (engine._size, engine.version, engine.hotspots())
+
+    good = df.iloc[0].to_dict()
+    for bad in ({**good, 'accident_time': 'not a time'}, {**good, 'latitude': float('nan')}, {'longitude': 80.0}):
+        with pytest.raises((ValueError, KeyError)):
+            engine.insert_many([good, bad])
+        assert (engine._size, engine.version, engine.hotspots()) == before
@@ -0,0 +1,89 @@
+import io
+import json
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from flask import Flask, request
+
+import ingestion
+from ingestion import ARROW_FILE, ARROW_STREAM, read_accidents
+
+app = Flask(__name__)
+
+
+def _read(**kwargs):
+    with app.test_request_context('/', method='POST', **kwargs):
+        return read_accidents(request)
+
+
+def _arrow(df, stream=True):
+    sink = io.BytesIO()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with (pa.ipc.new_stream if stream else pa.ipc.new_file)(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _ndjson(rows):
+    return '\n'.join(json.dumps(row) for row in rows)
+
+
+@pytest.fixture(params=['naive', 'utc', 'mixed'])
+def frame(accidents, request):
+    df = accidents(50)
+    if request.param == 'utc':
+        df['accident_time'] = pd.to_datetime(df['accident_time']).dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+    elif request.param == 'mixed':
+        df.loc[3, 'accident_time'] = '2030-01-01T10:00:00Z'
+        df.loc[4, 'accident_time'] = '2030-01-01T10:00:00+05:30'
+    return df
+
+
+@pytest.mark.parametrize('with_pyarrow', [True, False])
+def test_every_body_format_gives_the_same_frame(frame, monkeypatch, with_pyarrow):
+    monkeypatch.setattr(ingestion, 'HAS_PYARROW', with_pyarrow)
+    rows = frame.to_dict('records')
+    bodies = {
+        'list': {'json': rows},
+        'legacy': {'json': {'accidents': rows, 'grid_size': 0.01}},
+        'columns': {'json': {'columns': frame.to_dict('list'), 'grid_size': 0.01}},
+        'ndjson': {'data': _ndjson(rows), 'content_type': 'application/x-ndjson'}
+    }
+    if with_pyarrow:
+        bodies['arrow-stream'] = {'data': _arrow(frame), 'content_type': ARROW_STREAM}
+        bodies['arrow-file'] = {'data': _arrow(frame, stream=False), 'content_type': ARROW_FILE}
+
+    for name, body in bodies.items():
+        df, options = _read(**body)
+        # Offsets stay in the text, for time_utils to convert
+        pd.testing.assert_frame_equal(df[frame.columns], frame, check_dtype=False, obj=name)
+        assert options == ({'grid_size': 0.01} if name in ('legacy', 'columns') else {})
+
+
+def test_binary_bodies_take_options_from_the_query_string(frame):
+    df, options = _read(data=_arrow(frame), content_type=ARROW_STREAM, query_string={'mode': 'exact', 'async': 'true'})
+    assert len(df) == len(frame) and options == {'mode': 'exact', 'async': True}
+
+
+def test_ndjson_without_times_gets_no_time_column():
+    df, _ = _read(data=_ndjson([{'latitude': 6.9, 'longitude': 79.9}]), content_type='application/x-ndjson')
+    assert list(df.columns) == ['latitude', 'longitude']
+
+
+def test_truncated_bodies_raise(frame):
+    with pytest.raises(Exception):
+        _read(data=_arrow(frame)[:-100], content_type=ARROW_STREAM)
+    with pytest.raises(Exception):
+        _read(data=_ndjson(frame.to_dict('records'))[:-10], content_type='application/x-ndjson')
+
+
+def test_detect_hotspots_answers_bad_bodies_with_400(client, frame):
+    truncated = client.post('/detect-hotspots', data=_arrow(frame)[:-100], content_type=ARROW_STREAM)
+    assert truncated.status_code == 400 and 'error' in truncated.get_json()
+
+    broken = client.post('/detect-hotspots', data='{"latitude": 6.9,', content_type='application/x-ndjson')
+    assert broken.status_code == 400
+
+    no_coordinates = client.post('/detect-hotspots', json={'columns': {'severity': ['minor', 'major']}})
+    assert no_coordinates.status_code == 400 and 'latitude' in no_coordinates.get_json()['error']
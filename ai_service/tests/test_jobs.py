@@ -0,0 +1,55 @@
+import threading
+import time
+
+from job_queue import SUCCEEDED, JobQueue, job_key
+
+
+def test_job_endpoints_report_unknown_and_failed_jobs(service, client):
+    assert client.get('/jobs/missing').status_code == 404
+    assert client.get('/jobs/missing/result').status_code == 404
+
+    def fail():
+        raise ValueError('boom')
+    status, _ = service.job_queue.submit('test-failure', fail)
+    service.job_queue.wait(status['id'], timeout=30)
+    failed = client.get(f"/jobs/{status['id']}/result")
+    assert failed.status_code == 500 and failed.get_json()['error'] == 'boom'
+
+
+def test_failed_async_job_answers_like_the_sync_request(service, client, accidents):
+    df = accidents(50)
+    df['accident_time'] = df['accident_time'].astype(str)
+    body = {'accidents': df.to_dict('records'), 'periods': 'seven'}
+    assert client.post('/forecast-accidents', json=body).status_code == 400
+
+    queued = client.post('/forecast-accidents', json={**body, 'async': True})
+    assert queued.status_code == 202
+    job_id = queued.get_json()['job']['id']
+    service.job_queue.wait(job_id, timeout=30)
+    failed = client.get(f'/jobs/{job_id}/result')
+    assert failed.status_code == 400 and failed.get_json()['success'] is False
+
+
+def test_identical_submissions_share_one_job_until_it_is_evicted(accidents):
+    queue = JobQueue(max_workers=1, ttl=0.05)
+    df = accidents(100)
+    release, runs = threading.Event(), []
+
+    def work():
+        runs.append(1)
+        release.wait(timeout=30)
+        return {'rows': len(df)}
+
+    first, deduplicated = queue.submit('test', work, key=job_key('test', df))
+    second, again = queue.submit('test', work, key=job_key('test', df.copy()))
+    assert not deduplicated and again and second['id'] == first['id']
+    release.set()
+    assert queue.wait(first['id'], timeout=30)['status'] == SUCCEEDED
+    assert len(runs) == 1 and queue.result(first['id'])[1] == {'rows': 100}
+
+    time.sleep(0.1)
+    assert queue.status(first['id']) is None
+    third, deduplicated = queue.submit('test', work, key=job_key('test', df))
+    assert not deduplicated and third['id'] != first['id']
+    assert queue.wait(third['id'], timeout=30)['status'] == SUCCEEDED and len(runs) == 2
+    queue.shutdown()
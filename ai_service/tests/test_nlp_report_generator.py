@@ -0,0 +1,89 @@
+from collections import Counter
+
+import numpy as np
+
+from nlp_report_generator import AccidentReportGenerator, SpaceSaving, StreamingReportSummarizer, tokenize
+
+WORDS = ['collision', 'junction', 'vehicle', 'rain', 'highway', 'pedestrian', 'motorcycle', 'bus',
+         'night', 'skid', 'truck', 'signal', 'bend', 'bridge', 'school', 'market']
+
+
+def _reports(n, seed=0):
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, len(WORDS) + 1)
+    words = rng.choice(WORDS, size=(n, 6), p=weights / weights.sum())
+    return [{
+        'description': ' '.join(words[i]) + ' on the road',
+        'severity': ['minor', 'major', 'dangerous'][i % 3],
+        'district': f'district-{i % 4}'
+    } for i in range(n)]
+
+
+def test_stream_summary_matches_summarize_reports():
+    reports = _reports(5000)
+    expected = AccidentReportGenerator().summarize_reports(reports)
+    summarizer = AccidentReportGenerator().summarize_stream(iter(reports), group_by='district', chunk_size=700, workers=1)
+    assert summarizer.summary() == expected
+
+    for group in summarizer.groups():
+        in_group = [r for r in reports if r['district'] == group]
+        exact = Counter(w for r in in_group for w in tokenize(r['description']))
+        assert summarizer.summary(group)['total_reports'] == len(in_group)
+        assert [t['count'] for t in summarizer.term_counts(group)] == [c for _, c in exact.most_common(10)]
+
+
+def test_incremental_adds_match_one_pass():
+    reports = _reports(3000)
+    one_pass = StreamingReportSummarizer(group_by='district', workers=1)
+    one_pass.add(reports)
+    incremental = StreamingReportSummarizer(group_by='district', workers=1)
+    for start in range(0, len(reports), 250):
+        incremental.add(reports[start:start + 250])
+    assert incremental.summary() == one_pass.summary()
+    assert incremental.summary('district-2') == one_pass.summary('district-2')
+
+
+def test_adds_below_the_pool_threshold_stay_in_process():
+    summarizer = StreamingReportSummarizer(workers=2, chunk_size=100, pool_min_reports=0)
+    assert summarizer.add(_reports(100)) == 100
+    assert summarizer._pool is None
+
+    summarizer = StreamingReportSummarizer(workers=2, chunk_size=100)
+    assert summarizer.add(_reports(2000)) == 2000
+    assert summarizer._pool is None
+
+
+def test_pool_takes_over_past_the_threshold():
+    reports = _reports(2000)
+    with StreamingReportSummarizer(group_by='district', workers=2, chunk_size=300, pool_min_reports=600) as summarizer:
+        assert summarizer.add(reports[:600]) == 600
+        assert summarizer._pool is None
+        assert summarizer.add(reports[600:]) == 1400
+        assert summarizer._pool is not None
+    assert summarizer.summary() == AccidentReportGenerator().summarize_reports(reports)
+
+
+def test_pool_is_reused_across_adds():
+    reports = _reports(2000)
+    with StreamingReportSummarizer(group_by='district', workers=2, chunk_size=300, pool_min_reports=0) as summarizer:
+        summarizer.add(reports[:1000])
+        pool = summarizer._pool
+        assert pool is not None
+        summarizer.add(reports[1000:])
+        assert summarizer._pool is pool
+    assert summarizer._pool is None
+    assert summarizer.summary() == AccidentReportGenerator().summarize_reports(reports)
+
+
+def test_space_saving_bounds():
+    rng = np.random.default_rng(1)
+    stream = rng.zipf(1.5, 20000) % 500
+    exact = Counter(stream.tolist())
+    summary = SpaceSaving(capacity=50)
+    for start in range(0, len(stream), 1000):
+        summary.update_counts(Counter(stream[start:start + 1000].tolist()))
+
+    assert len(summary) <= 50
+    for item, count, error in summary.top(10):
+        assert count - error <= exact[item] <= count
+    assert [item for item, _, _ in summary.top(3)] == [item for item, _ in exact.most_common(3)]
@@ -0,0 +1,70 @@
+import json
+
+import pandas as pd
+
+from pattern_rollups import PatternRollups
+
+
+def _reports(accidents, n=200):
+    df = accidents(n)
+    df['district'] = ['Colombo', 'Gampaha', None, 'Kandy'] * (n // 4)
+    return df
+
+
+def test_ingest_then_rebuild_gives_the_same_counters(accidents, local_zone, tmp_path):
+    local_zone('Asia/Colombo')
+    df = _reports(accidents)
+    # The backend posts UTC ISO strings; the database holds naive local times
+    posted = df.assign(accident_time=pd.to_datetime(df['accident_time'])
+                       .dt.tz_localize('Asia/Colombo').dt.tz_convert('UTC')
+                       .dt.strftime('%Y-%m-%dT%H:%M:%SZ'))
+
+    rollups = PatternRollups(path=str(tmp_path / 'rollups.json'))
+    rollups.add_many(posted.to_dict('records'))
+    ingested = {region: rollups.patterns(region) for region in [None] + rollups.regions()}
+
+    rollups.rebuild(df)
+    rebuilt = {region: rollups.patterns(region) for region in [None] + rollups.regions()}
+    assert ingested == rebuilt
+
+
+def test_patterns_shape_and_region_scopes(accidents):
+    df = _reports(accidents, 8)
+    df['accident_time'] = ['2024-03-04 08:10', '2024-03-04 08:40', '2024-03-05 17:00', None] * 2
+    rollups = PatternRollups(path=None)
+    rollups.add_many(df.to_dict('records'))
+
+    overall = rollups.patterns()
+    assert overall['total_accidents'] == 8
+    assert overall['hourly'] == {8: 4, 17: 2}
+    assert overall['daily'] == {0: 4, 1: 2} and overall['monthly'] == {3: 6}
+    assert overall['peak_hour'] == 8 and overall['peak_day'] == 0
+    assert sum(overall['severity'].values()) == 8
+    assert list(overall['severity'].values()) == sorted(overall['severity'].values(), reverse=True)
+
+    assert rollups.regions() == ['Colombo', 'Gampaha', 'Kandy']
+    assert rollups.patterns('Colombo')['total_accidents'] == 2
+    assert rollups.patterns('Kandy')['hourly'] == {} and rollups.patterns('Kandy')['peak_hour'] is None
+    assert rollups.patterns('Jaffna') is None
+
+
+def test_counters_survive_a_restart(accidents, tmp_path):
+    path = tmp_path / 'rollups.json'
+    rollups = PatternRollups(path=str(path), save_every=50, save_interval=3600)
+    reports = _reports(accidents, 80).to_dict('records')
+    rollups.add_many(reports[:40])
+    assert not path.exists()
+    rollups.add_many(reports[40:])
+    assert json.loads(path.read_text())['all']['total'] == 80
+
+    restored = PatternRollups(path=str(path))
+    assert restored.patterns() == rollups.patterns()
+    assert restored.regions() == rollups.regions()
+
+
+def test_rebuild_replaces_all_counters(accidents):
+    rollups = PatternRollups(path=None)
+    rollups.add_many(_reports(accidents, 40).to_dict('records'))
+    assert rollups.rebuild(accidents(12).drop(columns=['weather_condition'])) == 12
+    assert rollups.patterns()['total_accidents'] == 12
+    assert rollups.regions() == []
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from advanced_risk_engine import AdvancedRiskEngine
+
+WEATHERS = ['clear', 'Light Rain', 'heavy rain', 'fog', 'storm', 'snow', '', None]
+
+
+def _locations(n=120, seed=6):
+    rng = np.random.default_rng(seed)
+    return [{
+        'latitude': float(lat),
+        'longitude': float(lng),
+        'historical_rate': float(rng.uniform(-0.2, 1.2)),
+        'traffic_level': float(rng.uniform(0, 1)),
+        'weather_condition': WEATHERS[int(rng.integers(0, len(WEATHERS)))],
+        'hour': int(rng.integers(0, 24))
+    } for lat, lng in rng.uniform([6.8, 79.8], [7.0, 80.0], size=(n, 2))]
+
+
+def test_batch_scores_match_single_scores():
+    engine = AdvancedRiskEngine()
+    rng = np.random.default_rng(7)
+    inputs = rng.uniform(-0.5, 1.5, size=(500, 4))
+
+    batch = engine.compute_risk_batch(*inputs.T)
+    for i, (historical, traffic, weather, infra) in enumerate(inputs):
+        single = engine.compute_risk({'historical_rate': historical, 'traffic_level': traffic,
+                                      'weather_severity': weather, 'infrastructure_score': infra})
+        assert batch['score'][i] == single['score']
+        assert batch['level'][i] == engine.risk_level(single['score'])
+        for name, value in single['breakdown'].items():
+            assert batch['breakdown'][name][i] == pytest.approx(value, abs=1e-12)
+
+    conditions = WEATHERS * 3
+    assert engine.weather_severities(conditions).tolist() == [engine.weather_severity(c) for c in conditions]
+
+
+def test_batch_endpoint_matches_single_endpoint(client):
+    locations = _locations()
+    body = client.post('/predict-risk/batch', json={'locations': locations}).get_json()
+    assert body['success'] and body['count'] == len(locations)
+
+    for location, prediction in zip(locations, body['predictions']):
+        single = client.post('/predict-risk', json=location).get_json()
+        assert prediction['risk_score'] == single['risk_score']
+        assert prediction['risk_level'] == single['risk_level']
+        assert prediction['breakdown'] == pytest.approx(single['breakdown'], abs=1e-12)
+
+    columns = client.post('/predict-risk/batch', json={'locations': locations, 'format': 'columns'}).get_json()
+    assert columns['predictions']['risk_score'] == [p['risk_score'] for p in body['predictions']]
+
+
+def test_batch_endpoint_rejects_bad_payloads(client):
+    empty = client.post('/predict-risk/batch', json={'locations': []})
+    assert empty.status_code == 400 and not empty.get_json()['success']
+
+    no_coordinates = client.post('/predict-risk/batch', json={'locations': [{'hour': 3}]})
+    assert no_coordinates.status_code == 400 and not no_coordinates.get_json()['success']
+
+    bad_number = client.post('/predict-risk/batch', json={'locations': [{'latitude': 6.9, 'longitude': 79.9, 'traffic_level': 'busy'}]})
+    assert bad_number.status_code == 400 and not bad_number.get_json()['success']
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from hotspot_index import HotspotIndex
+from route_risk import RouteRiskScorer, decode_polyline, densify, route_points, segment_lengths_km
+
+
+def _hotspot(cluster_id, lat, lng, risk_score=4.5, risk_level='high'):
+    return {'cluster_id': cluster_id, 'center': {'lat': lat, 'lng': lng}, 'risk_level': risk_level,
+            'risk_score': risk_score, 'total_accidents': 20}
+
+
+def test_decode_polyline_matches_googles_example():
+    # https://developers.google.com/maps/documentation/utilities/polylinealgorithm
+    lats, lngs = decode_polyline('_p~iF~ps|U_ulLnnqC_mqNvxq`@')
+    assert lats.tolist() == pytest.approx([38.5, 40.7, 43.252], abs=1e-9)
+    assert lngs.tolist() == pytest.approx([-120.2, -120.95, -126.453], abs=1e-9)
+    assert route_points({'overview_polyline': {'points': '_p~iF~ps|U_ulLnnqC_mqNvxq`@'}})[0].tolist() == lats.tolist()
+
+
+def test_densify_spacing_over_a_long_segment():
+    lats, lngs = np.array([6.9, 7.0]), np.array([79.9, 79.9])  # about 11.1 km north
+    length = segment_lengths_km(lats, lngs)[0]
+    dense_lats, dense_lngs, segment, weight = densify(lats, lngs, 0.05)
+
+    assert len(dense_lats) == int(np.ceil(length / 0.05)) + 1
+    spacing = segment_lengths_km(dense_lats, dense_lngs)
+    assert spacing.max() <= 0.05 and spacing == pytest.approx(np.full(len(spacing), spacing[0]))
+    assert (dense_lats[0], dense_lats[-1]) == (6.9, 7.0) and np.all(np.diff(dense_lats) > 0)
+    assert weight.sum() == pytest.approx(length) and weight[-1] == 0
+    assert set(segment.tolist()) == {0}
+
+
+def test_densify_keeps_short_segments_whole():
+    lats, lngs = [6.9, 6.9001, 6.9002], [79.9, 79.9001, 79.9]
+    dense_lats, dense_lngs, segment, weight = densify(lats, lngs, 0.05)
+    assert dense_lats.tolist() == lats and dense_lngs.tolist() == lngs
+    assert segment.tolist() == [0, 1, 1]
+    assert weight[:2].tolist() == pytest.approx(segment_lengths_km(np.array(lats), np.array(lngs)).tolist())
+
+
+def test_route_past_one_hotspot_flags_only_its_segment():
+    # Four 2.2 km legs heading east; the hotspot sits beside the middle of the third
+    route = [[6.9, 79.80], [6.9, 79.82], [6.9, 79.84], [6.9, 79.86], [6.9, 79.88]]
+    index = HotspotIndex([_hotspot(7, 6.901, 79.85), _hotspot(8, 7.2, 80.3)])
+    result, = RouteRiskScorer(index).score([route])
+
+    assert [h['cluster_id'] for h in result['hotspots']] == [7]
+    segment, = result['offending_segments']
+    assert (segment['start_index'], segment['end_index']) == (2, 3)
+    assert segment['hotspot_ids'] == [7] and segment['risk_level'] == 'high'
+    assert result['cumulative_risk'] > 0
+
+    clear, = RouteRiskScorer(index).score([[[6.95, 79.80], [6.95, 79.88]]])
+    assert clear['hotspots'] == [] and clear['offending_segments'] == [] and clear['cumulative_risk'] == 0
+
+
+def test_batched_radius_query_matches_per_point_queries():
+    rng = np.random.default_rng(2)
+    centers = rng.uniform([6.88, 79.84], [6.92, 79.9], size=(150, 2))
+    index = HotspotIndex([_hotspot(i, lat, lng) for i, (lat, lng) in enumerate(centers)])
+    lats, lngs, _, _ = densify([6.88, 6.9, 6.92], [79.84, 79.88, 79.9], 0.05)
+
+    point_idx, hotspot_idx, distances = index.query_radius_many(lats, lngs, 0.5)
+    assert len(point_idx) > 0
+    for p, (lat, lng) in enumerate(zip(lats, lngs)):
+        nearby, nearby_distances = index.query_radius(lat, lng, 0.5)
+        assert hotspot_idx[point_idx == p].tolist() == nearby.tolist()
+        assert distances[point_idx == p] == pytest.approx(nearby_distances)
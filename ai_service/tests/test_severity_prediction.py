@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from model_registry import ModelRegistry
+from severity_prediction import SeverityPredictor
+
+
+@pytest.fixture(scope='module')
+def trained(training_rows):
+    predictor = SeverityPredictor()
+    X, y, _ = predictor.preprocess_data(training_rows(400))
+    predictor.train_model(X, y, n_jobs=1)
+    return predictor
+
+
+def _reference_proba(predictor, rows):
+    """Ensemble probabilities straight from the fitted sklearn estimators"""
+    raw = pd.DataFrame([[row.get(f, 0) for f in predictor.features] for row in rows], columns=predictor.features, dtype=float)
+    X = predictor.scaler.transform(raw)
+    return (predictor.model['random_forest'].predict_proba(X) +
+            predictor.model['logistic_regression'].predict_proba(X)) / 2
+
+
+def _rows(n, seed=1):
+    rng = np.random.default_rng(seed)
+    return [{
+        'hour_of_day': int(rng.integers(0, 24)),
+        'day_of_week': int(rng.integers(0, 7)),
+        'month': int(rng.integers(1, 13)),
+        'is_rainy': int(rng.integers(0, 2)),
+        'location_cluster': int(rng.integers(0, 50)),
+        'previous_accidents_count': int(rng.integers(0, 20)),
+        'speed_limit': int(rng.choice([40, 60, 80]))
+    } for _ in range(n)]
+
+
+def test_fast_path_matches_sklearn(trained):
+    rows = _rows(200) + [{}]
+    expected = _reference_proba(trained, rows)
+    classes = trained.label_encoder.classes_
+
+    for row, proba in zip(rows, expected):
+        result = trained.predict(row)
+        assert result['severity'] == classes[np.argmax(proba)]
+        assert [result['probabilities'][c] for c in ('minor', 'major', 'dangerous')] == pytest.approx(proba.tolist(), abs=1e-9)
+
+
+def test_batch_matches_single_predictions(trained):
+    rows = _rows(50)
+    single = [trained.predict(row) for row in rows]
+    for batch in (trained.predict_batch(rows, chunk_size=7),
+                  trained.predict_batch({f: [row.get(f, 0) for row in rows] for f in trained.features}, chunk_size=16)):
+        assert [b['severity'] for b in batch] == [s['severity'] for s in single]
+        for b, s in zip(batch, single):
+            assert b['probabilities'] == pytest.approx(s['probabilities'], abs=1e-12)
+    with pytest.raises(ValueError):
+        trained.predict_batch({'hour_of_day': [1, 2], 'month': [3]})
+
+
+def test_severity_endpoints_report_errors(service, client, tmp_path, monkeypatch, trained):
+    monkeypatch.setattr(service, 'model_registry', ModelRegistry(str(tmp_path / 'empty')))
+    unloaded = client.post('/predict-severity/batch', json={'rows': [{}]})
+    assert unloaded.status_code == 400 and 'No severity model loaded' in unloaded.get_json()['error']
+    assert client.post('/predict-severity', json={}).status_code == 400
+
+    trained.save_model(str(tmp_path / 'models' / 'v1'))
+    registry = ModelRegistry(str(tmp_path / 'models'))
+    registry.load()
+    monkeypatch.setattr(service, 'model_registry', registry)
+    ragged = client.post('/predict-severity/batch', json={'columns': {'hour_of_day': [1, 2], 'month': [3]}})
+    assert ragged.status_code == 400 and not ragged.get_json()['success']
+
+    rows = _rows(5)
+    body = client.post('/predict-severity/batch', json={'rows': rows, 'chunk_size': 0}).get_json()
+    assert body['count'] == 5
+    assert [p['severity'] for p in body['predictions']] == [trained.predict(row)['severity'] for row in rows]
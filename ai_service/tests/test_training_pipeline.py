@@ -0,0 +1,90 @@
+import logging
+import os
+
+import joblib
+
+import training_pipeline
+from model_registry import ModelRegistry
+from training_pipeline import TrainingPipeline
+
+
+def test_activation_goes_through_the_live_registry(tmp_path, monkeypatch, training_rows):
+    registry = ModelRegistry(str(tmp_path / 'models'))
+    loads = []
+    load = registry.load
+    monkeypatch.setattr(registry, 'load', lambda version=None: loads.append(version) or load(version))
+
+    def no_second_registry(*args, **kwargs):
+        raise AssertionError('activation must not build another registry')
+    monkeypatch.setattr(training_pipeline, 'ModelRegistry', no_second_registry)
+
+    pipeline = TrainingPipeline(output_dir=registry.root, cache_dir=str(tmp_path / 'cache'), n_jobs=1)
+    report = pipeline.run([training_rows()], activate=True, registry=registry)
+    assert loads == [report['version']]
+    assert registry.version == registry.current_version() == report['version']
+
+
+def test_runs_in_the_same_second_get_distinct_versions(tmp_path, training_rows):
+    pipeline = TrainingPipeline(output_dir=str(tmp_path / 'models'), cache_dir=str(tmp_path / 'cache'), n_jobs=1)
+    rows = training_rows()
+    first = pipeline.run([rows])['version']
+    second = pipeline.run([rows])['version']
+    assert first != second
+    assert ModelRegistry(pipeline.output_dir).versions() == [first, second]
+
+
+def _pipeline(tmp_path, **kwargs):
+    return TrainingPipeline(output_dir=str(tmp_path / 'models'), cache_dir=str(tmp_path / 'cache'), n_jobs=1, **kwargs)
+
+
+def _feature_files(pipeline):
+    return sorted(f for f in os.listdir(pipeline.cache_dir) if f.startswith('features_'))
+
+
+def test_same_data_reuses_cached_features_and_new_data_does_not(tmp_path, training_rows):
+    pipeline = _pipeline(tmp_path)
+    rows = training_rows(seed=1)
+    assert not pipeline.run([rows])['feature_cache_hit']
+    # Chunking does not change the fingerprint
+    assert pipeline.run([rows[:100], rows[100:]])['feature_cache_hit']
+
+    changed = rows.copy()
+    changed.loc[0, 'severity'] = 'dangerous' if rows.loc[0, 'severity'] != 'dangerous' else 'minor'
+    assert not pipeline.run([changed])['feature_cache_hit']
+    assert pipeline.run([changed])['feature_cache_hit']
+
+
+def test_feature_cache_keeps_the_most_recently_used_files(tmp_path, training_rows):
+    pipeline = _pipeline(tmp_path, keep_features=2)
+    for seed in (1, 2, 3):
+        pipeline.run([training_rows(seed=seed)])
+    assert len(_feature_files(pipeline)) == 2
+    # The oldest data set was pruned, the newest two are still cached
+    assert not pipeline.run([training_rows(seed=1)])['feature_cache_hit']
+    assert pipeline.run([training_rows(seed=3)])['feature_cache_hit']
+
+
+def test_location_clusters_are_refit_when_stale(tmp_path, training_rows):
+    pipeline = _pipeline(tmp_path, cluster_max_age_days=30)
+    pipeline.run([training_rows(seed=1)])
+    path = pipeline._location_model_path()
+    cached = joblib.load(path)
+    cached['fitted_at'] -= 31 * 86400
+    joblib.dump(cached, path)
+
+    # New data with a stale model: refit on it, so the model's fingerprint moves to the new data
+    pipeline.run([training_rows(seed=2)])
+    refreshed = joblib.load(path)
+    assert refreshed['fitted_at'] > cached['fitted_at'] + 30 * 86400
+    assert refreshed['fingerprint'] != cached['fingerprint']
+
+
+def test_drifted_data_logs_a_warning(tmp_path, training_rows, caplog):
+    pipeline = _pipeline(tmp_path)
+    pipeline.run([training_rows(seed=1)])
+
+    moved = training_rows(seed=2)
+    moved['latitude'] += 1.5  # Far outside the fitted clusters
+    with caplog.at_level(logging.WARNING, logger='training_pipeline'):
+        pipeline.run([moved])
+    assert any('consider --refit-clusters' in r.getMessage() for r in caplog.records)
@@ -1,5 +1,7 @@
 import os
+import warnings
 import joblib
+import numpy as np
 import pandas as pd
 from datetime import timedelta
 
@@ -11,14 +13,64 @@ except Exception:
     HAS_PROPHET = False
 
 
+def fit_seasonal_smoothing(values, alpha=0.3, season=7, window_seasons=8):
+    """Additive weekly seasonality + simple exponential smoothing, vectorized over series.
+
+    `values` is an (n_series, n_days) array of daily counts on a shared date
+    axis, with NaN before each series starts. Seasonal offsets come from the
+    last `window_seasons` seasons; series with no data for a phase get a zero
+    offset. Returns `(level, seasonal)` with shapes (n_series,) and
+    (n_series, season); `seasonal[:, p]` applies to day columns with
+    `column % season == p`.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    n_series, n_days = values.shape
+    phases = np.arange(n_days) % season
+
+    window = min(n_days, season * window_seasons)
+    recent = values[:, n_days - window:]
+    recent_phases = phases[n_days - window:]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        overall = np.nanmean(recent, axis=1)
+        seasonal = np.column_stack([
+            np.nanmean(recent[:, recent_phases == p], axis=1) if (recent_phases == p).any() else np.full(n_series, np.nan)
+            for p in range(season)
+        ]) - overall[:, None]
+    seasonal = np.nan_to_num(seasonal)
+
+    deseasonalized = values - seasonal[:, phases]
+    level = np.full(n_series, np.nan)
+    for t in range(n_days):
+        x = deseasonalized[:, t]
+        observed = ~np.isnan(x)
+        start = observed & np.isnan(level)
+        update = observed & ~start
+        level[start] = x[start]
+        level[update] = alpha * x[update] + (1 - alpha) * level[update]
+
+    return np.nan_to_num(level), seasonal
+
+
+def forecast_seasonal_smoothing(level, seasonal, n_days, periods):
+    """(n_series, periods) forecasts for the days after an `n_days`-long history"""
+    season = seasonal.shape[1]
+    future_phases = (n_days + np.arange(periods)) % season
+    return np.clip(level[:, None] + seasonal[:, future_phases], 0, None)
+
+
 class AccidentForecaster:
     """Simple wrapper around Prophet (if available) with a fallback.
 
     Methods expect a pandas DataFrame with columns `ds` (datetime) and `y` (numeric).
+    Without Prophet, `fallback='mean'` forecasts the last-window average and
+    `fallback='seasonal'` fits weekly seasonality with exponential smoothing
+    on daily totals.
     """
 
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, fallback='mean'):
         self.model_path = model_path or os.path.join(os.getcwd(), 'ai_models', 'forecaster.joblib')
+        self.fallback = fallback
         self.model = None
 
     def fit(self, df: pd.DataFrame):
@@ -26,6 +78,16 @@ class AccidentForecaster:
             m = Prophet()
             m.fit(df)
             self.model = m
+        elif self.fallback == 'seasonal':
+            daily = df.set_index(pd.to_datetime(df['ds']))['y'].resample('D').sum()
+            level, seasonal = fit_seasonal_smoothing(daily.to_numpy()[None, :])
+            self.model = {
+                'method': 'seasonal',
+                'level': level,
+                'seasonal': seasonal,
+                'n_days': len(daily),
+                'last_ds': daily.index[-1]
+            }
         else:
             # Fallback: store last-window average as a trivial model
             self.model = {'mean': float(df['y'].tail(30).mean())}
@@ -38,6 +100,10 @@ class AccidentForecaster:
             future = self.model.make_future_dataframe(periods=periods, freq=freq)
             forecast = self.model.predict(future)
             return forecast[['ds', 'yhat']].tail(periods)
+        elif self.model.get('method') == 'seasonal':
+            yhat = forecast_seasonal_smoothing(self.model['level'], self.model['seasonal'], self.model['n_days'], periods)[0]
+            ds = pd.date_range(self.model['last_ds'] + timedelta(days=1), periods=periods, freq='D')
+            return pd.DataFrame({'ds': ds, 'yhat': yhat})
         else:
             # naive constant forecast
             from datetime import datetime
@@ -0,0 +1,38 @@
+# time_utils.py
+import pandas as pd
+from dateutil.tz import tzlocal
+
+
+def local_naive(value):
+    """Timestamp for `value` as naive local time (NaT when missing).
+
+    Offset-aware input is converted to the service's time zone first; naive
+    input is taken to be local already, which is how accident_reports stores
+    accident_time. Hour-of-day patterns and the times they are matched
+    against then use the same clock.
+    """
+    ts = pd.Timestamp(value)
+    if not pd.isna(ts) and ts.tzinfo is not None:
+        ts = pd.Timestamp(ts.to_pydatetime().astimezone().replace(tzinfo=None))
+    return ts
+
+
+def local_naive_times(values):
+    """`local_naive` for a whole column, as a datetime64[ns] Series.
+
+    Columns parsed in one go (naive, or one offset throughout) are converted
+    vectorised; columns mixing offsets fall back to converting each value.
+    """
+    values = pd.Series(values)
+    try:
+        times = pd.to_datetime(values)
+    except (TypeError, ValueError):
+        return pd.Series([local_naive(v) for v in values], index=values.index, dtype='datetime64[ns]')
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert(tzlocal()).dt.tz_localize(None)
+    return times.astype('datetime64[ns]')
+
+
+def is_night_hour(hour):
+    """Whether `hour` (an int or an array of them) falls in 18:00-06:59, across midnight"""
+    return (hour >= 18) | (hour <= 6)
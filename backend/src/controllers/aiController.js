@@ -11,18 +11,14 @@ exports.getHotspots = async (req, res) => {
 };
 
 exports.checkAlerts = async (req, res) => {
-  const { latitude, longitude, weather } = req.body;
+  const { latitude, longitude, weather, timestamp } = req.body;
   try {
-    // Get all hotspots from DB
-    const hotspotsResult = await db.query('SELECT * FROM hotspots');
-    const hotspots = hotspotsResult.rows;
-
-    // Call AI service to check if user is in a risk zone
+    // The AI service keeps its own hotspot set; only the user's context is sent
     const response = await axios.post(`${process.env.AI_SERVICE_URL || 'http://localhost:5000'}/check-alerts`, {
       latitude,
       longitude,
-      hotspots,
-      weather
+      weather,
+      timestamp
     });
 
     res.json(response.data);
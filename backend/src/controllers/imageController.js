@@ -68,6 +68,57 @@ exports.uploadImage = async (req, res) => {
   }
 };
 
+exports.uploadImages = async (req, res) => {
+  const files = req.files || [];
+  try {
+    if (files.length === 0) {
+      return res.status(400).json({ error: 'No image files provided' });
+    }
+
+    const allowedMimes = ['image/jpeg', 'image/png', 'image/jpg'];
+    const invalid = files.find(file => !allowedMimes.includes(file.mimetype));
+    if (invalid) {
+      files.forEach(file => fs.existsSync(file.path) && fs.unlinkSync(file.path));
+      return res.status(400).json({ error: `Invalid file type for ${invalid.originalname}. Only JPEG and PNG allowed.` });
+    }
+
+    const images = files.map((file, i) => {
+      const filename = `${Date.now()}_${i}_${file.originalname}`;
+      const filepath = path.join(uploadsDir, filename);
+      fs.renameSync(file.path, filepath);
+      return { file, filename, filepath };
+    });
+
+    // One EXIF round trip for the whole set; results come back in upload order
+    let gpsResults = [];
+    try {
+      const response = await axios.post(`${process.env.AI_SERVICE_URL || 'http://localhost:5000'}/extract-exif/batch`, {
+        images: images.map(({ filepath, filename }) => ({ image_path: filepath, filename }))
+      });
+      gpsResults = response.data.results || [];
+    } catch (aiErr) {
+      console.warn('Batch EXIF extraction failed:', aiErr.message);
+    }
+
+    res.status(201).json({
+      success: true,
+      images: images.map(({ file, filename, filepath }, i) => ({
+        image_url: `/uploads/${filename}`,
+        image_path: filepath,
+        filename: filename,
+        size: file.size,
+        mimetype: file.mimetype,
+        gps_data: gpsResults[i] ? gpsResults[i].gps_data : null
+      })),
+      message: `${images.length} images uploaded and processed successfully`
+    });
+
+  } catch (err) {
+    files.forEach(file => fs.existsSync(file.path) && fs.unlinkSync(file.path));
+    res.status(500).json({ error: err.message });
+  }
+};
+
 exports.getImage = async (req, res) => {
   try {
     const { filename } = req.params;
@@ -18,10 +18,10 @@ exports.createReport = async (req, res) => {
 
     const report = result.rows[0];
 
-    // 2. Call AI service for severity prediction validation or update hotspots
+    // 2. Add the report to the AI service's live hotspot set (incremental update)
     // This could be async or via a message queue in production
     try {
-        await axios.post(`${process.env.AI_SERVICE_URL || 'http://localhost:5000'}/detect-hotspots`, [report]);
+        await axios.post(`${process.env.AI_SERVICE_URL || 'http://localhost:5000'}/hotspots/ingest`, report);
     } catch (aiErr) {
         console.error('AI Service Error:', aiErr.message);
     }
@@ -33,6 +33,7 @@ router.get('/reports/:id', auth, reportController.getReportById);
 
 // Image Upload
 router.post('/images/upload', auth, upload.single('image'), imageController.uploadImage);
+router.post('/images/upload-batch', auth, upload.array('images', 30), imageController.uploadImages);
 router.get('/images/:filename', imageController.getImage);
 router.delete('/images/:filename', auth, imageController.deleteImage);
 